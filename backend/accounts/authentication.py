@@ -0,0 +1,71 @@
+"""
+JWT authentication without a user query.
+
+Tokens from ``ClaimsRefreshToken`` (and the access tokens derived from it)
+carry the user's ``User.TOKEN_CLAIM_FIELDS``. ``ClaimsJWTAuthentication``
+builds the request user from those claims with ``User.from_token_claims``,
+so permission checks on ``is_staff`` and dispatch on ``user_type`` cost no
+query; other fields are loaded on first access. Deactivation and role
+changes reach tokens already issued through accounts.revocation, and so do
+single-session logouts: refresh tokens get a session id (``sid``) that their
+access tokens inherit, checked against the revoked token set. Tokens issued
+before the claims existed are resolved from the database as before.
+"""
+from uuid import uuid4
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+from .revocation import revocations, revoke_refresh_token, revoked_tokens
+
+
+class ClaimsRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        # Kept by every access token and rotation of this login
+        token['sid'] = uuid4().hex
+        for name in User.TOKEN_CLAIM_FIELDS:
+            token[name] = getattr(user, name)
+        return token
+
+
+def check_not_revoked(token, *id_claims):
+    """Refuse ``token`` if its user's tokens or any of its ``id_claims`` were revoked"""
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if (
+        (user_id is not None and revocations.is_revoked(user_id, token.get('iat')))
+        or any(revoked_tokens.is_revoked(token.get(claim)) for claim in id_claims)
+    ):
+        raise AuthenticationFailed(_('Token has been revoked.'), code='token_revoked')
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        check_not_revoked(validated_token, 'sid')
+        if all(name in validated_token for name in User.TOKEN_CLAIM_FIELDS):
+            return User.from_token_claims(user_id, validated_token)
+        return super().get_user(validated_token)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuses revoked refresh tokens and revokes the ones rotation replaces"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        check_not_revoked(refresh, api_settings.JTI_CLAIM, 'sid')
+        data = super().validate(attrs)
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            # The session goes on with the new refresh token
+            revoke_refresh_token(refresh, session=False)
+        return data
@@ -0,0 +1,106 @@
+"""
+Password hashing on a bounded pool.
+
+Login and registration spend almost all their time in the password hasher
+(PBKDF2 by default, on the order of 100 ms of CPU per call). Left on the
+request threads, a login burst runs as many hashes at once as there are
+threads, and every other request on the host competes with them for the
+CPU. The auth views hand the work to one small, process-wide thread pool
+instead (the hashers release the GIL, so threads are enough) and wait for
+it.
+
+The pool is bounded twice: ``AUTH_HASHING_WORKERS`` threads hash at once and
+at most ``AUTH_HASHING_MAX_PENDING`` calls may be running or queued. Past
+that, ``PoolSaturated`` is raised straight away and the views answer 503
+with ``Retry-After: AUTH_HASHING_RETRY_AFTER`` rather than letting a login
+storm build a queue that every later request waits behind.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PoolSaturated(Exception):
+    """The hashing pool has no room for another call"""
+
+
+class HashingPool:
+    def __init__(self, workers=None, max_pending=None):
+        self._workers = workers
+        self._max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+
+    @property
+    def workers(self):
+        return self._workers or getattr(settings, 'AUTH_HASHING_WORKERS', None) or os.cpu_count() or 1
+
+    @property
+    def max_pending(self):
+        return self._max_pending or getattr(settings, 'AUTH_HASHING_MAX_PENDING', None) or self.workers * 8
+
+    def _release(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def submit(self, func, *args):
+        """Start ``func(*args)`` on the pool; raises ``PoolSaturated`` when full"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated
+            self.pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hashing')
+        # Counted until the hash is done, even if the client has gone away
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def call(self, func, *args):
+        """``func(*args)``, run on the pool and waited for"""
+        return self.submit(func, *args).result()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+pool = HashingPool()
+
+
+def retry_after():
+    return getattr(settings, 'AUTH_HASHING_RETRY_AFTER', 1)
+
+
+def make_password(password):
+    return pool.call(hashers.make_password, password)
+
+
+def check_password(password, encoded):
+    """Whether ``password`` matches ``encoded``; never upgrades the hash itself"""
+    return pool.call(hashers.check_password, password, encoded)
+
+
+def make_passwords(passwords):
+    """
+    Hash a batch of passwords. Picklable and free of model imports, so bulk
+    imports can run it in worker processes.
+    """
+    return [hashers.make_password(password) for password in passwords]
+
+
+def must_update(encoded):
+    """Whether ``encoded`` uses outdated hasher settings (cheap, no hashing)"""
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != hashers.get_hasher().algorithm or hasher.must_update(encoded)
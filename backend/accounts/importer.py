@@ -0,0 +1,297 @@
+"""
+Bulk user import, for onboarding a whole organisation at once.
+
+Rows (CSV or NDJSON, read as a stream) carry ``email``, ``user_type``
+(clinic, employer or job_seeker), an optional ``password`` and the fields of
+that type's profile. Each batch is written in one transaction with a
+``bulk_create`` for the users and one per profile model, the profiles linked
+to the user pks the first returns. Passwords are hashed in a process pool
+before the batch is written. Rows without a password, and every row when
+passwords are not kept, get an unusable password: the account cannot sign
+in until a password is set for it.
+
+Emails that are already registered are skipped and counted as ``existing``,
+so re-running an import is harmless. With a ``Checkpoint`` the importer
+records the last row of every committed batch and a re-run resumes after
+it. ``bulk_create`` skips model signals, so each batch indexes the new
+emails for search and geocodes clinic addresses itself; the matching engine
+picks new seeker profiles up through ``updated_at``.
+"""
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, models, transaction
+
+from arnica_connect.imports import read_rows
+from geo.geohash import encode
+from geo.signals import locate
+from profiles.models import PROFILE_MODELS
+
+from .hashing import make_passwords
+from .models import User
+from .search import index_emails
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+DEFAULT_MAX_ERRORS = 1000
+MIN_PASSWORD_LENGTH = 8  # As at registration
+
+COUNTS = ('rows', 'created', 'existing', 'failed')
+
+
+class CheckpointError(Exception):
+    pass
+
+
+class Checkpoint:
+    """
+    The last committed row of an import, kept in a JSON file next to the
+    running totals. ``source`` identifies the input (path and size), so a
+    checkpoint is never applied to a different file.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+
+    @classmethod
+    def for_file(cls, path, input_path):
+        return cls(path, f'{os.path.abspath(input_path)}:{os.path.getsize(input_path)}')
+
+    def load(self):
+        """``(row, counts)`` to resume from; ``(0, {})`` for a fresh import"""
+        try:
+            with open(self.path) as stream:
+                state = json.load(stream)
+        except FileNotFoundError:
+            return 0, {}
+        except ValueError:
+            raise CheckpointError(f'{self.path} is not a valid checkpoint; delete it to start over.')
+        if state.get('source') != self.source:
+            raise CheckpointError(
+                f'{self.path} was written for another input ({state.get("source")}); '
+                'delete it to start over.'
+            )
+        return state['row'], state['counts']
+
+    def save(self, row, counts):
+        # Replaced in one step, so an interruption never leaves half a file
+        partial = f'{self.path}.tmp'
+        with open(partial, 'w') as stream:
+            json.dump({'source': self.source, 'row': row, 'counts': counts}, stream)
+        os.replace(partial, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def profile_fields(model):
+    """Fields an import row may set on a profile: no uploads or bookkeeping"""
+    return [
+        field for field in model._meta.concrete_fields
+        if field.editable and not field.primary_key and field.name != 'user'
+        and not isinstance(field, models.FileField)
+    ]
+
+
+PROFILE_FIELDS = {user_type: profile_fields(model) for user_type, model in PROFILE_MODELS.items()}
+EMAIL_FIELD = User._meta.get_field('email')
+
+
+def _clean_field(field, raw, values, errors):
+    value = raw.get(field.name)
+    if isinstance(value, str):
+        value = value.strip()
+    if value in (None, ''):
+        if field.has_default():
+            return
+        if not field.blank:
+            errors[field.name] = 'This field is required.'
+            return
+        values[field.name] = None if field.null else ''
+        return
+    try:
+        values[field.name] = field.clean(value, None)
+    except ValidationError as exc:
+        errors[field.name] = ' '.join(exc.messages)
+
+
+def clean_row(raw, keep_passwords=True):
+    """Validate one raw row; returns ``(user values, profile values, errors)``"""
+    values, profile, errors = {}, {}, {}
+
+    try:
+        values['email'] = User.objects.normalize_email(EMAIL_FIELD.clean(_text(raw.get('email')), None))
+    except ValidationError as exc:
+        errors['email'] = ' '.join(exc.messages)
+
+    user_type = _text(raw.get('user_type')).lower().replace(' ', '_').replace('-', '_')
+    if user_type not in PROFILE_FIELDS:
+        errors['user_type'] = f"Must be one of {', '.join(PROFILE_FIELDS)}."
+        return values, profile, errors
+    values['user_type'] = user_type
+
+    # Passwords are taken as given, never stripped
+    password = raw.get('password') if keep_passwords else None
+    if password in (None, ''):
+        values['password'] = None
+    elif not isinstance(password, str) or len(password) < MIN_PASSWORD_LENGTH:
+        errors['password'] = f'Ensure this field has at least {MIN_PASSWORD_LENGTH} characters.'
+    else:
+        values['password'] = password
+
+    for field in PROFILE_FIELDS[user_type]:
+        _clean_field(field, raw, profile, errors)
+    return values, profile, errors
+
+
+class UserImporter:
+    """
+    Import parsed rows. ``run()`` returns a report with totals and the
+    errors of failed rows (the first ``max_errors`` of them); ``progress``
+    is called with it after every batch.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, max_errors=DEFAULT_MAX_ERRORS,
+                 keep_passwords=True, workers=None, checkpoint=None, progress=None):
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.max_errors = max_errors
+        self.keep_passwords = keep_passwords
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint = checkpoint
+        self.progress = progress
+        self.report = {name: 0 for name in COUNTS}
+        self.report.update(errors=[], errors_truncated=False, resumed_after=0)
+        self._batch = []
+        self._emails = set()
+        self._last_row = 0
+        self._executor = None
+
+    def run(self, rows):
+        if self.checkpoint is not None:
+            self._last_row, counts = self.checkpoint.load()
+            self.report.update(counts, resumed_after=self._last_row)
+        self._started = time.monotonic()
+        self._resumed_rows = self.report['rows']
+        if self.keep_passwords and self.workers > 1:
+            self._executor = ProcessPoolExecutor(self.workers)
+        try:
+            for number, raw, error in rows:
+                if number <= self.report['resumed_after']:
+                    continue
+                self.report['rows'] += 1
+                self._last_row = number
+                if error:
+                    self._error(number, None, {'non_field_errors': error})
+                    continue
+                values, profile, errors = clean_row(raw, self.keep_passwords)
+                if errors:
+                    self._error(number, values.get('email'), errors)
+                    continue
+                self._add(number, values, profile)
+            self._flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+        self._timing()
+        return self.report
+
+    def _timing(self):
+        # Rows read by this run, not those before the checkpoint
+        rows = self.report['rows'] - self._resumed_rows
+        seconds = time.monotonic() - self._started
+        self.report['seconds'] = round(seconds, 3)
+        self.report['rows_per_second'] = round(rows / seconds) if seconds else None
+
+    def _error(self, number, email, errors):
+        self.report['failed'] += 1
+        if len(self.report['errors']) < self.max_errors:
+            self.report['errors'].append({'row': number, 'email': email, 'errors': errors})
+        else:
+            self.report['errors_truncated'] = True
+
+    def _add(self, number, values, profile):
+        if values['email'] in self._emails:
+            self._error(number, values['email'], {'email': 'Duplicate email in this batch.'})
+            return
+        self._emails.add(values['email'])
+        password = values.pop('password')
+        self._batch.append((number, User(**values), profile, password))
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _hash(self, passwords):
+        if self._executor is None or len(passwords) < 2:
+            return make_passwords(passwords)
+        size = math.ceil(len(passwords) / self.workers)
+        chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+        return [encoded for chunk in self._executor.map(make_passwords, chunks) for encoded in chunk]
+
+    def _flush(self):
+        batch, self._batch, self._emails = self._batch, [], set()
+        existing = set(
+            User.objects.filter(email__in=[user.email for _, user, _, _ in batch]).values_list('email', flat=True)
+        ) if batch else set()
+        fresh = [item for item in batch if item[1].email not in existing]
+        self.report['existing'] += len(batch) - len(fresh)
+        if fresh:
+            # make_password(None) is cheap: an unusable password
+            for (_, user, _, _), encoded in zip(fresh, self._hash([password for *_, password in fresh])):
+                user.password = encoded
+            try:
+                self._write(fresh)
+            except DatabaseError as exc:
+                for number, user, _, _ in fresh:
+                    self._error(number, user.email, {'non_field_errors': str(exc)})
+            else:
+                self.report['created'] += len(fresh)
+        if self.checkpoint is not None:
+            self.checkpoint.save(self._last_row, {name: self.report[name] for name in COUNTS})
+        if self.progress is not None and batch:
+            self._timing()
+            self.progress(self.report)
+
+    def _write(self, batch):
+        users = [user for _, user, _, _ in batch]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            self._fill_pks(users)
+            profiles = {}
+            for _, user, values, _ in batch:
+                model = PROFILE_MODELS[user.user_type]
+                profile = model(user=user, **values)
+                if getattr(model, 'geocode_field', None):
+                    # bulk_create skips the pre_save geocoding
+                    if profile.latitude is None or profile.longitude is None:
+                        locate(profile)
+                    else:
+                        profile.geohash = encode(profile.latitude, profile.longitude)
+                profiles.setdefault(model, []).append(profile)
+            for model, rows in profiles.items():
+                model.objects.bulk_create(rows)
+            index_emails((user.pk, user.email) for user in users)
+
+    def _fill_pks(self, users):
+        # Backends without RETURNING leave pk unset
+        missing = {user.email: user for user in users if user.pk is None}
+        if missing:
+            for email, pk in User.objects.filter(email__in=list(missing)).values_list('email', 'pk'):
+                missing[email].pk = pk
+
+
+def import_users(stream, fmt, **options):
+    """Import a CSV or NDJSON binary stream; see ``UserImporter``"""
+    return UserImporter(**options).run(read_rows(stream, fmt))
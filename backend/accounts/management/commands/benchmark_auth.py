@@ -0,0 +1,118 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import hashing
+from accounts.models import User
+from arnica_connect.benchmark import Timer, isolated_database, rate
+
+PASSWORD = 'benchmark-password'
+
+
+class InlinePool(hashing.HashingPool):
+    """Hashes on the calling request thread, unbounded"""
+
+    def call(self, func, *args):
+        return func(*args)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the latency of an ordinary endpoint (/api/auth/me/) while a burst '
+        'of logins arrives on as many request threads, with password hashing inline '
+        'on the request threads and on the bounded hashing pool. Runs on a throwaway '
+        'test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=60, help='Logins in the burst')
+        parser.add_argument('--concurrency', type=int, default=60, help='Request threads sending logins')
+        parser.add_argument('--probes', type=int, default=40, help='Requests to the probed endpoint')
+        parser.add_argument('--workers', type=int, default=hashing.pool.workers)
+        parser.add_argument('--max-pending', type=int, default=hashing.pool.max_pending)
+
+    def handle(self, *args, **options):
+        for name in ('logins', 'concurrency', 'probes', 'workers', 'max_pending'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+
+        # The burst comes from one client, so the login rate limits would
+        # reject most of it
+        with isolated_database(), override_settings(RATELIMITS={}):
+            # One hash shared by every account keeps setup fast
+            encoded = make_password(PASSWORD)
+            users = User.objects.bulk_create([
+                User(email=f'user{i}@example.com', user_type='job_seeker', password=encoded)
+                for i in range(options['logins'])
+            ])
+            self.token = str(RefreshToken.for_user(users[0]).access_token)
+
+            original = hashing.pool
+            modes = [
+                ('idle', None),
+                ('inline', InlinePool()),
+                ('pool', hashing.HashingPool(options['workers'], options['max_pending'])),
+            ]
+            try:
+                for label, pool in modes:
+                    if pool is not None:
+                        hashing.pool = pool
+                    result = self.run(options, burst=pool is not None)
+                    self.report(label, result)
+                    if pool is not None:
+                        pool.shutdown()
+            finally:
+                hashing.pool = original
+
+    def run(self, options, burst):
+        statuses = []
+        
+        def login(i):
+            response = Client().post(
+                '/api/auth/login/', {'email': f'user{i}@example.com', 'password': PASSWORD},
+                content_type='application/json',
+            )
+            statuses.append(response.status_code)
+        
+        def probe():
+            client = Client(headers={'Authorization': f'Bearer {self.token}'})
+            latencies = []
+            for _ in range(options['probes']):
+                started = time.perf_counter()
+                client.get('/api/auth/me/')
+                latencies.append(time.perf_counter() - started)
+                time.sleep(0.01)
+            return latencies
+        
+        with Timer() as timer, ThreadPoolExecutor(options['concurrency'] + 1) as threads:
+            probing = threads.submit(probe)
+            if burst:
+                list(threads.map(login, range(options['logins'])))
+            latencies = probing.result()
+        return statuses, latencies, timer.seconds
+    
+    def report(self, label, result):
+        statuses, latencies, seconds = result
+        ok = statuses.count(200)
+        busy = statuses.count(503)
+        line = (
+            f"{label:6} /me p50 {statistics.median(latencies) * 1000:7.1f} ms, "
+            f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms, "
+            f"max {max(latencies) * 1000:7.1f} ms"
+        )
+        if statuses:
+            line += (
+                f"; logins {ok} ok, {busy} rejected (503), {len(statuses) - ok - busy} failed "
+                f"in {seconds:.2f}s: {rate(ok, seconds)}"
+            )
+        self.stdout.write(line)
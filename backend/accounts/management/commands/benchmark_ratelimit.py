@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from arnica_connect.benchmark import Timer, rate
+from arnica_connect.ratelimit import CacheBackend, RateLimiter, SharedMemoryBackend
+
+LIMITS = {'benchmark': '1000000/min', 'shared': '1000/min'}
+
+
+def _hammer(path, slots, attempts, results):
+    # One forked worker, sharing the table through the file
+    limiter = RateLimiter(SharedMemoryBackend(path, slots), LIMITS)
+    results.put(sum(not limiter.hit('shared', 'one-key') for _ in range(attempts)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the overhead of a rate limit check per request on the shared-memory '
+        'and cache backends, and check that forked workers share one limit. Uses a '
+        'scratch counter table, never the live one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=100000, help='Checks per measurement')
+        parser.add_argument('--keys', type=int, default=10000, help='Distinct keys checked')
+        parser.add_argument('--processes', type=int, default=4, help='Forked workers sharing a limit')
+
+    def handle(self, *args, **options):
+        for name in ('checks', 'keys', 'processes'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} must be at least 1')
+        checks = options['checks']
+        keys = [f'ip:10.0.{i // 256 % 256}.{i % 256}:{i}' for i in range(options['keys'])]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ratelimit')
+            slots = max(65536, options['keys'] * 2)
+            backends = [
+                ('shared memory', SharedMemoryBackend(path, slots)),
+                ('cache (locmem)', CacheBackend('default')),
+            ]
+            for label, backend in backends:
+                limiter = RateLimiter(backend, LIMITS)
+                with Timer() as timer:
+                    for i in range(checks):
+                        limiter.hit('benchmark', keys[i % len(keys)])
+                self.stdout.write(
+                    f'{label:15} {checks} checks over {len(keys)} keys in {timer.seconds:.2f}s: '
+                    f'{rate(checks, timer.seconds)}, {timer.seconds / checks * 1e6:.1f} us per check'
+                )
+                backend.reset()
+            usage = SharedMemoryBackend(path, slots).usage()
+            self.stdout.write(f"shared table    {usage['bytes'] / 2 ** 20:.2f} MiB for {usage['slots']} keys")
+
+            # 1000/min shared by every worker: exactly 1000 get through in total
+            attempts = 1000
+            context = multiprocessing.get_context('fork')
+            results = context.Queue()
+            workers = [
+                context.Process(target=_hammer, args=(path, slots, attempts, results))
+                for _ in range(options['processes'])
+            ]
+            with Timer() as timer:
+                for worker in workers:
+                    worker.start()
+                allowed = sum(results.get() for _ in workers)
+                for worker in workers:
+                    worker.join()
+            self.stdout.write(
+                f"{options['processes']} workers x {attempts} attempts at a 1000/min limit: "
+                f'{allowed} allowed in {timer.seconds:.2f}s'
+            )
@@ -0,0 +1,81 @@
+import sys
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.models import RevokedToken
+from accounts.revocation import RevokedTokenSet
+from arnica_connect.benchmark import Timer, isolated_database, rate
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the revoked token set on a throwaway test database: filter build '
+        'time and memory, lookups for live and revoked tokens and the false positive '
+        'rate, against one table lookup per check.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=1000000, help='Revoked tokens')
+        parser.add_argument('--lookups', type=int, default=100000, help='Checks per measurement')
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        for name in ('tokens', 'lookups', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        count, lookups = options['tokens'], options['lookups']
+
+        with isolated_database():
+            now = timezone.now()
+            expires_at = now + timedelta(days=7)
+            revoked = [uuid.uuid4().hex for _ in range(count)]
+            with Timer() as timer:
+                for start in range(0, count, options['batch_size']):
+                    RevokedToken.objects.bulk_create(
+                        RevokedToken(jti=jti, expires_at=expires_at, revoked_at=now)
+                        for jti in revoked[start:start + options['batch_size']]
+                    )
+            self.stdout.write(f'table   {count:>9} rows inserted in {timer.seconds:.2f}s')
+
+            tokens = RevokedTokenSet()
+            with Timer() as timer:
+                tokens.refresh(rebuild=True)
+            stats = tokens.stats()
+            self.stdout.write(
+                f"filter  built in {timer.seconds:.2f}s: {stats['bytes'] / 2 ** 20:.2f} MiB, "
+                f"{stats['hashes']} hashes, capacity {stats['capacity']}, "
+                f"{stats['bytes'] / 2 ** 20 / count * 1e6:.2f} MiB per million revoked"
+            )
+            sample = revoked[:1000]
+            exact = set(sample)
+            per_key = (sys.getsizeof(exact) + sum(sys.getsizeof(jti) for jti in sample)) / len(sample)
+            self.stdout.write(f'python set of the ids would take {per_key * 1e6 / 2 ** 20:.0f} MiB per million')
+
+            live = [uuid.uuid4().hex for _ in range(lookups)]
+            with Timer() as timer:
+                refused = sum(tokens.is_revoked(jti) for jti in live)
+            false_positives = sum(jti in tokens._filter for jti in live)
+            self.stdout.write(
+                f'live    {lookups:>9} checks in {timer.seconds:.2f}s: {rate(lookups, timer.seconds)}, '
+                f'{refused} refused, {false_positives} false positives '
+                f'({false_positives / lookups:.3%}) confirmed by a query'
+            )
+
+            hits = revoked[:min(lookups, count)]
+            with Timer() as timer:
+                refused = sum(tokens.is_revoked(jti) for jti in hits)
+            self.stdout.write(
+                f'revoked {len(hits):>9} checks in {timer.seconds:.2f}s: {rate(len(hits), timer.seconds)}, '
+                f'{refused} refused'
+            )
+
+            with Timer() as timer:
+                for jti in live:
+                    RevokedToken.objects.filter(jti=jti).exists()
+            self.stdout.write(
+                f'table   {lookups:>9} lookups in {timer.seconds:.2f}s: {rate(lookups, timer.seconds)} '
+                f'(one query per check)'
+            )
@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importer import (
+    DEFAULT_BATCH_SIZE, DEFAULT_MAX_ERRORS, Checkpoint, CheckpointError, import_users
+)
+from arnica_connect.imports import ImportFormatError, detect_format
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users and their profiles from a CSV or NDJSON file (columns: email, '
+        'user_type, password and the profile fields). Emails already registered are '
+        'skipped; an interrupted import resumes from its checkpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for standard input")
+        parser.add_argument('--format', choices=['csv', 'ndjson', 'jsonl'], help='Default: from the file extension')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help=f'Users written per transaction (default: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Processes hashing passwords (default: one per CPU)',
+        )
+        parser.add_argument(
+            '--no-passwords', action='store_true',
+            help='Ignore the password column; every account needs a password set before it can sign in',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help="Progress file for resuming (default: '<path>.checkpoint'; none for standard input)",
+        )
+        parser.add_argument(
+            '--max-errors', type=int, default=DEFAULT_MAX_ERRORS,
+            help='Row errors kept in the report',
+        )
+        parser.add_argument('--report', help='Write the full JSON report to this file')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        path = options['path']
+        try:
+            fmt = detect_format('' if path == '-' else path, options['format'])
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+
+        checkpoint = None
+        if path != '-':
+            try:
+                checkpoint = Checkpoint.for_file(options['checkpoint'] or f'{path}.checkpoint', path)
+            except OSError as exc:
+                raise CommandError(str(exc))
+        elif options['checkpoint']:
+            raise CommandError('Imports from standard input cannot be resumed; pass a file.')
+
+        params = dict(
+            batch_size=options['batch_size'],
+            max_errors=options['max_errors'],
+            keep_passwords=not options['no_passwords'],
+            workers=options['workers'],
+            checkpoint=checkpoint,
+            progress=self.progress,
+        )
+        try:
+            if path == '-':
+                report = import_users(sys.stdin.buffer, fmt, **params)
+            else:
+                with open(path, 'rb') as stream:
+                    report = import_users(stream, fmt, **params)
+        except (OSError, CheckpointError) as exc:
+            raise CommandError(str(exc))
+
+        if options['report']:
+            with open(options['report'], 'w') as out:
+                json.dump(report, out, indent=2, default=str)
+        for error in report['errors'][:20]:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if report['failed'] > 20:
+            self.stderr.write(f"... {report['failed'] - 20} more failed rows")
+
+        resumed = f" (resumed after row {report['resumed_after']})" if report['resumed_after'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rows']} rows{resumed}: {report['created']} created, "
+            f"{report['existing']} already registered, {report['failed']} failed "
+            f"in {report['seconds']}s ({report['rows_per_second'] or 0} rows/s)"
+        ))
+
+    def progress(self, report):
+        self.stdout.write(
+            f"{report['rows']} rows: {report['created']} created, {report['existing']} existing, "
+            f"{report['failed']} failed, {report['rows_per_second'] or 0} rows/s"
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import User
+from accounts.search import clear_email_index, index_emails
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the email substring search index from the users table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of users indexed per transaction (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        indexed = 0
+        with transaction.atomic():
+            clear_email_index()
+            batch = []
+            for row in User.objects.order_by('pk').values_list('pk', 'email').iterator(chunk_size=batch_size):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    index_emails(batch)
+                    indexed += len(batch)
+                    batch = []
+            index_emails(batch)
+            indexed += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} users'))
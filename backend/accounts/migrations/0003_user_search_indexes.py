@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:39
+
+from django.db import migrations, models
+
+
+def create_email_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS accounts_user_email_trgm "
+            "USING fts5(email, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            "INSERT INTO accounts_user_email_trgm (rowid, email) "
+            "SELECT id, email FROM accounts_user"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # Matches the UPPER(email::text) LIKE UPPER(...) that icontains compiles to
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS user_email_trgm_idx "
+            "ON accounts_user USING gin (UPPER(email::text) gin_trgm_ops)"
+        )
+
+
+def drop_email_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS accounts_user_email_trgm")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS user_email_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_user_type'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_type', '-date_joined'], name='user_type_joined_idx'),
+        ),
+    ]
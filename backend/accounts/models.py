@@ -1,5 +1,5 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.db import models, router
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -38,5 +38,71 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['user_type']
     
+    class Meta:
+        indexes = [
+            # Dashboard date ranges and the newest-first user lists
+            models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+            models.Index(fields=['user_type', '-date_joined'], name='user_type_joined_idx'),
+        ]
+    
+    # Copied into JWTs so most requests need no user query, see accounts.authentication
+    TOKEN_CLAIM_FIELDS = ('user_type', 'is_staff', 'is_superuser')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so role changes revoke issued tokens
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    @classmethod
+    def from_token_claims(cls, user_id, claims):
+        """
+        The user a validated token describes, without a query: a saved
+        instance with the claim fields loaded and every other field deferred,
+        so it can be used as a foreign key value. The first access to a
+        deferred field loads all of them, in one query.
+        """
+        known = {name: claims[name] for name in cls.TOKEN_CLAIM_FIELDS}
+        known.update(id=cls._meta.pk.to_python(user_id), is_active=True)
+        # from_db expects the values in field order
+        field_names = [field.attname for field in cls._meta.concrete_fields if field.attname in known]
+        user = cls.from_db(router.db_for_read(cls), field_names, [known[name] for name in field_names])
+        user._from_claims = True
+        return user
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Deferred attributes load one field per query; for a user built from
+        # token claims, a view reading email, then date_joined, ... would
+        # make a query for each
+        if fields is not None and getattr(self, '_from_claims', False):
+            deferred = self.get_deferred_fields()
+            if deferred and set(fields) <= deferred:
+                fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+    
+    def __str__(self):
+        return self.email
+
+
+class TokenRevocation(models.Model):
+    """
+    Tokens issued to the user before ``revoked_at`` are rejected. Not a
+    foreign key, so the row outlives a deleted user's tokens.
+    """
+    user_id = models.BigIntegerField(primary_key=True)
+    revoked_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"User {self.user_id} before {self.revoked_at}"
+
+
+class RevokedToken(models.Model):
+    """A refresh token or session (by ``jti``/``sid``) refused until it expires"""
+    jti = models.CharField(max_length=64, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+    # Workers sync the rows revoked since their last look, see accounts.revocation
+    revoked_at = models.DateTimeField(db_index=True)
+    
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return self.jti
@@ -0,0 +1,187 @@
+"""
+Revoking issued JWTs.
+
+Requests are authenticated from the claims in the access token without
+loading the user (accounts.authentication), so deactivating a user or
+changing their role would otherwise go unnoticed until their tokens expire.
+Such changes record a ``TokenRevocation`` row instead, and every token the
+user was issued before it is refused.
+
+Each process keeps the recent rows in memory and reloads them at most every
+``AUTH_REVOCATION_CACHE_TTL`` seconds, so a revocation made by another
+process takes effect within that time; the process making it drops its copy
+on commit. Rows older than the longest token lifetime can no longer match a
+live token; they are skipped and removed by ``prune_revocations``.
+
+Single tokens are revoked by id: logging out revokes the refresh token's
+``jti`` and its session id ``sid``, which every access token derived from it
+carries, and rotation revokes the replaced refresh token. ``RevokedToken``
+holds one row per id until the token expires; each process keeps a Bloom
+filter of the live rows (arnica_connect.bloom), so checking a token that was
+not revoked costs a few hashes and no query. A filter hit is confirmed
+against the table, so a false positive (at most 0.1% of checks) costs one
+query and never refuses a valid token. Filters are sized for twice the live
+rows, about 3.4 MiB per million revoked tokens (a Python set of the ids
+would take over 100 MiB), and rebuilt from the table every
+``REBUILD_INTERVAL``, which drops expired ids; in between, each process adds
+the rows revoked elsewhere every ``AUTH_REVOCATION_CACHE_TTL`` seconds. See
+``benchmark_token_revocation`` for measurements.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from arnica_connect.bloom import BloomFilter
+
+from .models import RevokedToken, TokenRevocation
+
+FALSE_POSITIVE_RATE = 0.001
+# Filters are sized for twice the live rows, and at least this many
+MIN_CAPACITY = 10000
+REBUILD_INTERVAL = 60 * 60
+# Rows are re-read this far back, so ones committed late by a slow
+# transaction (or stamped by a host with a lagging clock) are not missed
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def token_lifetime():
+    return max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+
+
+def cache_ttl():
+    return getattr(settings, 'AUTH_REVOCATION_CACHE_TTL', 30)
+
+
+class RevocationList:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._expires = 0.0
+
+    def _reload(self):
+        with self._lock:
+            if time.monotonic() < self._expires:
+                return
+            rows = TokenRevocation.objects.filter(
+                revoked_at__gte=timezone.now() - token_lifetime()
+            ).values_list('user_id', 'revoked_at')
+            self._revoked = {user_id: revoked_at.timestamp() for user_id, revoked_at in rows}
+            self._expires = time.monotonic() + cache_ttl()
+
+    def is_revoked(self, user_id, issued_at):
+        """Whether a token for ``user_id`` with ``iat`` ``issued_at`` is refused"""
+        if time.monotonic() >= self._expires:
+            self._reload()
+        revoked_at = self._revoked.get(int(user_id))
+        # iat is in whole seconds, so tokens issued in the second of the
+        # revocation are refused as well
+        return revoked_at is not None and (issued_at is None or issued_at < revoked_at)
+
+    def invalidate(self):
+        self._expires = 0.0
+
+
+revocations = RevocationList()
+
+
+class RevokedTokenSet:
+    """Revoked token ids: a Bloom filter over the live ``RevokedToken`` rows"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._synced_at = None
+        self._sync_due = 0.0
+        self._rebuild_due = 0.0
+
+    def _rebuild(self):
+        started = timezone.now()
+        live = RevokedToken.objects.filter(expires_at__gt=started)
+        bloom = BloomFilter(max(MIN_CAPACITY, live.count() * 2), FALSE_POSITIVE_RATE)
+        bloom.update(live.values_list('jti', flat=True).iterator(chunk_size=10000))
+        self._filter = bloom
+        self._synced_at = started
+        self._rebuild_due = time.monotonic() + REBUILD_INTERVAL
+
+    def _sync(self):
+        started = timezone.now()
+        for jti in RevokedToken.objects.filter(
+            revoked_at__gte=self._synced_at - SYNC_OVERLAP, expires_at__gt=started
+        ).values_list('jti', flat=True):
+            if jti not in self._filter:
+                self._filter.add(jti)
+        self._synced_at = started
+
+    def refresh(self, rebuild=False):
+        with self._lock:
+            now = time.monotonic()
+            if rebuild or self._filter is None or self._filter.full or now >= self._rebuild_due:
+                self._rebuild()
+            elif now >= self._sync_due:
+                self._sync()
+            self._sync_due = now + cache_ttl()
+
+    def is_revoked(self, jti):
+        if jti is None:
+            return False
+        if time.monotonic() >= self._sync_due:
+            self.refresh()
+        if jti not in self._filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def add(self, jti):
+        # Seen by this process at once, by the others on their next sync
+        with self._lock:
+            if self._filter is not None and jti not in self._filter:
+                self._filter.add(jti)
+
+    def stats(self):
+        bloom = self._filter
+        if bloom is None:
+            return {'capacity': 0, 'count': 0, 'bytes': 0, 'hashes': 0}
+        return {'capacity': bloom.capacity, 'count': len(bloom), 'bytes': bloom.nbytes, 'hashes': bloom.hashes}
+
+
+revoked_tokens = RevokedTokenSet()
+
+
+def revoke_token_ids(ids, expires_at):
+    """Refuse the given ``jti``/``sid`` values until ``expires_at``"""
+    now = timezone.now()
+    RevokedToken.objects.bulk_create(
+        [RevokedToken(jti=jti, expires_at=expires_at, revoked_at=now) for jti in ids],
+        ignore_conflicts=True,
+    )
+
+    def publish():
+        for jti in ids:
+            revoked_tokens.add(jti)
+    transaction.on_commit(publish)
+
+
+def revoke_refresh_token(token, session=True):
+    """Revoke a refresh token and, with ``session``, the access tokens derived from it"""
+    ids = [token[api_settings.JTI_CLAIM]]
+    if session and token.get('sid'):
+        ids.append(token['sid'])
+    revoke_token_ids(ids, datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc))
+
+
+def revoke_tokens(user_id):
+    """Refuse every token issued to the user until now"""
+    TokenRevocation.objects.update_or_create(user_id=user_id, defaults={'revoked_at': timezone.now()})
+    transaction.on_commit(revocations.invalidate)
+
+
+def prune_revocations():
+    """Delete rows that can no longer match a live token; returns how many"""
+    now = timezone.now()
+    users, _ = TokenRevocation.objects.filter(revoked_at__lt=now - token_lifetime()).delete()
+    tokens, _ = RevokedToken.objects.filter(expires_at__lte=now).delete()
+    return users + tokens
@@ -0,0 +1,77 @@
+"""
+Substring search over user email addresses.
+
+``icontains`` compiles to ``LIKE '%term%'``, which no B-tree index can
+serve. On SQLite the addresses are mirrored into an FTS5 table with the
+trigram tokenizer (kept current by ``accounts.signals``), and a term of
+three or more characters is matched there instead. On PostgreSQL the
+migration adds a pg_trgm GIN index on ``UPPER(email)``, which is exactly the
+expression Django's ``icontains`` filters on, so the plain lookup is
+already indexed. Shorter terms, and other backends, use ``icontains``.
+"""
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import User
+
+EMAIL_INDEX_TABLE = 'accounts_user_email_trgm'
+MIN_TRIGRAM_LENGTH = 3
+
+
+def _uses_trigram_table():
+    return connection.vendor == 'sqlite'
+
+
+def index_emails(rows):
+    """Index or re-index ``(pk, email)`` pairs"""
+    rows = list(rows)
+    if not rows or not _uses_trigram_table():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {EMAIL_INDEX_TABLE} WHERE rowid = %s', [(pk,) for pk, _ in rows])
+        cursor.executemany(f'INSERT INTO {EMAIL_INDEX_TABLE} (rowid, email) VALUES (%s, %s)', rows)
+
+
+def unindex_emails(pks):
+    pks = list(pks)
+    if not pks or not _uses_trigram_table():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {EMAIL_INDEX_TABLE} WHERE rowid = %s', [(pk,) for pk in pks])
+
+
+def clear_email_index():
+    if _uses_trigram_table():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {EMAIL_INDEX_TABLE}')
+
+
+def email_contains(term):
+    """``Q`` for users whose email contains ``term``, ignoring case"""
+    if _uses_trigram_table() and len(term) >= MIN_TRIGRAM_LENGTH:
+        # A quoted FTS5 string is matched as a substring by the trigram tokenizer
+        phrase = '"' + term.replace('"', '""') + '"'
+        return Q(pk__in=RawSQL(
+            f'SELECT rowid FROM {EMAIL_INDEX_TABLE} WHERE {EMAIL_INDEX_TABLE} MATCH %s', [phrase]
+        ))
+    return Q(email__icontains=term)
+
+
+def user_types_matching(term):
+    """User type values whose value or label contains ``term``"""
+    term = term.lower()
+    return [
+        value for value, label in User.USER_TYPE_CHOICES
+        if term in value or term in label.lower()
+    ]
+
+
+def search_users(queryset, term):
+    """Users whose email or user type contains ``term``"""
+    condition = email_contains(term)
+    user_types = user_types_matching(term)
+    if user_types:
+        # An indexed IN over the few matching choices instead of icontains
+        condition |= Q(user_type__in=user_types)
+    return queryset.filter(condition)
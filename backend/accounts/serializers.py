@@ -23,12 +23,22 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('confirm_password')
-        user = User.objects.create_user(
-            email=validated_data['email'],
-            password=validated_data['password'],
+        # The register view hashes on the pool in accounts.hashing beforehand
+        password_hash = validated_data.pop('password_hash', None)
+        if password_hash is None:
+            return User.objects.create_user(
+                email=validated_data['email'],
+                password=validated_data['password'],
+                user_type=validated_data['user_type'],
+                agree_to_terms=validated_data['agree_to_terms']
+            )
+        user = User(
+            email=User.objects.normalize_email(validated_data['email']),
             user_type=validated_data['user_type'],
-            agree_to_terms=validated_data['agree_to_terms']
+            agree_to_terms=validated_data['agree_to_terms'],
+            password=password_hash,
         )
+        user.save()
         return user
 
 class UserLoginSerializer(serializers.Serializer):
@@ -0,0 +1,44 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import User
+from .revocation import revoke_tokens
+from .search import index_emails, unindex_emails
+
+
+@receiver(post_save, sender=User)
+def index_user_email(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the email search index in step with the user row"""
+    if raw or (update_fields is not None and 'email' not in update_fields):
+        return
+    index_emails([(instance.pk, instance.email)])
+
+
+@receiver(post_delete, sender=User)
+def unindex_user_email(sender, instance, **kwargs):
+    unindex_emails([instance.pk])
+
+
+# Fields whose change invalidates the claims in issued tokens
+REVOKING_FIELDS = ('is_active', *User.TOKEN_CLAIM_FIELDS)
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_tokens(sender, instance, created, raw=False, **kwargs):
+    """Deactivation or a role change refuses the tokens issued before it"""
+    loaded = getattr(instance, '_loaded_values', None)
+    if raw or created or loaded is None:
+        return
+    # Only fields that were loaded; reading a deferred one would query
+    changed = [
+        name for name in REVOKING_FIELDS
+        if name in loaded and loaded[name] != getattr(instance, name)
+    ]
+    if changed:
+        revoke_tokens(instance.pk)
+        loaded.update((name, getattr(instance, name)) for name in changed)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_tokens(sender, instance, **kwargs):
+    revoke_tokens(instance.pk)
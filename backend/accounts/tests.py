@@ -1,3 +1,274 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt import serializers as jwt_serializers
+
+from jobs.models import Job, JobApplication
+from profiles.models import ClinicProfile, JobSeekerProfile
+from . import authentication, hashing
+from .authentication import ClaimsJWTAuthentication, ClaimsRefreshToken
+from .importer import Checkpoint, CheckpointError, import_users
+from .models import RevokedToken, User
+from .revocation import RevokedTokenSet
+from .search import search_users
+
+
+class BootstrapQueryBudgetTests(TestCase):
+    """/api/auth/bootstrap/ must answer in one query whatever the user type"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clinic = User.objects.create_user('clinic@example.com', 'pw', user_type='clinic')
+        ClinicProfile.objects.create(user=cls.clinic, clinic_name='Clinic', address='Lagos', phone='1')
+        cls.seeker = User.objects.create_user('seeker@example.com', 'pw', user_type='job_seeker')
+        JobSeekerProfile.objects.create(user=cls.seeker, first_name='Ada', last_name='Obi')
+        cls.employer = User.objects.create_user('employer@example.com', 'pw', user_type='employer')
+        jobs = Job.objects.bulk_create([
+            Job(
+                title=f'Job {i}', description='', requirements='', location='Lagos',
+                job_type='full_time', company='Clinic', created_by=cls.clinic,
+            )
+            for i in range(3)
+        ])
+        JobApplication.objects.bulk_create([
+            JobApplication(job=jobs[0], applicant=cls.seeker, cover_letter=''),
+            JobApplication(job=jobs[1], applicant=cls.seeker, cover_letter='', status='shortlisted'),
+            JobApplication(job=jobs[2], applicant=cls.seeker, cover_letter='', status='rejected'),
+        ])
+
+    def bootstrap(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+        # The first request also loads the per-process token revocation lists
+        client.get('/api/auth/bootstrap/')
+        with self.assertNumQueries(1):
+            response = client.get('/api/auth/bootstrap/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_clinic(self):
+        data = self.bootstrap(self.clinic)
+        self.assertEqual(data['profile']['clinic_name'], 'Clinic')
+        self.assertEqual(data['counts'], {'open_applications': 0, 'posted_jobs': 3})
+
+    def test_job_seeker(self):
+        data = self.bootstrap(self.seeker)
+        self.assertEqual(data['user']['email'], 'seeker@example.com')
+        self.assertEqual(data['profile']['first_name'], 'Ada')
+        self.assertEqual(data['counts'], {'open_applications': 2, 'posted_jobs': 0})
+
+    def test_without_profile(self):
+        data = self.bootstrap(self.employer)
+        self.assertIsNone(data['profile'])
+
+
+@override_settings(RATELIMITS={})
+class AuthViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('nurse@example.com', 'correct-horse', user_type='job_seeker')
+
+    def login(self, password):
+        return APIClient().post(
+            '/api/auth/login/', {'email': 'nurse@example.com', 'password': password}, format='json',
+        )
+
+    def test_login(self):
+        response = self.login('correct-horse')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'nurse@example.com')
+        self.assertIn('access', response.json())
+
+    def test_wrong_password(self):
+        response = self.login('wrong-horse')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'error': 'Invalid credentials'})
+
+    def test_saturated_pool(self):
+        full = hashing.HashingPool(workers=1, max_pending=1)
+        full.pending = 1
+        original, hashing.pool = hashing.pool, full
+        try:
+            response = self.login('correct-horse')
+        finally:
+            hashing.pool = original
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(hashing.retry_after()))
+
+    def test_register(self):
+        data = {
+            'email': 'clinic@example.com', 'password': 'long-enough', 'confirm_password': 'long-enough',
+            'user_type': 'clinic', 'agree_to_terms': True,
+        }
+        response = APIClient().post('/api/auth/register/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(email='clinic@example.com').check_password('long-enough'))
+        # Registering the same email again fails validation, in DRF's error shape
+        response = APIClient().post('/api/auth/register/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
+
+
+class UserImportTests(TestCase):
+
+    def run_import(self, rows, **options):
+        lines = ''.join(json.dumps(row) + '\n' for row in rows).encode()
+        return import_users(io.BytesIO(lines), 'ndjson', workers=1, **options)
+
+    def seeker(self, email, **fields):
+        return {'email': email, 'user_type': 'job_seeker', 'first_name': 'Ada', 'last_name': 'Obi', **fields}
+
+    def test_existing_and_duplicate_emails(self):
+        User.objects.create_user('taken@example.com', 'pw', user_type='job_seeker')
+        report = self.run_import([
+            self.seeker('taken@example.com'),
+            self.seeker('new@example.com'),
+            self.seeker('new@example.com'),
+        ])
+        self.assertEqual((report['created'], report['existing'], report['failed']), (1, 1, 1))
+        self.assertEqual(report['errors'][0]['row'], 3)
+        self.assertIn('email', report['errors'][0]['errors'])
+
+    def test_missing_password_is_unusable(self):
+        self.run_import([
+            self.seeker('nopass@example.com'),
+            self.seeker('withpass@example.com', password='long-enough'),
+        ])
+        self.assertFalse(User.objects.get(email='nopass@example.com').has_usable_password())
+        self.assertTrue(User.objects.get(email='withpass@example.com').check_password('long-enough'))
+
+    def test_clinics_are_geocoded_and_searchable(self):
+        self.run_import([{
+            'email': 'imported-clinic@example.com', 'user_type': 'clinic',
+            'clinic_name': 'Clinic', 'address': 'Lagos', 'phone': '1',
+        }])
+        user = User.objects.get(email='imported-clinic@example.com')
+        self.assertIsNotNone(user.clinic_profile.latitude)
+        self.assertTrue(user.clinic_profile.geohash)
+        # bulk_create skips the signal that indexes emails; the importer does it
+        self.assertEqual(list(search_users(User.objects.all(), 'imported-clinic')), [user])
+
+    def test_resume_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.ndjson')
+            with open(path, 'w') as out:
+                for i in range(3):
+                    out.write(json.dumps(self.seeker(f'user{i}@example.com')) + '\n')
+            checkpoint = Checkpoint.for_file(path + '.checkpoint', path)
+            # As left by a run interrupted after committing row 2
+            checkpoint.save(2, {'rows': 2, 'created': 2, 'existing': 0, 'failed': 0})
+            with open(path, 'rb') as stream:
+                report = import_users(stream, 'ndjson', workers=1, checkpoint=checkpoint)
+            self.assertEqual(report['resumed_after'], 2)
+            self.assertEqual((report['rows'], report['created']), (3, 3))
+            self.assertEqual(list(User.objects.values_list('email', flat=True)), ['user2@example.com'])
+            self.assertFalse(os.path.exists(checkpoint.path))
+
+            # A checkpoint written for another input is refused
+            checkpoint.save(2, {})
+            other = os.path.join(directory, 'other.ndjson')
+            with open(other, 'w') as out:
+                out.write('{}\n')
+            with self.assertRaises(CheckpointError):
+                Checkpoint.for_file(checkpoint.path, other).load()
+
+
+class ClaimsAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff@example.com', 'pw', user_type='employer', is_staff=True)
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_user_from_claims(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        # Loads the per-process revocation lists
+        self.authenticate(access)
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+            self.assertEqual((user.pk, user.user_type, user.is_staff), (self.user.pk, 'employer', True))
+        # The other fields load together on first access
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'staff@example.com')
+            self.assertEqual(user.date_joined, self.user.date_joined)
+            self.assertTrue(user.check_password('pw'))
+
+    def test_logout_revokes_the_session(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.assertEqual(client.get('/api/auth/me/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/auth/logout/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # Access tokens of that login carry its sid
+        self.assertEqual(client.get('/api/auth/me/').status_code, 401)
+
+    def test_rotation_revokes_the_replaced_refresh_token(self):
+        # simplejwt's modules hold on to their settings object, so patch it
+        for module in (authentication, jwt_serializers):
+            patcher = mock.patch.object(module.api_settings, 'ROTATE_REFRESH_TOKENS', True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        refresh = str(ClaimsRefreshToken.for_user(self.user))
+        client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        rotated = response.json()['refresh']
+        response = client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+        # The session goes on with the new refresh token
+        response = client.post('/api/auth/token/refresh/', {'refresh': rotated}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class RevokedTokenSetTests(TestCase):
+    """Filter hits are confirmed against the table; misses cost no query"""
+
+    def setUp(self):
+        self.tokens = RevokedTokenSet()
+        later = timezone.now() + timedelta(hours=1)
+        RevokedToken.objects.create(jti='revoked', expires_at=later, revoked_at=timezone.now())
+        RevokedToken.objects.create(
+            jti='expired', expires_at=timezone.now() - timedelta(seconds=1), revoked_at=timezone.now(),
+        )
+        self.tokens.refresh()
+
+    def test_lookups(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(self.tokens.is_revoked('live'))
+            self.assertFalse(self.tokens.is_revoked(None))
+        with self.assertNumQueries(1):
+            self.assertTrue(self.tokens.is_revoked('revoked'))
+        # Expired rows are left out of the filter
+        self.assertEqual(self.tokens.stats()['count'], 1)
+
+    def test_false_positive_falls_back_to_the_table(self):
+        # A saturated filter reports every id
+        self.tokens._filter.bits[:] = b'\xff' * len(self.tokens._filter.bits)
+        self.assertIn('live', self.tokens._filter)
+        with self.assertNumQueries(1):
+            self.assertFalse(self.tokens.is_revoked('live'))
+
+    def test_rows_revoked_elsewhere_are_synced(self):
+        RevokedToken.objects.create(
+            jti='elsewhere', expires_at=timezone.now() + timedelta(hours=1), revoked_at=timezone.now(),
+        )
+        # Unseen until the next sync, AUTH_REVOCATION_CACHE_TTL seconds on
+        self.assertFalse(self.tokens.is_revoked('elsewhere'))
+        self.tokens._sync_due = 0
+        self.assertTrue(self.tokens.is_revoked('elsewhere'))
+        self.assertEqual(self.tokens.stats()['count'], 2)
 
-# Create your tests here.
@@ -1,10 +1,12 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import RegisterAPIView, LoginAPIView, UserProfileAPIView
+from .views import RegisterAPIView, LoginAPIView, BootstrapAPIView, LogoutAPIView, UserProfileAPIView
 
 urlpatterns = [
     path('register/', RegisterAPIView.as_view(), name='register'),
     path('login/', LoginAPIView.as_view(), name='login'),
+    path('logout/', LogoutAPIView.as_view(), name='logout'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('me/', UserProfileAPIView.as_view(), name='user_profile'),
+    path('bootstrap/', BootstrapAPIView.as_view(), name='bootstrap'),
 ]
\ No newline at end of file
@@ -1,8 +1,20 @@
 from rest_framework import generics, status, permissions
+from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from arnica_connect.ratelimit import SlidingWindowThrottle, client_ip, limiter
+from jobs.models import Job, JobApplication
+from profiles.models import PROFILE_MODELS
+from profiles.resolver import get_profile
+from profiles.serializers import PROFILE_SERIALIZERS
+from . import hashing
+from .authentication import ClaimsRefreshToken
+from .revocation import revoke_refresh_token
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
@@ -10,22 +22,50 @@ from .serializers import (
 )
 from .models import User
 
+class HashingBusy(APIException):
+    """The password hashing pool is full; DRF adds Retry-After from ``wait``"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins in progress. Please try again shortly.'
+    default_code = 'hashing_busy'
+    
+    def __init__(self):
+        super().__init__()
+        self.wait = hashing.retry_after()
+
+def _hash(func, *args):
+    """Run a hashing function on the pool in accounts.hashing"""
+    try:
+        return func(*args)
+    except hashing.PoolSaturated:
+        raise HashingBusy
+
+def _tokens(user):
+    refresh = ClaimsRefreshToken.for_user(user)
+    return {
+        'user': UserSerializer(user).data,
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
 class RegisterAPIView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = 'register_ip'
     
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        
-        # Create JWT tokens
-        refresh = RefreshToken.for_user(user)
+        password_hash = _hash(hashing.make_password, serializer.validated_data['password'])
+        try:
+            with transaction.atomic():
+                user = serializer.save(password_hash=password_hash)
+        except IntegrityError:
+            # Registered concurrently, or differing only in the domain's case
+            raise ValidationError({'email': ['user with this email already exists.']})
         
         return Response({
-            'user': UserSerializer(user).data,
-            'refresh': str(refresh),
-            'access': str(refresh.access_token),
+            **_tokens(user),
             'message': 'Account created successfully. Please complete your profile.'
         }, status=status.HTTP_201_CREATED)
 
@@ -39,25 +79,92 @@ class LoginAPIView(APIView):
         email = serializer.validated_data['email']
         password = serializer.validated_data['password']
         
-        user = authenticate(request, email=email, password=password)
+        # Checked before any hashing, so a credential-stuffing burst costs no CPU
+        for scope, key in (('login_ip', client_ip(request)), ('login_email', email.lower())):
+            wait = limiter.hit(scope, key)
+            if wait:
+                self.throttled(request, wait)
         
+        user = User.objects.filter(email=email).first()
         if user is None:
+            # Same cost as a real check, so timing does not reveal which emails exist
+            _hash(hashing.make_password, password)
+            valid = False
+        else:
+            valid = _hash(hashing.check_password, password, user.password)
+        
+        if not valid or not user.is_active:
             return Response(
                 {'error': 'Invalid credentials'}, 
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        refresh = RefreshToken.for_user(user)
+        if hashing.must_update(user.password):
+            # Re-hash with the current hasher settings, as authenticate() would
+            try:
+                user.password = hashing.make_password(password)
+            except hashing.PoolSaturated:
+                pass
+            else:
+                user.save(update_fields=['password'])
         
-        return Response({
-            'user': UserSerializer(user).data,
-            'refresh': str(refresh),
-            'access': str(refresh.access_token),
-        })
+        return Response(_tokens(user))
+
+class LogoutAPIView(APIView):
+    """Revoke a refresh token and the access tokens issued from it"""
+    permission_classes = [permissions.AllowAny]
+    
+    def post(self, request):
+        try:
+            refresh = RefreshToken(request.data.get('refresh', ''))
+        except TokenError:
+            return Response({'error': 'Invalid or expired refresh token'}, status=400)
+        revoke_refresh_token(refresh)
+        return Response({'status': 'Logged out'})
 
 class UserProfileAPIView(generics.RetrieveAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
\ No newline at end of file
+        # request.user only has the token claims loaded
+        return User.objects.get(pk=self.request.user.pk)
+
+def _count(queryset, field):
+    """Rows of ``queryset`` whose ``field`` is the outer user, as a subquery"""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('pk'))
+    return Coalesce(Subquery(counts.values('count'), output_field=IntegerField()), 0)
+
+class BootstrapAPIView(APIView):
+    """
+    Everything the app loads after sign-in in one query: the user, their
+    profile for their user_type (null until created) and summary counts.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        user_type = request.user.user_type
+        users = User.objects.filter(pk=request.user.pk).annotate(
+            open_application_count=_count(
+                JobApplication.objects.filter(status__in=JobApplication.OPEN_STATUSES), 'applicant'
+            ),
+            posted_job_count=_count(Job.objects.all(), 'created_by'),
+        )
+        profile_attr = f'{user_type}_profile' if user_type in PROFILE_MODELS else None
+        if profile_attr:
+            users = users.select_related(profile_attr)
+        user = users.get()
+        
+        # Already loaded by select_related, no query
+        profile = get_profile(user)
+        return Response({
+            'user': UserSerializer(user).data,
+            'profile': (
+                PROFILE_SERIALIZERS[user_type](profile, context={'request': request}).data
+                if profile is not None else None
+            ),
+            'counts': {
+                'open_applications': user.open_application_count,
+                'posted_jobs': user.posted_job_count,
+            },
+        })
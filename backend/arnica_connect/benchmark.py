@@ -0,0 +1,38 @@
+"""
+Helpers shared by the ``benchmark_*`` management commands.
+"""
+import time
+from contextlib import contextmanager
+
+from django.test.utils import setup_databases, teardown_databases
+
+
+@contextmanager
+def isolated_database(verbosity=0):
+    """
+    Run the block against a freshly migrated test database, created and
+    destroyed the way the test runner does, so benchmarks never read or
+    write real data.
+    """
+    config = setup_databases(verbosity, interactive=False, aliases={'default'})
+    try:
+        yield
+    finally:
+        teardown_databases(config, verbosity)
+
+
+class Timer:
+    """``with Timer() as timer: ...`` then ``timer.seconds``"""
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.seconds = None
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self.started
+
+
+def rate(count, seconds):
+    """Operations per second, formatted for command output"""
+    return f'{count / seconds:,.0f}/s' if seconds else 'n/a'
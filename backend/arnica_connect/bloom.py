@@ -0,0 +1,57 @@
+"""
+A Bloom filter for string keys.
+
+Membership tests never miss an added key and wrongly report a key that was
+not added with probability ``error_rate`` once ``capacity`` keys are in. The
+bit array takes ``-capacity * ln(error_rate) / ln(2)**2`` bits: about
+1.71 MiB per million keys at 0.1%, 1.14 MiB at 1%, whatever the key length.
+Keys cannot be removed; build a new filter instead.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError('capacity must be positive and error_rate between 0 and 1')
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Two 64-bit halves of one digest, combined (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        bits = self.bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self):
+        """Keys added (counting repeats)"""
+        return self.count
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
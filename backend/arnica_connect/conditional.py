@@ -0,0 +1,36 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Strong ETag derived from the values that determine a response body"""
+    source = '|'.join(str(part) for part in parts)
+    return '"%s"' % hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+
+def query_fingerprint(request):
+    """Stable representation of a request's query parameters"""
+    return sorted((key, sorted(values)) for key, values in request.GET.lists())
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    Return a 304 (or 412) response if the client's validators match,
+    otherwise None so the view can build the full response.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Authenticated content: clients may keep it but must revalidate
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,62 @@
+"""
+Streaming readers for the CSV / NDJSON files the bulk importers take.
+"""
+import csv
+import io
+import json
+
+FORMATS = ('csv', 'ndjson')
+EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename='', fmt=None):
+    """Explicit ``fmt`` if given, else guessed from the file extension"""
+    if fmt:
+        fmt = 'ndjson' if fmt == 'jsonl' else fmt
+        if fmt not in FORMATS:
+            raise ImportFormatError(f"Unknown format '{fmt}'; expected csv or ndjson.")
+        return fmt
+    for extension, guessed in EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return guessed
+    raise ImportFormatError('Cannot tell the file format; pass format=csv or format=ndjson.')
+
+
+def read_rows(stream, fmt):
+    """
+    Yield ``(row number, raw dict or None, parse error or None)`` from a
+    binary stream without reading it all into memory.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    number = 0
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(text)
+            for number, row in enumerate(reader, start=1):
+                if None in row:
+                    yield number, None, 'Row has more columns than the header.'
+                else:
+                    yield number, row, None
+        else:
+            for number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    yield number, None, f'Invalid JSON: {exc}'
+                    continue
+                if isinstance(row, dict):
+                    yield number, row, None
+                else:
+                    yield number, None, 'Expected a JSON object.'
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # Nothing past this point can be parsed reliably
+        yield number + 1, None, f'Unreadable file, import stopped here: {exc}'
+    finally:
+        # Leave the caller's stream open
+        text.detach()
@@ -0,0 +1,67 @@
+"""
+Query-plan assertions for the hot ORM queries.
+
+``QueryPlanTestCase.assertIndexed`` runs ``EXPLAIN`` for a queryset and
+fails when the plan reads a table without an index or sorts in a temporary
+structure, printing the captured plan. Tests seed enough rows for the
+planner to prefer indexes and refresh the statistics with ``ANALYZE``
+(``analyze()``) before asserting. Tables named in ``allow_scan`` may still
+be scanned (e.g. a deliberately unfiltered count), and ``allow_sort``
+accepts sorting a search's matches, which no index over the whole table
+can order.
+
+SQLite plans come from ``EXPLAIN QUERY PLAN``. On PostgreSQL sequential
+scans and sorts are discouraged for the duration of the check, so one still
+appearing means no index can produce the rows or their order.
+"""
+import re
+
+from django.db import connection, transaction
+from django.test import TestCase
+
+SQLITE_SCAN_RE = re.compile(r'\bSCAN (\w+)\b(?! VIRTUAL TABLE)( USING (?:COVERING )?INDEX)?')
+SQLITE_SORT_RE = re.compile(r'USE TEMP B-TREE')
+PG_SCAN_RE = re.compile(r'Seq Scan on (\w+)\b()')
+PG_SORT_RE = re.compile(r'(?<!Incremental )\bSort\b(?! Key)')
+
+
+def explain(queryset):
+    """The plan ``queryset`` would run with, as text"""
+    if connection.vendor != 'postgresql':
+        return queryset.explain()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('SET LOCAL enable_sort = off')
+        return queryset.explain()
+
+
+def plan_problems(plan, allow_scan=(), allow_sort=False, limited=False):
+    """
+    Full scans and temporary sorts in ``plan``. Walking a whole index is a
+    full scan too, unless the query is ``limited`` and stops early.
+    """
+    if connection.vendor == 'postgresql':
+        scan_re, sort_re = PG_SCAN_RE, PG_SORT_RE
+    else:
+        scan_re, sort_re = SQLITE_SCAN_RE, SQLITE_SORT_RE
+    problems = [
+        f'full scan of {table}' for table, using_index in scan_re.findall(plan)
+        if table not in allow_scan and not (limited and using_index)
+    ]
+    if not allow_sort and sort_re.search(plan):
+        problems.append('temporary sort')
+    return problems
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+class QueryPlanTestCase(TestCase):
+    def assertIndexed(self, name, queryset, allow_scan=(), allow_sort=False):
+        plan = explain(queryset)
+        limited = queryset.query.high_mark is not None
+        problems = plan_problems(plan, allow_scan, allow_sort, limited)
+        if problems:
+            self.fail(f"{name}: {', '.join(problems)}\n{queryset.query}\n{plan}")
@@ -0,0 +1,299 @@
+"""
+Sliding-window rate limits.
+
+Each limit allows ``count`` requests per ``period`` seconds per key (an IP,
+an email, a user). The window is approximated from two fixed-window
+counters, the current one and the previous one, weighted by how much of the
+previous window still overlaps the sliding window::
+
+    estimate = previous * (1 - elapsed / period) + current
+
+which is exact for evenly spread traffic and never lets a burst straddling
+a window boundary through at twice the rate, as a fixed window would. A key
+costs two counters whatever its traffic, and keys idle for two periods are
+dropped. Rejected requests are not counted, so a client that backs off for
+``Retry-After`` seconds gets through.
+
+Limits are configured by scope in ``RATELIMITS`` (``{'login_ip': '30/min'}``;
+periods ``s``, ``min``, ``h`` or ``d``, optionally with a multiplier as in
+``'5/15min'``). A scope that is not configured is not limited.
+
+Counters live in one of two backends, chosen by ``RATELIMIT_BACKEND``:
+
+``shared_memory`` (default)
+    A fixed-size hash table in a file every process maps (``/dev/shm`` when
+    available, ``RATELIMIT_SHM_PATH`` to choose), so all gunicorn workers on
+    a host share counters without a network round trip. The default file is
+    named after the project and its database, so test runs and benchmarks
+    (on their own test databases) never share the live server's counters. Slots are locked
+    with ``fcntl`` record locks. When every slot a key may use holds a live
+    key, the one closest to expiry is evicted (that key's count restarts),
+    so size ``RATELIMIT_SHM_SLOTS`` above the number of keys active within
+    two periods.
+
+``cache``
+    Counters in the ``RATELIMIT_CACHE`` Django cache, for deployments
+    spanning several hosts. Each check is a ``get``, an ``add`` and an
+    ``incr``, so it costs a few cache round trips.
+"""
+import hashlib
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process, the thread lock is enough
+    fcntl = None
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+RATE_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])[a-z]*\s*$')
+
+# fingerprint, expires, window index, current count, previous count
+SLOT = struct.Struct('<QdqII')
+PROBES = 8
+
+
+def parse_rate(rate):
+    """``'5/15min'`` -> ``(5, 900)``"""
+    match = RATE_RE.match(rate or '')
+    if match is None:
+        raise ImproperlyConfigured(f'Invalid rate limit {rate!r}, expected e.g. "30/min" or "5/15min"')
+    count, multiplier, unit = match.groups()
+    if int(count) < 1 or multiplier == '0':
+        raise ImproperlyConfigured(f'Invalid rate limit {rate!r}, count and period must be positive')
+    return int(count), int(multiplier or 1) * PERIODS[unit]
+
+
+def fingerprint(scope, key):
+    digest = hashlib.blake2b(f'{scope}\x00{key}'.encode(), digest_size=8).digest()
+    # Zero marks an empty slot
+    return int.from_bytes(digest, 'little') or 1
+
+
+def _roll(index, current, previous, now_index):
+    """Counters as seen from window ``now_index``"""
+    if index == now_index:
+        return current, previous
+    if index == now_index - 1:
+        return 0, current
+    return 0, 0
+
+
+def _decide(count, period, current, previous, now):
+    """Seconds to wait before one more request fits, or 0 if it fits now"""
+    elapsed = now % period
+    overlap = 1 - elapsed / period
+    if previous * overlap + current + 1 <= count:
+        return 0
+    if current + 1 > count:
+        # Only fits once the current window is the previous one and has decayed
+        return period - elapsed + period * max(0.0, 1 - (count - 1) / current)
+    # Fits in this window once enough of the previous one has slid out
+    return max(0.0, period * (1 - (count - 1 - current) / previous) - elapsed)
+
+
+class SharedMemoryBackend:
+    def __init__(self, path=None, slots=None):
+        self._path = path
+        self._slots = slots
+        self._lock = threading.Lock()
+        self._map = None
+        self._pid = None
+        self._opened = None
+
+    @property
+    def path(self):
+        path = self._path or getattr(settings, 'RATELIMIT_SHM_PATH', None)
+        if path:
+            return path
+        directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        database = connections['default'].settings_dict['NAME']
+        project = hashlib.blake2b(f'{settings.BASE_DIR}\x00{database}'.encode(), digest_size=4).hexdigest()
+        return os.path.join(directory, f'arnica-ratelimit-{project}')
+
+    @property
+    def slots(self):
+        return self._slots or getattr(settings, 'RATELIMIT_SHM_SLOTS', None) or 65536
+
+    def _open(self):
+        # Reopened after a fork so each worker maps the file itself, and when
+        # the database (so the default path) changes, as when tests start
+        path = self.path
+        if self._pid != os.getpid() or self._opened != path:
+            if self._map is not None and self._pid == os.getpid():
+                self._map.close()
+                os.close(self._fd)
+            # Probing never wraps: the last buckets probe into spare slots
+            size = (self.slots + PROBES) * SLOT.size
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+            self._pid = os.getpid()
+            self._opened = path
+        return self._map
+
+    def hit(self, scope, key, count, period, now):
+        mark = fingerprint(scope, key)
+        now_index = int(now // period)
+        with self._lock:
+            table = self._open()
+            start = (mark % self.slots) * SLOT.size
+            if fcntl is not None:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, PROBES * SLOT.size, start)
+            try:
+                free = stalest = None
+                for offset in range(start, start + PROBES * SLOT.size, SLOT.size):
+                    slot = SLOT.unpack_from(table, offset)
+                    if slot[0] == mark:
+                        break
+                    if free is None and (slot[0] == 0 or slot[1] <= now):
+                        free = offset
+                    if stalest is None or slot[1] < stalest[1]:
+                        stalest = (offset, slot[1])
+                else:
+                    offset = free if free is not None else stalest[0]
+                    slot = (mark, 0.0, 0, 0, 0)
+                current, previous = _roll(slot[2], slot[3], slot[4], now_index)
+                wait = _decide(count, period, current, previous, now)
+                if not wait:
+                    current += 1
+                    expires = (now_index + 2) * period
+                    SLOT.pack_into(table, offset, mark, expires, now_index, current, previous)
+                return wait
+            finally:
+                if fcntl is not None:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, PROBES * SLOT.size, start)
+
+    def reset(self):
+        with self._lock:
+            table = self._open()
+            table[:] = bytes(len(table))
+
+    def usage(self, now=None):
+        """Live keys and table size"""
+        now = time.time() if now is None else now
+        with self._lock:
+            table = self._open()
+            live = sum(
+                1 for offset in range(0, len(table), SLOT.size)
+                if SLOT.unpack_from(table, offset)[1] > now
+            )
+        return {'live': live, 'slots': self.slots, 'bytes': len(table)}
+
+
+class CacheBackend:
+    def __init__(self, alias=None):
+        self._alias = alias
+
+    @property
+    def cache(self):
+        return caches[self._alias or getattr(settings, 'RATELIMIT_CACHE', 'default')]
+
+    def hit(self, scope, key, count, period, now):
+        cache = self.cache
+        mark = f'ratelimit:{fingerprint(scope, key):x}'
+        now_index = int(now // period)
+        current_key, previous_key = f'{mark}:{now_index}', f'{mark}:{now_index - 1}'
+        previous = cache.get(previous_key, 0)
+        # Count first and take it back if over, so concurrent requests cannot all slip under
+        cache.add(current_key, 0, timeout=2 * period + 1)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:  # Evicted in between
+            cache.add(current_key, 1, timeout=2 * period + 1)
+            current = 1
+        wait = _decide(count, period, current - 1, previous, now)
+        if wait:
+            try:
+                cache.decr(current_key)
+            except ValueError:
+                pass
+        return wait
+
+    def reset(self):
+        self.cache.clear()
+
+
+BACKENDS = {
+    'shared_memory': SharedMemoryBackend,
+    'cache': CacheBackend,
+}
+
+
+class RateLimiter:
+    def __init__(self, backend=None, limits=None):
+        self._backend = backend
+        self._limits = limits
+        self.rejected = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            name = getattr(settings, 'RATELIMIT_BACKEND', 'shared_memory')
+            if name not in BACKENDS:
+                raise ImproperlyConfigured(f'RATELIMIT_BACKEND must be one of {", ".join(BACKENDS)}')
+            self._backend = BACKENDS[name]()
+        return self._backend
+
+    def limit(self, scope):
+        """``(count, period)`` for ``scope``, or None when it is not limited"""
+        limits = self._limits if self._limits is not None else getattr(settings, 'RATELIMITS', {})
+        rate = limits.get(scope)
+        return parse_rate(rate) if rate else None
+
+    def hit(self, scope, key, now=None):
+        """
+        Count a request for ``key`` under ``scope``. Returns 0 if it is
+        allowed, else the seconds until it would be (and does not count it).
+        """
+        limit = self.limit(scope)
+        if limit is None or key is None:
+            return 0
+        wait = self.backend.hit(scope, key, *limit, time.time() if now is None else now)
+        if wait:
+            self.rejected += 1
+        return wait
+
+    def reset(self):
+        self.backend.reset()
+
+
+limiter = RateLimiter()
+
+
+def client_ip(request):
+    """The client address, honouring ``NUM_PROXIES`` as DRF's throttles do"""
+    return BaseThrottle().get_ident(request)
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    DRF throttle on ``limiter``, for the scope in the view's
+    ``throttle_scope``; counts per user when authenticated, else per IP.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return True
+        if request.user and request.user.is_authenticated:
+            key = f'user:{request.user.pk}'
+        else:
+            key = f'ip:{self.get_ident(request)}'
+        self.wait_seconds = limiter.hit(scope, key)
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
@@ -51,12 +51,15 @@ INSTALLED_APPS = [
     "profiles",
     "custom_admin",
     "jobs",
+    "filestore",
+    "geo",
 ]
 
 # REST Framework configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # Builds request.user from token claims, see accounts.authentication
+        "accounts.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -71,10 +74,61 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": True,
+    "TOKEN_REFRESH_SERIALIZER": "accounts.authentication.ClaimsTokenRefreshSerializer",
 }
 
+# Seconds a process may go on accepting tokens revoked by another process
+# (accounts.revocation)
+AUTH_REVOCATION_CACHE_TTL = 30
+
 AUTH_USER_MODEL = "accounts.User"
 
+# Password hashing for login and registration runs on a bounded thread pool
+# (accounts.hashing): this many hashes at once, at most MAX_PENDING running or
+# queued, beyond which the views answer 503 with Retry-After.
+AUTH_HASHING_WORKERS = 4
+AUTH_HASHING_MAX_PENDING = 32
+AUTH_HASHING_RETRY_AFTER = 1  # seconds
+
+# Sliding-window rate limits by scope (arnica_connect.ratelimit); a request
+# over the limit gets 429 with Retry-After. Counters are shared by every
+# worker on the host through a memory-mapped file (one per database, so tests
+# never share the live counters); use the "cache" backend and a shared
+# RATELIMIT_CACHE when running on several hosts.
+RATELIMITS = {
+    "login_ip": "30/min",
+    "login_email": "10/15min",
+    "register_ip": "10/hour",
+    "job_applications": "30/hour",
+}
+RATELIMIT_BACKEND = "shared_memory"
+RATELIMIT_SHM_SLOTS = 65536  # 32 bytes each
+RATELIMIT_CACHE = "default"
+
+# Caches
+# Point "job_responses" at a shared backend (Redis, Memcached) when running
+# several workers so invalidations reach all of them.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "job_responses": {
+        "BACKEND": "jobs.cache.CountingLocMemCache",
+        "LOCATION": "job-responses",
+        "TIMEOUT": 300,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+# Cache alias used for job list/detail responses; None disables caching
+JOB_RESPONSE_CACHE = "job_responses"
+
+# Cache alias remembering which users have a profile (profiles.resolver);
+# None disables it. Entries saying a user has none are trusted for
+# PROFILE_CACHE_TIMEOUT seconds, so use a shared backend with several workers.
+PROFILE_CACHE = "default"
+PROFILE_CACHE_TIMEOUT = 60
+
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Add this line FIRST
@@ -165,6 +219,9 @@ import os
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Processes per web worker rendering resized profile images (profiles.images)
+IMAGE_VARIANT_WORKERS = 2
+
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
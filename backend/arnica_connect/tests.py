@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from django.test import SimpleTestCase
+
+from .bloom import BloomFilter
+from .ratelimit import PROBES, SharedMemoryBackend, _decide, fcntl, fingerprint
+
+
+class DecideTests(SimpleTestCase):
+    """Retry-After from the two window counters (5/min unless noted)"""
+
+    def test_under_the_limit(self):
+        self.assertEqual(_decide(5, 60, 3, 0, 120), 0)
+        # Half the previous window has slid out: 4 * 0.5 + 2 + 1 <= 5
+        self.assertEqual(_decide(5, 60, 2, 4, 150), 0)
+
+    def test_over_the_limit_in_the_current_window(self):
+        wait = _decide(5, 60, 5, 0, 140)
+        # To the next window, then until 1/5 of this one has slid out
+        self.assertEqual(wait, 40 + 12)
+        # Then the counters have rolled: this window is the previous one
+        self.assertEqual(_decide(5, 60, 0, 5, 140 + wait), 0)
+        self.assertGreater(_decide(5, 60, 0, 5, 140 + wait - 1), 0)
+
+    def test_previous_window_decays(self):
+        wait = _decide(10, 60, 2, 10, 180)
+        self.assertAlmostEqual(wait, 18)
+        self.assertEqual(_decide(10, 60, 2, 10, 180 + wait), 0)
+        self.assertGreater(_decide(10, 60, 2, 10, 180 + wait - 1), 0)
+
+
+class BloomFilterTests(SimpleTestCase):
+
+    def test_added_keys_are_always_found(self):
+        bloom = BloomFilter(10000, 0.001)
+        keys = [f'added{i}' for i in range(10000)]
+        bloom.update(keys)
+        self.assertTrue(all(key in bloom for key in keys))
+        self.assertTrue(bloom.full)
+
+    def test_false_positive_rate_at_capacity(self):
+        bloom = BloomFilter(10000, 0.01)
+        bloom.update(f'added{i}' for i in range(10000))
+        hits = sum(f'other{i}' in bloom for i in range(20000))
+        # Expected about 200
+        self.assertLess(hits, 300)
+
+    def test_invalid_arguments(self):
+        for capacity, error_rate in ((0, 0.01), (10, 0), (10, 1)):
+            with self.assertRaises(ValueError):
+                BloomFilter(capacity, error_rate)
+
+
+def _hammer(path, slots, hits, results):
+    backend = SharedMemoryBackend(path=path, slots=slots)
+    results.put(sum(1 for _ in range(hits) if not backend.hit('test', 'shared', 150, 60, 30)))
+
+
+class SharedMemoryBackendTests(SimpleTestCase):
+    slots = 16
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+        self.backend = SharedMemoryBackend(path=self.path, slots=self.slots)
+
+    def keys_in_bucket(self, bucket, number):
+        keys = (f'key{i}' for i in range(100000))
+        return [key for key in keys if fingerprint('test', key) % self.slots == bucket][:number]
+
+    def test_keys_with_overlapping_probe_ranges_count_separately(self):
+        first = self.keys_in_bucket(3, 1)[0]
+        second = self.keys_in_bucket(4, 1)[0]
+        for key in (first, second):
+            for _ in range(3):
+                self.assertEqual(self.backend.hit('test', key, 3, 60, 10), 0)
+        for key in (first, second):
+            self.assertGreater(self.backend.hit('test', key, 3, 60, 10), 0)
+
+    def test_full_probe_range_evicts_the_stalest_key(self):
+        oldest, *others = self.keys_in_bucket(0, PROBES + 1)
+        self.backend.hit('test', oldest, 1, 60, 0)
+        for key in others:
+            self.assertEqual(self.backend.hit('test', key, 1, 60, 65), 0)
+        # The oldest key's slot went to the last of the others, so its count restarted
+        self.assertEqual(self.backend.hit('test', oldest, 1, 60, 70), 0)
+
+    @unittest.skipIf(fcntl is None, 'needs fcntl record locks')
+    def test_processes_share_counters(self):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        workers = [
+            context.Process(target=_hammer, args=(self.path, self.slots, 60, results))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        allowed = sum(results.get(timeout=30) for _ in workers)
+        for worker in workers:
+            worker.join()
+        self.assertEqual(allowed, 150)
@@ -1,3 +1,62 @@
-from django.test import TestCase
+from datetime import datetime, time, timedelta
 
-# Create your tests here.
+from django.utils import timezone
+
+from accounts.models import User
+from accounts.search import index_emails, search_users
+from arnica_connect.queryplan import QueryPlanTestCase, analyze
+
+
+class HotQueryPlanTests(QueryPlanTestCase):
+    """Dashboard and user management queries must stay index-only"""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        user_types = [value for value, _ in User.USER_TYPE_CHOICES]
+        users = User.objects.bulk_create([
+            User(email=f'member{i}@clinic{i % 50}.example.com', user_type=user_types[i % len(user_types)])
+            for i in range(3000)
+        ])
+        # auto_now_add ignores given values, so spread join dates afterwards
+        for i, user in enumerate(users):
+            user.date_joined = now - timedelta(hours=i)
+        User.objects.bulk_update(users, ['date_joined'], batch_size=500)
+        # bulk_create skips the signal that maintains the email index
+        index_emails((user.pk, user.email) for user in users)
+        analyze()
+
+    def start_of(self, date):
+        return timezone.make_aware(datetime.combine(date, time.min))
+
+    def test_new_users_today(self):
+        start = self.start_of(timezone.localdate())
+        self.assertIndexed('new_users_today', User.objects.filter(date_joined__gte=start))
+
+    def test_daily_registrations(self):
+        start = self.start_of(timezone.localdate() - timedelta(days=30))
+        self.assertIndexed(
+            'daily_registrations',
+            User.objects.filter(date_joined__gte=start).values_list('date_joined', flat=True),
+        )
+
+    def test_recent_users(self):
+        self.assertIndexed('recent_users', User.objects.order_by('-date_joined')[:10])
+
+    def test_users_by_type(self):
+        self.assertIndexed(
+            'manage_users user_type',
+            User.objects.filter(user_type='clinic').order_by('-date_joined')[:50],
+        )
+
+    def test_email_search(self):
+        users = search_users(User.objects.all(), 'clinic7.')
+        self.assertIndexed('manage_users search', users)
+        # Only the matches are sorted for display
+        self.assertIndexed('manage_users search order', users.order_by('-date_joined'), allow_sort=True)
+        self.assertEqual(users.count(), 60)
+
+    def test_user_type_search(self):
+        users = search_users(User.objects.all(), 'seeker')
+        self.assertIndexed('manage_users search by type', users)
+        self.assertTrue(all(user.user_type == 'job_seeker' for user in users[:100]))
@@ -4,11 +4,13 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.http import JsonResponse, HttpResponse
 from django.db.models import Count, Q, Sum
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 import json
 from collections import defaultdict
 from accounts.models import User
+from accounts.search import search_users
 from profiles.models import ClinicProfile, EmployerProfile, JobSeekerProfile
+from profiles.resolver import get_profile
 from .models import AdminDashboardStats
 
 def is_admin(user):
@@ -18,10 +20,16 @@ def is_admin(user):
 @user_passes_test(is_admin)
 def admin_dashboard(request):
     """Main admin dashboard view"""
+    # Day boundaries in the current time zone. Filtering on date_joined
+    # ranges (rather than date_joined__date, which wraps the column in a
+    # function) lets the date_joined index answer these.
+    today = timezone.localdate()
+    start_of_today = timezone.make_aware(datetime.combine(today, time.min))
+    
     # Get statistics
     total_users = User.objects.count()
     active_users = User.objects.filter(is_active=True).count()
-    new_users_today = User.objects.filter(date_joined__date=timezone.now().date()).count()
+    new_users_today = User.objects.filter(date_joined__gte=start_of_today).count()
     new_users_week = User.objects.filter(
         date_joined__gte=timezone.now() - timedelta(days=7)
     ).count()
@@ -46,17 +54,19 @@ def admin_dashboard(request):
     # Recent activity
     recent_users = User.objects.order_by('-date_joined')[:10]
     
-    # Daily user registrations for chart
-    today = timezone.now().date()
+    # Daily user registrations for chart: one index range scan, bucketed here
     date_range = [today - timedelta(days=i) for i in range(30, -1, -1)]
-    
-    daily_registrations = []
-    for date in date_range:
-        count = User.objects.filter(date_joined__date=date).count()
-        daily_registrations.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'count': count
-        })
+    joined = User.objects.filter(
+        date_joined__gte=timezone.make_aware(datetime.combine(date_range[0], time.min))
+    ).values_list('date_joined', flat=True)
+    per_day = defaultdict(int)
+    for date_joined in joined.iterator():
+        per_day[timezone.localdate(date_joined)] += 1
+    
+    daily_registrations = [
+        {'date': date.strftime('%Y-%m-%d'), 'count': per_day[date]}
+        for date in date_range
+    ]
     
     context = {
         'total_users': total_users,
@@ -91,10 +101,7 @@ def manage_users(request):
     
     search = request.GET.get('search', '')
     if search:
-        users = users.filter(
-            Q(email__icontains=search) |
-            Q(user_type__icontains=search)
-        )
+        users = search_users(users, search)
     
     context = {
         'users': users,
@@ -119,15 +126,10 @@ def user_detail(request, user_id):
     }
     
     # Add profile data based on user type
-    if user.user_type == 'clinic' and hasattr(user, 'clinic_profile'):
-        context['profile'] = user.clinic_profile
-        context['profile_type'] = 'clinic'
-    elif user.user_type == 'employer' and hasattr(user, 'employer_profile'):
-        context['profile'] = user.employer_profile
-        context['profile_type'] = 'employer'
-    elif user.user_type == 'job_seeker' and hasattr(user, 'job_seeker_profile'):
-        context['profile'] = user.job_seeker_profile
-        context['profile_type'] = 'job_seeker'
+    profile = get_profile(user)
+    if profile is not None:
+        context['profile'] = profile
+        context['profile_type'] = user.user_type
     
     return render(request, 'custom_admin/user_detail.html', context)
 
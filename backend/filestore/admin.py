@@ -0,0 +1,37 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Blob, ExtractionTask
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ("name", "size", "ref_count", "created_at")
+    list_filter = ("created_at",)
+    search_fields = ("name", "sha256")
+    readonly_fields = ("name", "sha256", "size", "ref_count", "created_at")
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.action(description="Retry selected extraction tasks")
+def retry_tasks(modeladmin, request, queryset):
+    queryset.update(
+        status=ExtractionTask.PENDING, attempts=0, available_at=timezone.now(),
+        claimed_by='', lease_expires_at=None,
+    )
+
+
+@admin.register(ExtractionTask)
+class ExtractionTaskAdmin(admin.ModelAdmin):
+    list_display = ("blob", "status", "attempts", "available_at", "updated_at")
+    list_filter = ("status",)
+    readonly_fields = (
+        "blob", "status", "attempts", "available_at", "claimed_by",
+        "lease_expires_at", "last_error", "created_at", "updated_at",
+    )
+    actions = [retry_tasks]
+
+    def has_add_permission(self, request):
+        return False
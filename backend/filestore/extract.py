@@ -0,0 +1,146 @@
+"""
+Plain-text extraction from uploaded documents.
+
+PDF text comes from ``pypdf`` when it is installed; without it a small
+built-in reader decodes the text-showing operators of (Flate compressed)
+content streams, which covers the simple-font PDFs most CV tools produce.
+DOCX is read straight from the zipped XML and plain text files are decoded
+as UTF-8 with a Latin-1 fallback. Other formats yield no text.
+"""
+import os
+import re
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+try:
+    import pypdf
+except ImportError:  # optional dependency
+    pypdf = None
+
+MAX_TEXT_CHARS = 200000
+TEXT_EXTENSIONS = ('.txt', '.md', '.csv', '.rtf')
+
+WHITESPACE_RE = re.compile(r'[ \t\r\f\v]+')
+BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def normalize(text):
+    text = WHITESPACE_RE.sub(' ', text.replace('\x00', ''))
+    return BLANK_LINES_RE.sub('\n\n', text).strip()[:MAX_TEXT_CHARS]
+
+
+def extract_text(name, stream):
+    """Text of the document ``stream`` (opened in binary mode) named ``name``"""
+    extension = os.path.splitext(name)[1].lower()
+    if extension == '.pdf':
+        text = pdf_text(stream)
+    elif extension == '.docx':
+        text = docx_text(stream)
+    elif extension in TEXT_EXTENSIONS:
+        data = stream.read(MAX_TEXT_CHARS * 4)
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            text = data.decode('latin-1')
+    else:
+        return ''
+    return normalize(text)
+
+
+# DOCX
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def docx_text(stream):
+    try:
+        with zipfile.ZipFile(stream) as archive, archive.open('word/document.xml') as document:
+            parts = []
+            for event, element in ElementTree.iterparse(document, events=('end',)):
+                if element.tag == f'{WORD_NS}t':
+                    parts.append(element.text or '')
+                elif element.tag == f'{WORD_NS}tab':
+                    parts.append('\t')
+                elif element.tag in (f'{WORD_NS}br', f'{WORD_NS}cr', f'{WORD_NS}p'):
+                    parts.append('\n')
+                    if element.tag == f'{WORD_NS}p':
+                        element.clear()
+            return ''.join(parts)
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as exc:
+        raise ExtractionError(f'Not a readable DOCX file: {exc}')
+
+
+# PDF
+
+def pdf_text(stream):
+    if pypdf is not None:
+        try:
+            reader = pypdf.PdfReader(stream)
+            return '\n'.join(page.extract_text() or '' for page in reader.pages)
+        except pypdf.errors.PdfReadError as exc:
+            raise ExtractionError(f'Not a readable PDF file: {exc}')
+    data = stream.read()
+    if not data.startswith(b'%PDF'):
+        raise ExtractionError('Not a PDF file')
+    return '\n'.join(_content_stream_text(content) for content in _pdf_streams(data))
+
+
+STREAM_RE = re.compile(rb'stream\r?\n(.*?)\r?\nendstream', re.S)
+TEXT_BLOCK_RE = re.compile(rb'BT\b(.*?)\bET\b', re.S)
+# Literal strings, TJ arrays and the operators that move to a new line
+TEXT_TOKEN_RE = re.compile(
+    rb'\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)|\[|\]|-?\d+(?:\.\d+)?|T\*|Td|TD|\'|"|Tj|TJ',
+    re.S,
+)
+ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+ESCAPE_RE = re.compile(rb'\\([nrtbf()\\]|[0-7]{1,3}|\r?\n)')
+
+
+def _pdf_streams(data):
+    for match in STREAM_RE.finditer(data):
+        raw = match.group(1)
+        try:
+            yield zlib.decompressobj().decompress(raw)
+        except zlib.error:
+            yield raw
+
+
+def _unescape(literal):
+    def replace(match):
+        token = match.group(1)
+        if token in ESCAPES:
+            return ESCAPES[token]
+        if token[:1] in (b'\r', b'\n'):
+            return b''
+        if token.isdigit():
+            return bytes([int(token, 8) & 0xFF])
+        return token
+    return ESCAPE_RE.sub(replace, literal).decode('latin-1')
+
+
+def _content_stream_text(content):
+    lines = []
+    for block in TEXT_BLOCK_RE.findall(content):
+        line = []
+        for token in TEXT_TOKEN_RE.findall(block):
+            if token.startswith(b'('):
+                line.append(_unescape(token[1:-1]))
+            elif token in (b'T*', b'Td', b'TD', b"'", b'"'):
+                if line:
+                    lines.append(''.join(line))
+                    line = []
+            elif token[:1] in b'-0123456789' and line:
+                # Large negative kerning inside a TJ array separates words
+                try:
+                    if float(token) < -200:
+                        line.append(' ')
+                except ValueError:
+                    pass
+        if line:
+            lines.append(''.join(line))
+    return '\n'.join(lines)
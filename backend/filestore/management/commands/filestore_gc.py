@@ -0,0 +1,159 @@
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from filestore.models import Blob
+from filestore.signals import TRACKED_FIELDS
+from filestore.storage import blob_storage
+
+BATCH_SIZE = 500
+
+
+def referenced_names():
+    """``Counter`` of stored names over every tracked file field"""
+    counts = Counter()
+    for model, fields in TRACKED_FIELDS.items():
+        for field in fields:
+            rows = (
+                model._default_manager.order_by()
+                .exclude(**{field.attname: ''})
+                .exclude(**{f'{field.attname}__isnull': True})
+                .values_list(field.attname)
+                .annotate(total=Count('pk'))
+            )
+            for name, total in rows.iterator():
+                if field.storage.is_blob(name):
+                    counts[name] += total
+    return counts
+
+
+def still_referenced(names):
+    """Subset of ``names`` some tracked row points at"""
+    found = set()
+    for model, fields in TRACKED_FIELDS.items():
+        for field in fields:
+            found.update(
+                model._default_manager.filter(**{f'{field.attname}__in': names})
+                .values_list(field.attname, flat=True)
+            )
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount blob references from the tables and delete blobs no row uses '
+        'any more. Blobs younger than the grace period are kept so uploads '
+        'whose row is still being saved are never removed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24)
+        parser.add_argument('--dry-run', action='store_true', help='Report without changing anything')
+        parser.add_argument(
+            '--scan-files', action='store_true',
+            help='Also walk the blob directories for files without a Blob row '
+                 '(left by uploads whose transaction rolled back)',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+
+        corrected, registered = self.reconcile(dry_run)
+        self.stdout.write(f'Reference counts corrected on {corrected} blobs, {registered} untracked blobs registered')
+
+        deleted, freed = self.collect(cutoff, dry_run)
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {deleted} blobs ({freed} bytes)'))
+
+        if options['scan_files']:
+            orphans = self.scan_files(cutoff.timestamp(), dry_run)
+            self.stdout.write(self.style.SUCCESS(f'{verb} {orphans} orphaned files'))
+
+    def reconcile(self, dry_run):
+        counts = referenced_names()
+        stale = []
+        for blob in Blob.objects.only('pk', 'name', 'ref_count').iterator(chunk_size=2000):
+            actual = counts.pop(blob.name, 0)
+            if blob.ref_count != actual:
+                blob.ref_count = actual
+                stale.append(blob)
+
+        # Referenced names with no Blob row, e.g. rows restored from a backup
+        missing = [
+            Blob(
+                name=name, sha256=blob_storage.digest_of(name),
+                size=blob_storage.size(name), ref_count=total,
+            )
+            for name, total in counts.items() if blob_storage.exists(name)
+        ]
+        if not dry_run:
+            Blob.objects.bulk_update(stale, ['ref_count'], batch_size=BATCH_SIZE)
+            Blob.objects.bulk_create(missing, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        return len(stale), len(missing)
+
+    def collect(self, cutoff, dry_run):
+        deleted = freed = 0
+        candidates = Blob.objects.filter(ref_count=0, created_at__lt=cutoff).order_by('pk')
+        last_pk = 0
+        while True:
+            batch = list(candidates.filter(pk__gt=last_pk).values_list('pk', 'name', 'size')[:BATCH_SIZE])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            # Re-check against the tables in case a row started using a blob
+            # after the recount
+            in_use = still_referenced([name for _, name, _ in batch])
+            garbage = [(pk, name, size) for pk, name, size in batch if name not in in_use]
+            if not dry_run and garbage:
+                with transaction.atomic():
+                    # An upload reusing a blob since the scan refreshes its
+                    # created_at, which keeps it out of this delete
+                    Blob.objects.filter(
+                        pk__in=[pk for pk, _, _ in garbage], ref_count=0, created_at__lt=cutoff
+                    ).delete()
+                # Files whose row is still there, or was created again by a
+                # new upload, stay
+                kept = set(
+                    Blob.objects.filter(name__in=[name for _, name, _ in garbage]).values_list('name', flat=True)
+                )
+                garbage = [item for item in garbage if item[1] not in kept]
+                for _, name, _ in garbage:
+                    blob_storage.delete(name)
+            deleted += len(garbage)
+            freed += sum(size for _, _, size in garbage)
+        return deleted, freed
+
+    def scan_files(self, cutoff, dry_run):
+        root = blob_storage.path(blob_storage.prefix)
+        orphans = 0
+        for directory, _, files in os.walk(root):
+            batch = {}
+            for filename in files:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, blob_storage.location).replace(os.sep, '/')
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        batch[name] = path
+                except FileNotFoundError:
+                    continue
+            if not batch:
+                continue
+            names = list(batch)
+            known = set(Blob.objects.filter(name__in=names).values_list('name', flat=True))
+            known |= still_referenced(names)
+            for name, path in batch.items():
+                if name not in known:
+                    orphans += 1
+                    if not dry_run:
+                        try:
+                            os.remove(path)
+                        except FileNotFoundError:
+                            pass
+        return orphans
@@ -0,0 +1,79 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from filestore.models import Blob
+from filestore.storage import blob_storage
+from filestore.tasks import claim, enqueue, run_task
+
+
+class Command(BaseCommand):
+    help = (
+        'Extract text from uploaded documents queued in the database. '
+        'Runs until interrupted, or until the queue is empty with --once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Documents processed concurrently (default: 4)',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to wait when the queue is empty',
+        )
+        parser.add_argument('--once', action='store_true', help='Exit once no task is due')
+        parser.add_argument(
+            '--enqueue-missing', action='store_true',
+            help='First queue every blob that was never extracted (e.g. after an upgrade)',
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        if threads < 1:
+            raise CommandError('--threads must be at least 1')
+
+        if options['enqueue_missing']:
+            missing = Blob.objects.filter(extracted_at__isnull=True, extraction_task__isnull=True)
+            queued = 0
+            for blob in missing.iterator(chunk_size=1000):
+                enqueue(blob)
+                queued += 1
+            self.stdout.write(f'Queued {queued} documents')
+
+        totals = Counter()
+        pool = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+        try:
+            while True:
+                # Claim no more than can run at once so other workers get the rest
+                tasks = claim(threads)
+                if not tasks:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                results = pool.map(self.process, tasks) if pool else map(run_task_inline, tasks)
+                totals.update(results)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Extracted {totals['done']}, retrying {totals['pending']}, failed {totals['failed']}"
+        ))
+
+    def process(self, task):
+        try:
+            return run_task(task, blob_storage)
+        finally:
+            # Each pool thread holds its own connection
+            connection.close()
+
+
+def run_task_inline(task):
+    return run_task(task, blob_storage)
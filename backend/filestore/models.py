@@ -0,0 +1,61 @@
+from django.db import models
+
+
+class Blob(models.Model):
+    """
+    One stored file in the content-addressed store, shared by every row
+    whose file field holds ``name``.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    # Rows currently pointing at this blob, maintained by filestore.signals
+    ref_count = models.PositiveIntegerField(default=0)
+    # Also reset when an upload reuses an unreferenced blob; see filestore_gc
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Plain text of the document, filled in by the extraction worker
+    text = models.TextField(blank=True, default='')
+    extracted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Garbage collection scans unreferenced blobs by age
+            models.Index(fields=['ref_count', 'created_at'], name='blob_gc_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ExtractionTask(models.Model):
+    """Queued text extraction of one blob, see filestore.tasks"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    blob = models.OneToOneField(Blob, on_delete=models.CASCADE, related_name='extraction_task')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Not picked up before this time (retry backoff)
+    available_at = models.DateTimeField()
+    # Set while a worker holds the task; an expired lease makes it claimable again
+    claimed_by = models.CharField(max_length=32, blank=True, default='')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='extraction_task_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Extract {self.blob_id} ({self.status})"
@@ -0,0 +1,110 @@
+"""
+Reference counting for content-addressed blobs.
+
+Every model file field backed by a ``ContentAddressedStorage`` is tracked
+automatically. The stored names are remembered when a row is loaded; after
+a save the old and new names are compared and each blob's ``ref_count`` is
+moved by the difference, and a delete releases the names the row held.
+Changes made without signals (``QuerySet.update``, raw SQL, deferred file
+fields) are not seen here; ``filestore_gc`` recounts from the tables before
+it removes anything.
+"""
+from collections import Counter
+
+from django.apps import apps
+from django.db.models import F, FileField
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .models import Blob
+from .storage import ContentAddressedStorage
+
+# {model: [file fields stored in a ContentAddressedStorage]}
+TRACKED_FIELDS = {}
+
+
+def tracked_fields():
+    fields = {}
+    for model in apps.get_models():
+        model_fields = [
+            field for field in model._meta.concrete_fields
+            if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+        ]
+        if model_fields:
+            fields[model] = model_fields
+    return fields
+
+
+def connect_tracked_fields():
+    TRACKED_FIELDS.clear()
+    TRACKED_FIELDS.update(tracked_fields())
+    for model in TRACKED_FIELDS:
+        post_init.connect(remember_names, sender=model, dispatch_uid=f'filestore_init_{model._meta.label}')
+        post_save.connect(count_saved_refs, sender=model, dispatch_uid=f'filestore_save_{model._meta.label}')
+        post_delete.connect(count_deleted_refs, sender=model, dispatch_uid=f'filestore_delete_{model._meta.label}')
+
+
+def _name(value):
+    if not value:
+        return ''
+    return value if isinstance(value, str) else (value.name or '')
+
+
+def _current_names(instance):
+    return {
+        field.attname: _name(instance.__dict__[field.attname])
+        for field in TRACKED_FIELDS[type(instance)]
+        if field.attname in instance.__dict__
+    }
+
+
+def adjust_ref_counts(deltas):
+    """Apply ``{(storage, name): delta}`` to the blob reference counts"""
+    for (storage, name), delta in deltas.items():
+        if not delta or not storage.is_blob(name):
+            continue
+        if delta > 0:
+            updated = Blob.objects.filter(name=name).update(ref_count=F('ref_count') + delta)
+            if not updated and storage.exists(name):
+                # Stored before the blob table knew about it
+                Blob.objects.get_or_create(name=name, defaults={
+                    'sha256': storage.digest_of(name),
+                    'size': storage.size(name),
+                    'ref_count': delta,
+                })
+        else:
+            Blob.objects.filter(name=name, ref_count__gte=-delta).update(
+                ref_count=F('ref_count') + delta
+            )
+
+
+def remember_names(sender, instance, **kwargs):
+    instance._filestore_names = _current_names(instance)
+
+
+def count_saved_refs(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    previous = {} if created else getattr(instance, '_filestore_names', {})
+    current = _current_names(instance)
+    deltas = Counter()
+    for field in TRACKED_FIELDS[sender]:
+        name = field.attname
+        if update_fields is not None and name not in update_fields:
+            continue
+        if name not in current or (not created and name not in previous):
+            # Deferred or never loaded: left to filestore_gc to recount
+            continue
+        if current[name] != previous.get(name, ''):
+            deltas[(field.storage, current[name])] += 1
+            deltas[(field.storage, previous.get(name, ''))] -= 1
+    adjust_ref_counts(deltas)
+    instance._filestore_names = current
+
+
+def count_deleted_refs(sender, instance, **kwargs):
+    names = {**_current_names(instance), **getattr(instance, '_filestore_names', {})}
+    deltas = Counter()
+    for field in TRACKED_FIELDS[sender]:
+        if names.get(field.attname):
+            deltas[(field.storage, names[field.attname])] -= 1
+    adjust_ref_counts(deltas)
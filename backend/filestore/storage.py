@@ -0,0 +1,124 @@
+"""
+Content-addressed file storage.
+
+Uploads are hashed with SHA-256 while they are streamed to a temporary
+file, then moved to ``<prefix>/ab/cd/<sha256><ext>``, where ``ab`` and
+``cd`` are the first two byte pairs of the digest. Identical uploads map to
+the same name, so each distinct file is written once however many rows use
+it. The two shard levels spread files over 65,536 directories, which keeps
+every directory small even with millions of blobs.
+
+Every stored file gets a ``filestore.Blob`` row; ``filestore.signals`` keeps
+its reference count in step with the rows pointing at it and the
+``filestore_gc`` command removes blobs nothing references any more. New
+blobs are queued for text extraction (``filestore.tasks``), once per
+distinct content. Names outside the prefix (files saved before a field
+switched to this storage) are served from the same location as before.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+CHUNK_SIZE = 64 * 1024
+EXTENSION_RE = re.compile(r'\.[a-z0-9]{1,10}')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def __init__(self, prefix='blobs', **kwargs):
+        self.prefix = prefix
+        super().__init__(**kwargs)
+
+    def blob_name(self, digest, original_name=''):
+        extension = os.path.splitext(original_name)[1].lower()
+        if not EXTENSION_RE.fullmatch(extension):
+            extension = ''
+        return f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def is_blob(self, name):
+        return bool(name) and name.startswith(f'{self.prefix}/') and '/tmp/' not in name
+
+    @staticmethod
+    def digest_of(name):
+        return os.path.splitext(os.path.basename(name))[0]
+
+    def get_available_name(self, name, max_length=None):
+        # The stored name comes from the content; see _save
+        return name
+
+    def _hash_into_temp(self, content):
+        """Stream ``content`` into a temporary file; returns ``(path, digest, size)``"""
+        tmp_dir = self.path(f'{self.prefix}/tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path, digest.hexdigest(), size
+
+    def _hash_file(self, path):
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size
+
+    def _save(self, name, content):
+        from .models import Blob
+
+        if hasattr(content, 'temporary_file_path'):
+            # Large uploads are already on disk: hash in place, then move
+            source = content.temporary_file_path()
+            digest, size = self._hash_file(source)
+            move = file_move_safe
+        else:
+            source, digest, size = self._hash_into_temp(content)
+            move = os.replace
+
+        stored_name = self.blob_name(digest, name)
+        # The row first: a reused blob gets a fresh grace period, so
+        # filestore_gc cannot remove it before the owning row counts it
+        try:
+            blob, created = Blob.objects.get_or_create(
+                name=stored_name, defaults={'sha256': digest, 'size': size}
+            )
+        except IntegrityError:
+            # Created concurrently by an identical upload
+            created = False
+        if not created:
+            Blob.objects.filter(name=stored_name, ref_count=0).update(created_at=timezone.now())
+
+        target = self.path(stored_name)
+        if os.path.exists(target):
+            if move is os.replace:
+                os.remove(source)
+        else:
+            os.makedirs(os.path.dirname(target), mode=self.directory_permissions_mode or 0o777, exist_ok=True)
+            move(source, target)
+            if self.file_permissions_mode is not None:
+                os.chmod(target, self.file_permissions_mode)
+
+        if created:
+            from .tasks import enqueue
+            enqueue(blob)
+        return stored_name
+
+
+blob_storage = ContentAddressedStorage()
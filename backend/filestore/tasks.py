@@ -0,0 +1,115 @@
+"""
+Database-backed queue for document text extraction.
+
+A task row is queued in the same transaction that stores a new blob, so
+work is only visible once the upload commits. Workers (the
+``run_extraction_worker`` command) claim a batch by stamping it with a
+unique token in one conditional UPDATE; the condition is re-checked by the
+database, so two workers never claim the same row, and a claim carries a
+lease so tasks held by a crashed worker become claimable again once it
+expires. Unreadable documents fail at once; other errors (storage,
+database) are retried with exponential backoff up to ``MAX_ATTEMPTS``
+times.
+"""
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .extract import ExtractionError, extract_text
+from .models import Blob, ExtractionTask
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+LEASE = timedelta(minutes=10)
+
+# Sent with ``blob`` once its text is stored, inside the same transaction
+text_extracted = Signal()
+
+
+def enqueue(blob, delay=None):
+    """Queue (or re-queue) text extraction for ``blob``"""
+    available_at = timezone.now() + (delay or timedelta())
+    ExtractionTask.objects.update_or_create(
+        blob=blob,
+        defaults={
+            'status': ExtractionTask.PENDING,
+            'attempts': 0,
+            'available_at': available_at,
+            'claimed_by': '',
+            'lease_expires_at': None,
+            'last_error': '',
+        },
+    )
+
+
+def _claimable(now):
+    return (
+        Q(status=ExtractionTask.PENDING, available_at__lte=now)
+        | Q(status=ExtractionTask.RUNNING, lease_expires_at__lt=now)
+    )
+
+
+def claim(limit):
+    """Claim up to ``limit`` due tasks for this worker"""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    candidates = list(
+        ExtractionTask.objects.filter(_claimable(now))
+        .order_by('available_at')
+        .values_list('pk', flat=True)[:limit]
+    )
+    if not candidates:
+        return []
+    ExtractionTask.objects.filter(_claimable(now), pk__in=candidates).update(
+        status=ExtractionTask.RUNNING,
+        claimed_by=token,
+        lease_expires_at=now + LEASE,
+        updated_at=now,
+    )
+    return list(ExtractionTask.objects.filter(claimed_by=token).select_related('blob'))
+
+
+def _release(task, **fields):
+    # Only the current holder may finish a task; a worker whose lease ran
+    # out must not overwrite a newer claim
+    return ExtractionTask.objects.filter(pk=task.pk, claimed_by=task.claimed_by).update(
+        claimed_by='', lease_expires_at=None, updated_at=timezone.now(), **fields
+    )
+
+
+def run_task(task, storage):
+    """
+    Extract and store the text of one claimed task. Returns the resulting
+    status.
+    """
+    attempts = task.attempts + 1
+    try:
+        with storage.open(task.blob.name, 'rb') as stream:
+            text = extract_text(task.blob.name, stream)
+    except Exception as exc:
+        error = f'{type(exc).__name__}: {exc}'
+        # A malformed document fails the same way every time
+        if isinstance(exc, ExtractionError) or attempts >= MAX_ATTEMPTS:
+            _release(task, status=ExtractionTask.FAILED, attempts=attempts, last_error=error)
+            return ExtractionTask.FAILED
+        delay = timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+        _release(
+            task, status=ExtractionTask.PENDING, attempts=attempts, last_error=error,
+            available_at=timezone.now() + delay,
+        )
+        return ExtractionTask.PENDING
+
+    with transaction.atomic():
+        if not _release(task, status=ExtractionTask.DONE, attempts=attempts, last_error=''):
+            # Lost the lease to another worker meanwhile; its result wins
+            return ExtractionTask.RUNNING
+        blob = task.blob
+        blob.text = text
+        blob.extracted_at = timezone.now()
+        Blob.objects.filter(pk=blob.pk).update(text=text, extracted_at=blob.extracted_at)
+        text_extracted.send(sender=Blob, blob=blob)
+    return ExtractionTask.DONE
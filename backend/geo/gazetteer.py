@@ -0,0 +1,127 @@
+"""
+Offline place-name lookup.
+
+``data/gazetteer.csv`` lists cities with their coordinates and population,
+plus the regions (states, provinces) and countries used to tell cities of
+the same name apart. ``geocode()`` reads a free-text location or address
+such as ``"12 Allen Avenue, Ikeja, Lagos"`` or ``"Austin, TX 78701"``:
+
+* the text is split into comma separated parts and every region or country
+  named anywhere becomes context;
+* parts are tried left to right (addresses go from specific to general) and
+  within a part the longest run of words naming a city wins;
+* among cities sharing that name, one in a region and country from the
+  context is preferred, then the most populous.
+
+Codes of three letters or fewer (``TX``, ``NYC``, ``UK``) only count when
+they make up a whole part, so words like "in" or "or" never match.
+"""
+import csv
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv')
+
+MAX_NAME_WORDS = 4
+SHORT_ALIAS_LENGTH = 3
+
+Place = namedtuple('Place', 'name region country latitude longitude population')
+
+NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+DIGITS_RE = re.compile(r'\b\d+\b')
+PART_SPLIT_RE = re.compile(r'[,;/|\n]+')
+
+
+def normalize(text):
+    """Lowercase ASCII words separated by single spaces"""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return NON_WORD_RE.sub(' ', text.lower()).strip()
+
+
+class Gazetteer:
+    def __init__(self, path=DATA_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self.cities = defaultdict(list)
+            self.regions = defaultdict(set)    # name -> {(region, country)}
+            self.countries = defaultdict(set)  # name -> {country}
+            self.short_names = set()
+            with open(self.path, newline='', encoding='utf-8') as source:
+                for row in csv.DictReader(source):
+                    names = {normalize(row['name'])}
+                    names.update(normalize(alias) for alias in row['alternate_names'].split('|') if alias)
+                    names.discard('')
+                    self.short_names.update(name for name in names if len(name) <= SHORT_ALIAS_LENGTH)
+                    if row['kind'] == 'country':
+                        for name in names:
+                            self.countries[name].add(row['country'])
+                    elif row['kind'] == 'region':
+                        for name in names:
+                            self.regions[name].add((row['name'], row['country']))
+                    else:
+                        place = Place(
+                            row['name'], row['region'], row['country'],
+                            float(row['latitude']), float(row['longitude']), int(row['population']),
+                        )
+                        for name in names:
+                            self.cities[name].append(place)
+            self._loaded = True
+
+    def _names_in(self, part):
+        """Word runs of ``part`` that may name a place, longest first, then leftmost"""
+        whole = DIGITS_RE.sub(' ', part).split()
+        if whole and ' '.join(whole) in self.short_names:
+            yield ' '.join(whole)
+        words = part.split()
+        for size in range(min(MAX_NAME_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                name = ' '.join(words[start:start + size])
+                if name not in self.short_names:
+                    yield name
+
+    def geocode(self, text):
+        """Best matching ``Place`` for ``text``, or None"""
+        if not text:
+            return None
+        if not self._loaded:
+            self._load()
+        parts = [normalize(part) for part in PART_SPLIT_RE.split(text)]
+        parts = [part for part in parts if part]
+
+        regions, countries = set(), set()
+        for part in parts:
+            for name in self._names_in(part):
+                for region, country in self.regions.get(name, ()):
+                    regions.add(region)
+                    countries.add(country)
+                countries.update(self.countries.get(name, ()))
+
+        for part in parts:
+            for name in self._names_in(part):
+                candidates = self.cities.get(name)
+                if candidates:
+                    return max(candidates, key=lambda place: (
+                        place.region in regions and place.country in countries,
+                        place.country in countries,
+                        place.population,
+                    ))
+        return None
+
+
+gazetteer = Gazetteer()
+
+
+@lru_cache(maxsize=4096)
+def geocode(text):
+    # Imports and backfills repeat the same few locations many times
+    return gazetteer.geocode(text)
@@ -0,0 +1,81 @@
+"""
+Geohash encoding and radius cell cover.
+
+A geohash names a lat/lng cell; each extra character splits the cell into
+32, and cells sharing a prefix nest inside each other. Points stored with
+their full-precision geohash in an indexed column can therefore be fetched
+cell by cell as plain index range scans (``prefix <= geohash < prefix~``)
+on any database.
+
+``cover(lat, lng, radius_km)`` picks the finest precision whose cells are
+at least ``radius_km`` wide and high at that latitude and returns the cell
+holding the centre plus its eight neighbours: any point within the radius
+lies in one of them. Very large radii return no cells, meaning "do not
+prune".
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """``(lat_degrees, lng_degrees)`` spanned by a cell of ``precision``"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def _wrap_longitude(longitude):
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+def cover(latitude, longitude, radius_km):
+    """Geohash prefixes that together contain every point within ``radius_km``"""
+    width_factor = max(math.cos(math.radians(min(abs(latitude) + radius_km / KM_PER_DEGREE, 90.0))), 1e-9)
+    precision = 0
+    for candidate in range(1, PRECISION + 1):
+        lat_size, lng_size = cell_size(candidate)
+        if (lat_size * KM_PER_DEGREE < radius_km
+                or lng_size * KM_PER_DEGREE * width_factor < radius_km):
+            break
+        precision = candidate
+    if precision == 0:
+        return []
+
+    lat_size, lng_size = cell_size(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        neighbour_lat = latitude + lat_step * lat_size
+        if not -90.0 <= neighbour_lat <= 90.0:
+            continue
+        for lng_step in (-1, 0, 1):
+            neighbour_lng = _wrap_longitude(longitude + lng_step * lng_size)
+            cells.add(encode(neighbour_lat, neighbour_lng, precision))
+    return sorted(cells)
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from geo.signals import GEOCODED_MODELS, coordinates_changed, locate
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill in coordinates from the local gazetteer for rows that have none '
+        '(e.g. after an upgrade or a bulk load), or for every row with --all.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-geocode rows that already have coordinates')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows updated per transaction (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        for model in GEOCODED_MODELS:
+            rows = model._default_manager.order_by('pk').only(
+                'pk', model.geocode_field, 'latitude', 'longitude', 'geohash'
+            )
+            if not options['all']:
+                rows = rows.filter(latitude__isnull=True)
+            located = missed = 0
+            batch = []
+            for instance in rows.iterator(chunk_size=batch_size):
+                if locate(instance) is None:
+                    missed += 1
+                else:
+                    located += 1
+                batch.append(instance)
+                if len(batch) >= batch_size:
+                    self._flush(model, batch)
+                    batch = []
+            self._flush(model, batch)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: {located} located, {missed} not found'
+            ))
+
+    def _flush(self, model, batch):
+        if not batch:
+            return
+        fields = ['latitude', 'longitude', 'geohash']
+        if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+            # bulk_update skips auto_now, and clients revalidate on updated_at
+            now = timezone.now()
+            for instance in batch:
+                instance.updated_at = now
+            fields.append('updated_at')
+        with transaction.atomic():
+            model._default_manager.bulk_update(batch, fields)
+            coordinates_changed.send(sender=model)
@@ -0,0 +1,77 @@
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+from rest_framework.exceptions import ValidationError
+
+from .geohash import EARTH_RADIUS_KM, cover
+
+DEFAULT_RADIUS_KM = 25.0
+MAX_RADIUS_KM = 500.0
+# Sorts after every geohash character
+PREFIX_END = '~'
+
+
+def parse_near(params):
+    """
+    ``(latitude, longitude, radius_km)`` from ``?near=lat,lng&radius_km=``,
+    or None when ``near`` is not given.
+    """
+    near = params.get('near', '').strip()
+    if not near:
+        return None
+    try:
+        latitude, longitude = (float(value) for value in near.split(','))
+    except ValueError:
+        raise ValidationError({'near': "Expected 'latitude,longitude'."})
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValidationError({'near': 'Coordinates out of range.'})
+
+    radius = params.get('radius_km', '')
+    try:
+        radius_km = float(radius) if radius else DEFAULT_RADIUS_KM
+    except ValueError:
+        raise ValidationError({'radius_km': 'Expected a number.'})
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ValidationError({'radius_km': f'Must be between 0 and {MAX_RADIUS_KM:g}.'})
+    return latitude, longitude, radius_km
+
+
+def distance_km(latitude, longitude):
+    """Great-circle (haversine) distance from the point to each row, in km"""
+    lat1, lng1 = Radians(Value(latitude)), Radians(Value(longitude))
+    lat2, lng2 = Radians(F('latitude')), Radians(F('longitude'))
+    a = (
+        Power(Sin((lat2 - lat1) / 2), 2)
+        + Cos(lat1) * Cos(lat2) * Power(Sin((lng2 - lng1) / 2), 2)
+    )
+    # Rounding can push a just above 1 for antipodal points
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(a, Value(1.0))), output_field=FloatField())
+
+
+def cells_q(latitude, longitude, radius_km):
+    """Index range conditions on ``geohash`` for the cells around the point"""
+    condition = Q()
+    for cell in cover(latitude, longitude, radius_km):
+        condition |= Q(geohash__gte=cell, geohash__lt=cell + PREFIX_END)
+    return condition
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """
+    Rows of ``queryset`` within ``radius_km`` of the point, nearest first,
+    annotated with ``distance_km``. The geohash cells prune the candidates
+    through the index; the exact distance is only computed for those.
+    """
+    return (
+        queryset.filter(cells_q(latitude, longitude, radius_km), latitude__isnull=False)
+        .annotate(distance_km=distance_km(latitude, longitude))
+        .filter(distance_km__lte=radius_km)
+        .order_by('distance_km', 'pk')
+    )
+
+
+def filter_near(queryset, params):
+    """Apply ``?near=`` and ``radius_km=`` when present"""
+    near = parse_near(params)
+    if near is None:
+        return queryset
+    return within_radius(queryset, *near)
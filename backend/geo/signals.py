@@ -0,0 +1,65 @@
+"""
+Coordinates for geocoded models.
+
+A model opts in with a ``geocode_field`` attribute naming its free-text
+location field, alongside ``latitude``, ``longitude`` and ``geohash``
+fields. The text is looked up in the local gazetteer when a row is created
+without coordinates and whenever the text changes; coordinates set by hand
+are otherwise kept. ``bulk_create`` and ``QuerySet.update`` bypass this, so
+bulk writers call ``locate()`` themselves or run ``geocode_locations``.
+"""
+from django.apps import apps
+from django.db.models.signals import post_init, pre_save
+from django.dispatch import Signal
+
+from .gazetteer import geocode
+from .geohash import encode
+
+GEOCODED_MODELS = []
+
+# Sent with the model class after coordinates were written in bulk
+coordinates_changed = Signal()
+
+
+def geocoded_models():
+    return [model for model in apps.get_models() if getattr(model, 'geocode_field', None)]
+
+
+def connect_geocoded_models():
+    GEOCODED_MODELS[:] = geocoded_models()
+    for model in GEOCODED_MODELS:
+        post_init.connect(remember_location, sender=model, dispatch_uid=f'geo_init_{model._meta.label}')
+        pre_save.connect(update_coordinates, sender=model, dispatch_uid=f'geo_save_{model._meta.label}')
+
+
+def locate(instance):
+    """Set the instance's coordinates from its location text"""
+    place = geocode(getattr(instance, instance.geocode_field))
+    if place is None:
+        instance.latitude = instance.longitude = None
+        instance.geohash = ''
+    else:
+        instance.latitude = place.latitude
+        instance.longitude = place.longitude
+        instance.geohash = encode(place.latitude, place.longitude)
+    return place
+
+
+def remember_location(sender, instance, **kwargs):
+    instance._geocoded_text = instance.__dict__.get(sender.geocode_field)
+
+
+def update_coordinates(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and sender.geocode_field not in update_fields):
+        return
+    text = getattr(instance, sender.geocode_field)
+    adding = instance._state.adding
+    given = instance.latitude is not None and instance.longitude is not None
+    if (adding and not given) or (not adding and text != getattr(instance, '_geocoded_text', None)):
+        locate(instance)
+    elif given:
+        # Keep the cell in step with coordinates set by hand
+        instance.geohash = encode(instance.latitude, instance.longitude)
+    else:
+        instance.geohash = ''
+    instance._geocoded_text = text
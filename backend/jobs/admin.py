@@ -1,16 +1,26 @@
 from django.contrib import admin
-from .models import Job, JobApplication
+from django.utils import timezone
+from . import alerts
+from .cache import job_response_cache, JOB_TABLE
+from .models import Job, JobApplication, SavedSearch
+from .search import application_index
 
 
 # Basic admin actions
+# queryset.update() skips auto_now and save signals, so updated_at and the
+# response cache generation are maintained explicitly
 @admin.action(description="Mark selected jobs as inactive")
 def make_inactive(modeladmin, request, queryset):
-    queryset.update(is_active=False)
+    queryset.update(is_active=False, updated_at=timezone.now())
+    job_response_cache.bump_on_commit(JOB_TABLE)
 
 
 @admin.action(description="Mark selected jobs as active")
 def make_active(modeladmin, request, queryset):
-    queryset.update(is_active=True)
+    reactivated = list(queryset.filter(is_active=False).values_list('pk', flat=True))
+    queryset.update(is_active=True, updated_at=timezone.now())
+    job_response_cache.bump_on_commit(JOB_TABLE)
+    alerts.percolate_on_commit(reactivated)
 
 
 # Register Job model
@@ -22,11 +32,12 @@ class JobAdmin(admin.ModelAdmin):
         "location",
         "job_type",
         "is_active",
+        "applications_count",
         "created_at",
     )
-    list_filter = ("is_active", "job_type", "company", "location", "created_at")
+    list_filter = ("is_active", "job_type", "company", "location", "source", "created_at")
     search_fields = ("title", "company", "description", "location")
-    readonly_fields = ("created_by", "created_at", "updated_at")
+    readonly_fields = ("created_by", "created_at", "updated_at", "source", "external_id", "geohash")
 
     fieldsets = (
         (
@@ -37,7 +48,9 @@ class JobAdmin(admin.ModelAdmin):
             "Job Information",
             {"fields": ("location", "job_type", "salary", "application_deadline")},
         ),
+        ("Coordinates", {"fields": ("latitude", "longitude", "geohash"), "classes": ("collapse",)}),
         ("Status", {"fields": ("is_active", "created_by", "created_at", "updated_at")}),
+        ("Import", {"fields": ("source", "external_id"), "classes": ("collapse",)}),
     )
 
     actions = [make_active, make_inactive]
@@ -55,10 +68,9 @@ class JobApplicationAdmin(admin.ModelAdmin):
     list_filter = ('status', 'applied_at', 'job__job_type')
     search_fields = (
         'applicant__email',
-        'applicant__first_name',
-        'applicant__last_name',
+        'applicant__job_seeker_profile__first_name',
+        'applicant__job_seeker_profile__last_name',
         'job__title',
-        'cover_letter'
     )
 
     fieldsets = (
@@ -70,6 +82,14 @@ class JobApplicationAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # Resume, document and cover letter text come from the full-text index
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term.strip():
+            matches = application_index.search(JobApplication.objects.all(), search_term)
+            results |= queryset.filter(pk__in=matches.values('pk'))
+        return results, may_have_duplicates
+
     def get_readonly_fields(self, request, obj=None):
         if obj:  # editing existing object
             return ('applicant', 'job', 'applied_at', 'resume')
@@ -82,3 +102,13 @@ class JobApplicationAdmin(admin.ModelAdmin):
     def job_title(self, obj):
         return obj.job.title
     job_title.short_description = 'Job'
+
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user', 'keywords', 'location', 'job_types', 'is_active', 'last_notified_at')
+    list_filter = ('is_active', 'created_at')
+    search_fields = ('name', 'keywords', 'location', 'user__email')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    readonly_fields = ('created_at', 'updated_at', 'last_notified_at')
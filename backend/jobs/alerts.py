@@ -0,0 +1,207 @@
+"""
+Saved-search alerts.
+
+Rather than running every saved search against the job table whenever a job
+is posted, each search is filed in a reverse index (``SavedSearchTerm``)
+under the terms of one criterion that every matching job must contain: its
+longest keyword, else its longest location word, else each of its job types;
+searches with no criteria are filed under ``any``. A new or reactivated job
+looks up the searches filed under its own words, job type and ``any`` with
+indexed queries, and only those candidates are checked against all of
+their criteria. The cost per posting grows with the number of plausible
+searches, not with the number of searches.
+
+Matches are recorded as ``SavedSearchMatch`` rows and sent as one digest
+email per user by ``send_digests`` (see the ``send_search_digests`` command
+and the scheduler), at most once per ``DIGEST_INTERVAL`` for each search.
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job, SavedSearch, SavedSearchMatch, SavedSearchTerm
+from .search import tokenize_query
+
+KEYWORD_FIELDS = ('title', 'company', 'requirements', 'description')
+MAX_TERM_LENGTH = 100
+# Terms or searches looked up per query; stays under SQLite's bound parameter limit
+TERM_CHUNK_SIZE = 500
+DIGEST_INTERVAL = timedelta(days=1)
+DIGEST_JOBS_PER_SEARCH = 10
+
+
+def _words(text):
+    return {word for word in tokenize_query(text or '') if len(word) <= MAX_TERM_LENGTH}
+
+
+def _longest(words):
+    # Longer words are rarer, so fewer jobs wake the search up
+    return max(sorted(words), key=len)
+
+
+def index_terms(search):
+    """``(kind, term)`` pairs a search is filed under"""
+    keywords = _words(search.keywords)
+    if keywords:
+        return [(SavedSearchTerm.KEYWORD, _longest(keywords))]
+    location = _words(search.location)
+    if location:
+        return [(SavedSearchTerm.LOCATION, _longest(location))]
+    if search.job_type_list:
+        return [(SavedSearchTerm.JOB_TYPE, job_type) for job_type in search.job_type_list]
+    return [(SavedSearchTerm.ANY, '')]
+
+
+def reindex_search(search):
+    """Refile ``search`` in the reverse index; inactive searches are removed"""
+    SavedSearchTerm.objects.filter(search=search).delete()
+    if search.is_active:
+        SavedSearchTerm.objects.bulk_create(
+            SavedSearchTerm(search=search, kind=kind, term=term) for kind, term in index_terms(search)
+        )
+
+
+class JobTerms:
+    """The words of one job, as the reverse index and the criteria see them"""
+
+    def __init__(self, job):
+        self.job = job
+        self.keywords = set()
+        for field in KEYWORD_FIELDS:
+            self.keywords |= _words(getattr(job, field))
+        self.location = _words(job.location)
+
+    def lookup(self):
+        yield SavedSearchTerm.ANY, ''
+        yield SavedSearchTerm.JOB_TYPE, self.job.job_type
+        for word in self.keywords:
+            yield SavedSearchTerm.KEYWORD, word
+        for word in self.location:
+            yield SavedSearchTerm.LOCATION, word
+
+    def matches(self, search):
+        job = self.job
+        if not search.is_active:
+            return False
+        if not _words(search.keywords) <= self.keywords:
+            return False
+        if not _words(search.location) <= self.location:
+            return False
+        if search.job_type_list and job.job_type not in search.job_type_list:
+            return False
+        if search.min_salary is not None and (job.salary is None or job.salary < search.min_salary):
+            return False
+        return True
+
+
+def _candidates(terms_by_job):
+    """``{search_id: {job_id}}`` for searches filed under any of the jobs' terms"""
+    jobs_by_term = defaultdict(set)
+    for job_id, terms in terms_by_job.items():
+        for key in terms.lookup():
+            jobs_by_term[key].add(job_id)
+
+    keys = list(jobs_by_term)
+    candidates = defaultdict(set)
+    for start in range(0, len(keys), TERM_CHUNK_SIZE):
+        by_kind = defaultdict(list)
+        for kind, term in keys[start:start + TERM_CHUNK_SIZE]:
+            by_kind[kind].append(term)
+        condition = Q()
+        for kind, terms in by_kind.items():
+            condition |= Q(kind=kind, term__in=terms)
+        rows = SavedSearchTerm.objects.filter(condition).values_list('search_id', 'kind', 'term')
+        for search_id, kind, term in rows:
+            candidates[search_id] |= jobs_by_term[kind, term]
+    return candidates
+
+
+def percolate(jobs):
+    """Record a match for every active saved search each of ``jobs`` satisfies"""
+    terms_by_job = {job.pk: JobTerms(job) for job in jobs if job.is_active}
+    if not terms_by_job:
+        return 0
+    candidates = _candidates(terms_by_job)
+    search_ids = list(candidates)
+    found = []
+    for start in range(0, len(search_ids), TERM_CHUNK_SIZE):
+        searches = SavedSearch.objects.filter(
+            pk__in=search_ids[start:start + TERM_CHUNK_SIZE], is_active=True
+        )
+        found.extend(
+            SavedSearchMatch(search=search, job_id=job_id)
+            for search in searches
+            for job_id in candidates[search.pk]
+            if terms_by_job[job_id].matches(search)
+        )
+    SavedSearchMatch.objects.bulk_create(found, batch_size=1000, ignore_conflicts=True)
+    return len(found)
+
+
+def percolate_on_commit(job_ids):
+    """Match the jobs once the transaction that posted or reactivated them commits"""
+    job_ids = list(job_ids)
+    if job_ids:
+        transaction.on_commit(lambda: percolate(Job.objects.filter(pk__in=job_ids)))
+
+
+# Digests
+
+def _digest(user, searches):
+    lines = []
+    total = 0
+    for search, jobs in searches:
+        total += len(jobs)
+        lines.append(f'{search.name}:')
+        for job in jobs[:DIGEST_JOBS_PER_SEARCH]:
+            lines.append(f'  - {job.title}, {job.company} ({job.location})')
+        if len(jobs) > DIGEST_JOBS_PER_SEARCH:
+            lines.append(f'  ... and {len(jobs) - DIGEST_JOBS_PER_SEARCH} more')
+        lines.append('')
+    return EmailMessage(
+        subject=f"{total} new job {'match' if total == 1 else 'matches'} for your saved searches",
+        body='\n'.join(lines),
+        to=[user.email],
+    )
+
+
+def send_digests(interval=DIGEST_INTERVAL, now=None):
+    """
+    Email each user the jobs matched for their searches since the last
+    digest. Returns ``{'users', 'matches', 'seconds'}``.
+    """
+    started = time.perf_counter()
+    now = now or timezone.now()
+    pending = (
+        SavedSearchMatch.objects.filter(notified_at__isnull=True)
+        .filter(Q(search__last_notified_at__isnull=True) | Q(search__last_notified_at__lte=now - interval))
+        .select_related('search__user', 'job')
+        .order_by('search__user_id', 'search_id', '-job__created_at')
+    )
+    by_user = defaultdict(lambda: defaultdict(list))
+    match_ids, search_ids = [], set()
+    for match in pending.iterator(chunk_size=1000):
+        match_ids.append(match.pk)
+        search_ids.add(match.search_id)
+        # Jobs closed since they matched are dropped from the digest
+        if match.job.is_active and match.search.user.is_active:
+            by_user[match.search.user][match.search].append(match.job)
+
+    messages = [_digest(user, list(searches.items())) for user, searches in by_user.items()]
+    if messages:
+        with get_connection() as connection:
+            connection.send_messages(messages)
+    with transaction.atomic():
+        for start in range(0, len(match_ids), 1000):
+            SavedSearchMatch.objects.filter(pk__in=match_ids[start:start + 1000]).update(notified_at=now)
+        SavedSearch.objects.filter(pk__in=search_ids).update(last_notified_at=now)
+    return {
+        'users': len(messages),
+        'matches': sum(len(jobs) for searches in by_user.values() for jobs in searches.values()),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,139 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+JOB_TABLE = 'jobs_job'
+APPLICATION_TABLE = 'jobs_jobapplication'
+
+
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters for one process"""
+
+    FIELDS = ('hits', 'misses', 'sets', 'evictions', 'invalidations')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def record(self, field, amount=1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_ratio'] = round(counts['hits'] / lookups, 4) if lookups else None
+        return counts
+
+
+stats = CacheStats()
+
+
+class CountingLocMemCache(LocMemCache):
+    """LocMemCache that reports entries dropped by culling as evictions"""
+
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        stats.record('evictions', before - len(self._cache))
+
+
+class ResponseCache:
+    """
+    Cache of serialized API responses, namespaced by table generations.
+
+    Every key embeds the current generation of the tables a response was
+    built from. Writes bump the generation instead of deleting keys, so all
+    stale entries become unreachable at once and age out of the backend.
+    Generations live in the same cache backend as the responses, so with a
+    shared backend (Redis, Memcached, database) invalidation is visible to
+    every worker; the default local-memory backend is per process and relies
+    on its TIMEOUT to bound staleness across workers.
+    """
+
+    def __init__(self, alias_setting, tables):
+        self.alias_setting = alias_setting
+        self.tables = tables
+
+    @property
+    def alias(self):
+        return getattr(settings, self.alias_setting, None)
+
+    @property
+    def enabled(self):
+        return bool(self.alias)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _generation_key(self, table):
+        return f'generation:{table}'
+
+    def generations(self):
+        keys = [self._generation_key(table) for table in self.tables]
+        found = self.cache.get_many(keys)
+        missing = {key: time.time_ns() for key in keys if key not in found}
+        if missing:
+            # A lost counter restarts from the clock so it never reuses an old value
+            for key, value in missing.items():
+                if not self.cache.add(key, value, timeout=None):
+                    missing[key] = self.cache.get(key, value)
+            found.update(missing)
+        return [found[key] for key in keys]
+
+    def make_key(self, namespace, *parts):
+        digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+        generations = '.'.join(str(generation) for generation in self.generations())
+        return f'{namespace}:{generations}:{digest}'
+
+    def get(self, key):
+        data = self.cache.get(key)
+        stats.record('misses' if data is None else 'hits')
+        return data
+
+    def set(self, key, data):
+        self.cache.set(key, data)
+        stats.record('sets')
+
+    def bump(self, *tables):
+        """Invalidate every cached response built from ``tables``"""
+        if not self.enabled:
+            return
+        for table in tables:
+            key = self._generation_key(table)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, time.time_ns(), timeout=None)
+        stats.record('invalidations')
+
+    def bump_on_commit(self, *tables):
+        # Bumping before commit would let a concurrent read re-cache old rows
+        transaction.on_commit(lambda: self.bump(*tables))
+
+
+job_response_cache = ResponseCache('JOB_RESPONSE_CACHE', (JOB_TABLE, APPLICATION_TABLE))
+
+
+def cache_stats():
+    backend = job_response_cache.cache if job_response_cache.enabled else None
+    snapshot = stats.snapshot()
+    if not isinstance(backend, CountingLocMemCache):
+        # Other backends evict on their own; see their native statistics
+        snapshot['evictions'] = None
+    return {
+        'enabled': job_response_cache.enabled,
+        'backend': f'{type(backend).__module__}.{type(backend).__name__}' if backend else None,
+        **snapshot,
+    }
@@ -0,0 +1,108 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .cache import job_response_cache, APPLICATION_TABLE
+from .models import Job, JobApplication
+
+STATUS_COUNTER_FIELDS = {
+    status: f'{status}_count' for status, _ in JobApplication.APPLICATION_STATUS
+}
+COUNTER_FIELDS = list(Job.COUNTER_FIELDS)
+
+
+def apply_counter_deltas(deltas):
+    """
+    Apply ``{job_id: {counter_field: delta}}`` with one atomic UPDATE per job.
+    """
+    for job_id, fields in deltas.items():
+        changes = {
+            field: F(field) + delta
+            for field, delta in fields.items()
+            if delta
+        }
+        if changes:
+            Job.objects.filter(pk=job_id).update(**changes)
+
+
+def application_added(job_id, status):
+    apply_counter_deltas({
+        job_id: {'applications_count': 1, STATUS_COUNTER_FIELDS[status]: 1},
+    })
+
+
+def application_removed(job_id, status):
+    apply_counter_deltas({
+        job_id: {'applications_count': -1, STATUS_COUNTER_FIELDS[status]: -1},
+    })
+
+
+def status_changed(job_id, old_status, new_status):
+    if old_status == new_status:
+        return
+    apply_counter_deltas({
+        job_id: {
+            STATUS_COUNTER_FIELDS[old_status]: -1,
+            STATUS_COUNTER_FIELDS[new_status]: 1,
+        },
+    })
+
+
+def _counts(applications):
+    """``{job_id: {counter_field: value}}`` from one GROUP BY over ``applications``"""
+    actual = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    grouped = (
+        applications.order_by()
+        .values_list('job_id', 'status')
+        .annotate(total=Count('id'))
+    )
+    for job_id, status, total in grouped:
+        counters = actual[job_id]
+        counters['applications_count'] += total
+        if status in STATUS_COUNTER_FIELDS:
+            counters[STATUS_COUNTER_FIELDS[status]] += total
+    return actual
+
+
+def _drifted(jobs, actual):
+    """Jobs whose stored counters differ from ``actual``, with the right values"""
+    return [
+        Job(pk=row['pk'], **actual[row['pk']])
+        for row in jobs.order_by('pk').values('pk', *COUNTER_FIELDS).iterator()
+        if any(row[field] != actual[row['pk']][field] for field in COUNTER_FIELDS)
+    ]
+
+
+def reconcile_counters(job_ids=None, batch_size=500):
+    """
+    Recompute stored counters from the applications table in a single
+    GROUP BY pass and write back only the jobs that drifted.
+
+    That pass takes no locks, so the jobs it finds are counted again under
+    ``select_for_update`` before anything is written: an application added
+    meanwhile either committed its F() increment first (and is in the new
+    count) or waits for the lock (and increments the corrected value).
+
+    Returns the number of jobs whose counters were corrected.
+    """
+    applications = JobApplication.objects.all()
+    jobs = Job.objects.all()
+    if job_ids is not None:
+        applications = applications.filter(job_id__in=job_ids)
+        jobs = jobs.filter(pk__in=job_ids)
+    candidates = [job.pk for job in _drifted(jobs, _counts(applications))]
+
+    corrected = 0
+    for start in range(0, len(candidates), batch_size):
+        chunk = candidates[start:start + batch_size]
+        with transaction.atomic():
+            locked = Job.objects.select_for_update().filter(pk__in=chunk)
+            # Locked before the applications are counted again
+            list(locked.order_by('pk').values_list('pk', flat=True))
+            stale = _drifted(locked, _counts(JobApplication.objects.filter(job_id__in=chunk)))
+            Job.objects.bulk_update(stale, COUNTER_FIELDS)
+            if stale:
+                job_response_cache.bump_on_commit(APPLICATION_TABLE)
+        corrected += len(stale)
+    return corrected
@@ -0,0 +1,103 @@
+from django.db.models import Count, Q
+
+from .filters import (
+    SALARY_RANGES, FACETS, deadline_soon_q, facet_filters, filter_jobs_base, salary_range_q
+)
+from .models import Job
+
+TOP_VALUES = 20
+
+
+def _others(filters, facet):
+    """AND of every active facet filter except ``facet`` (disjunctive counting)"""
+    condition = Q()
+    for name, facet_condition in filters.items():
+        if name != facet:
+            condition &= facet_condition
+    return condition
+
+
+def _grouped_counts(queryset, field, condition, selected, limit):
+    rows = (
+        queryset.filter(condition)
+        .order_by()
+        .values_list(field)
+        .annotate(count=Count('id'))
+        .order_by('-count', field)[:limit]
+    )
+    values = [
+        {'value': value, 'count': count, 'selected': value in selected}
+        for value, count in rows
+    ]
+    # Keep selected values visible even when they fall outside the top N
+    listed = {item['value'] for item in values}
+    values += [
+        {'value': value, 'count': 0, 'selected': True}
+        for value in selected if value not in listed
+    ]
+    return values
+
+
+def compute_facets(queryset, params, limit=TOP_VALUES):
+    """
+    Count jobs per facet value for the current filter set.
+
+    Each facet is counted with its own selection left out, so the counts
+    show what choosing another value would yield. The fixed-vocabulary
+    facets (job type, salary range, deadline) come from one conditional
+    aggregate; location and company take one GROUP BY each, for three
+    queries in total regardless of how many values exist.
+    """
+    queryset = filter_jobs_base(queryset, params)
+    filters = facet_filters(params)
+
+    selected = {
+        name: [value.strip() for value in params.get(name, '').split(',') if value.strip()]
+        for name in FACETS
+    }
+
+    aggregates = {'total': Count('id', filter=_others(filters, None))}
+    for value, _ in Job.JOB_TYPES:
+        aggregates[f'job_type:{value}'] = Count(
+            'id', filter=Q(job_type=value) & _others(filters, 'job_type')
+        )
+    for key, _, _, _ in SALARY_RANGES:
+        aggregates[f'salary_range:{key}'] = Count(
+            'id', filter=salary_range_q(key) & _others(filters, 'salary_range')
+        )
+    aggregates['deadline_soon'] = Count(
+        'id', filter=deadline_soon_q() & _others(filters, 'deadline_soon')
+    )
+    counts = queryset.order_by().aggregate(**aggregates)
+
+    return {
+        'total': counts['total'],
+        'job_type': [
+            {
+                'value': value,
+                'label': label,
+                'count': counts[f'job_type:{value}'],
+                'selected': value in selected['job_type'],
+            }
+            for value, label in Job.JOB_TYPES
+        ],
+        'salary_range': [
+            {
+                'value': key,
+                'label': label,
+                'count': counts[f'salary_range:{key}'],
+                'selected': key in selected['salary_range'],
+            }
+            for key, label, _, _ in SALARY_RANGES
+        ],
+        'deadline_soon': {
+            'count': counts['deadline_soon'],
+            'selected': 'deadline_soon' in filters,
+        },
+        'location': _grouped_counts(
+            queryset, 'location', _others(filters, 'location'), selected['location'], limit
+        ),
+        'company': _grouped_counts(
+            queryset, 'company', _others(filters, 'company'), selected['company'], limit
+        ),
+    }
@@ -0,0 +1,107 @@
+"""
+Job feeds for aggregators.
+
+``/api/jobs/feed.jsonl`` and ``/api/jobs/feed.xml`` list every active job.
+Rows are read as ``values()`` dicts through ``iterator()`` (a server-side
+cursor on PostgreSQL, chunked fetches on SQLite) and written out a chunk at
+a time, so memory stays flat however large the catalogue is and no model
+instances, serializers or per-row queries are involved.
+
+A crawler that sends ``If-Modified-Since`` (the ``Last-Modified`` of its
+previous fetch) gets an incremental feed instead: every job changed after
+that time, including jobs closed since, marked ``"is_active": false``, so
+it can drop them. Deleted jobs are not reported. Nothing changed means 304.
+
+HTTP dates are whole seconds, while ``updated_at`` is not. ``Last-Modified``
+is therefore the last whole second whose changes the response holds all of:
+while the second of the latest change is still going on, a change later in
+it could be missed, so the second before it is sent and the crawler gets
+that second's jobs again next time.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Job
+
+FEED_FIELDS = (
+    'id', 'title', 'company', 'location', 'latitude', 'longitude', 'job_type', 'salary',
+    'description', 'requirements', 'application_deadline', 'is_active', 'created_at', 'updated_at',
+)
+FEED_CHUNK_SIZE = 2000
+
+# Characters XML 1.0 does not allow, even escaped
+XML_INVALID_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def last_modified(now=None):
+    """``Last-Modified`` (epoch seconds) for a feed built now; None without jobs"""
+    latest = Job.objects.aggregate(last_modified=Max('updated_at'))['last_modified']
+    if latest is None:
+        return None
+    second = int(latest.timestamp())
+    # Changes may still come within the current second
+    if second >= int((now or timezone.now()).timestamp()):
+        second -= 1
+    return second
+
+
+def feed_rows(since=None, chunk_size=FEED_CHUNK_SIZE):
+    """
+    Active jobs by id, or every job changed after the whole second ``since``
+    (epoch seconds) in change order
+    """
+    if since is None:
+        jobs = Job.objects.filter(is_active=True).order_by('pk')
+    else:
+        start = datetime.fromtimestamp(since + 1, tz=dt_timezone.utc)
+        jobs = Job.objects.filter(updated_at__gte=start).order_by('updated_at', 'pk')
+    return jobs.values(*FEED_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def _chunked(lines, chunk_size):
+    # Joining rows keeps writes (and gzip blocks) large
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def jsonl_lines(rows, chunk_size=FEED_CHUNK_SIZE):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    return _chunked((encoder.encode(row) + '\n' for row in rows), chunk_size)
+
+
+def _xml_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return escape(XML_INVALID_RE.sub('', str(value)))
+
+
+def _xml_job(row):
+    fields = ''.join(f'<{name}>{_xml_value(value)}</{name}>' for name, value in row.items())
+    return f'<job>{fields}</job>\n'
+
+
+def xml_lines(rows, chunk_size=FEED_CHUNK_SIZE):
+    yield '<?xml version="1.0" encoding="utf-8"?>\n<jobs>\n'
+    yield from _chunked((_xml_job(row) for row in rows), chunk_size)
+    yield '</jobs>\n'
+
+
+FORMATS = {
+    'jsonl': ('application/x-ndjson; charset=utf-8', jsonl_lines),
+    'xml': ('application/xml; charset=utf-8', xml_lines),
+}
@@ -0,0 +1,161 @@
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from geo.query import filter_near
+
+from .models import Job
+from .search import application_index, job_index
+
+# (key, label, lower bound inclusive, upper bound exclusive)
+SALARY_RANGES = (
+    ('under_30k', 'Under 30k', None, Decimal('30000')),
+    ('30k_60k', '30k - 60k', Decimal('30000'), Decimal('60000')),
+    ('60k_100k', '60k - 100k', Decimal('60000'), Decimal('100000')),
+    ('100k_plus', '100k+', Decimal('100000'), None),
+)
+
+DEADLINE_SOON_DAYS = 7
+
+FACETS = ('job_type', 'location', 'company', 'salary_range', 'deadline_soon')
+
+
+def _parse_list(params, name, choices=None):
+    values = [value.strip() for value in params.get(name, '').split(',') if value.strip()]
+    if choices is not None:
+        invalid = [value for value in values if value not in choices]
+        if invalid:
+            raise ValidationError({name: f"Invalid choice(s): {', '.join(invalid)}"})
+    return values
+
+
+def _parse_bool(params, name):
+    value = params.get(name, '').lower()
+    if value in ('', 'all'):
+        return None
+    if value in ('true', '1'):
+        return True
+    if value in ('false', '0'):
+        return False
+    raise ValidationError({name: "Expected 'true' or 'false'."})
+
+
+def _parse_decimal(params, name):
+    value = params.get(name, '')
+    if not value:
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValidationError({name: 'Expected a number.'})
+
+
+def salary_range_q(key):
+    for range_key, _, lower, upper in SALARY_RANGES:
+        if range_key == key:
+            condition = Q(salary__isnull=False)
+            if lower is not None:
+                condition &= Q(salary__gte=lower)
+            if upper is not None:
+                condition &= Q(salary__lt=upper)
+            return condition
+    raise KeyError(key)
+
+
+def deadline_soon_q():
+    today = timezone.localdate()
+    return Q(
+        application_deadline__gte=today,
+        application_deadline__lte=today + timedelta(days=DEADLINE_SOON_DAYS),
+    )
+
+
+def facet_filters(params):
+    """
+    Map each facet with an active selection to its filter condition.
+
+    Values selected within one facet are OR-ed; the facets themselves are
+    AND-ed together by the caller.
+    """
+    filters = {}
+
+    job_types = _parse_list(params, 'job_type', dict(Job.JOB_TYPES))
+    if job_types:
+        filters['job_type'] = Q(job_type__in=job_types)
+
+    locations = _parse_list(params, 'location')
+    if locations:
+        filters['location'] = Q(location__in=locations)
+
+    companies = _parse_list(params, 'company')
+    if companies:
+        filters['company'] = Q(company__in=companies)
+
+    ranges = _parse_list(params, 'salary_range', [key for key, _, _, _ in SALARY_RANGES])
+    if ranges:
+        condition = Q()
+        for key in ranges:
+            condition |= salary_range_q(key)
+        filters['salary_range'] = condition
+
+    if _parse_bool(params, 'deadline_soon'):
+        filters['deadline_soon'] = deadline_soon_q()
+
+    return filters
+
+
+def filter_jobs_base(queryset, params):
+    """
+    Apply the non-facet filters: ``q`` (full-text search, results ordered by
+    relevance), ``near`` and ``radius_km`` (jobs within the radius, nearest
+    first unless ``q`` is given), ``is_active``, ``min_salary`` and
+    ``max_salary``.
+    """
+    is_active = _parse_bool(params, 'is_active')
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+
+    min_salary = _parse_decimal(params, 'min_salary')
+    if min_salary is not None:
+        queryset = queryset.filter(salary__gte=min_salary)
+
+    max_salary = _parse_decimal(params, 'max_salary')
+    if max_salary is not None:
+        queryset = queryset.filter(salary__lte=max_salary)
+
+    queryset = filter_near(queryset, params)
+
+    query = params.get('q', '').strip()
+    if query:
+        queryset = job_index.search(queryset, query).order_by('-search_rank', '-created_at')
+
+    return queryset
+
+
+def filter_jobs(queryset, params):
+    """
+    Apply the job board filters from query parameters.
+
+    On top of the base filters, ``job_type``, ``location``, ``company`` and
+    ``salary_range`` take comma separated values and ``deadline_soon=true``
+    keeps jobs closing within the next week.
+    """
+    queryset = filter_jobs_base(queryset, params)
+    for condition in facet_filters(params).values():
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def filter_applications(queryset, params):
+    """
+    ``resume_q`` searches the text of each application's resume, the
+    applicant's profile documents and the cover letter; results are
+    ordered by relevance.
+    """
+    query = params.get('resume_q', '').strip()
+    if query:
+        queryset = application_index.search(queryset, query).order_by('-search_rank', '-applied_at')
+    return queryset
@@ -0,0 +1,225 @@
+"""
+Bulk job import from partner CSV / NDJSON feeds.
+
+Files are parsed as a stream, a row at a time, and validated with plain
+field checks instead of a per-row ``JobSerializer``. Valid rows are written
+with ``bulk_create`` in batches, each in its own transaction; rows carrying
+an ``external_id`` are upserted on ``(source, external_id)`` so re-sending a
+feed updates the jobs it created earlier. ``bulk_create`` skips model
+signals, so each batch geocodes and re-indexes its jobs for full-text
+search, matches new jobs against saved searches and invalidates cached job
+responses itself; the matching engine and the precomputed match tables
+pick the rows up through ``updated_at``.
+"""
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+
+# ImportFormatError and detect_format are re-exported for the view and command
+from arnica_connect.imports import ImportFormatError, detect_format, read_rows
+from geo.signals import locate
+
+from . import alerts
+from .cache import job_response_cache, JOB_TABLE
+from .models import Job
+from .search import job_index, job_index_values
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 5000
+DEFAULT_MAX_ERRORS = 1000
+
+REQUIRED_FIELDS = ('title', 'description', 'requirements', 'location', 'job_type', 'company')
+# Overwritten when an imported row matches an existing job
+UPDATE_FIELDS = (
+    'title', 'description', 'requirements', 'location', 'job_type', 'salary',
+    'company', 'is_active', 'application_deadline', 'latitude', 'longitude', 'geohash',
+    'updated_at',
+)
+
+MAX_SALARY = Decimal('100000000')  # DecimalField(max_digits=10, decimal_places=2)
+TRUE_VALUES = ('true', '1', 'yes', 'y')
+FALSE_VALUES = ('false', '0', 'no', 'n')
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _max_length(name):
+    return Job._meta.get_field(name).max_length
+
+
+def _job_type(value):
+    value = _text(value).lower().replace(' ', '_').replace('-', '_')
+    return value if value in dict(Job.JOB_TYPES) else None
+
+
+def clean_row(raw):
+    """Validate one raw row; returns ``(field values, errors)``"""
+    values, errors = {}, {}
+
+    for name in REQUIRED_FIELDS:
+        value = _text(raw.get(name))
+        if not value:
+            errors[name] = 'This field is required.'
+        elif _max_length(name) and len(value) > _max_length(name):
+            errors[name] = f'Ensure this field has no more than {_max_length(name)} characters.'
+        values[name] = value
+
+    if values['job_type']:
+        job_type = _job_type(values['job_type'])
+        if job_type is None:
+            errors['job_type'] = f"'{values['job_type']}' is not a valid job type."
+        values['job_type'] = job_type
+
+    external_id = _text(raw.get('external_id'))
+    if len(external_id) > _max_length('external_id'):
+        errors['external_id'] = 'Ensure this field has no more than 100 characters.'
+    values['external_id'] = external_id or None
+
+    salary = _text(raw.get('salary'))
+    values['salary'] = None
+    if salary:
+        try:
+            values['salary'] = Decimal(salary.replace(',', '')).quantize(Decimal('0.01'))
+            if not Decimal(0) <= values['salary'] < MAX_SALARY:
+                errors['salary'] = 'Salary is out of range.'
+        except InvalidOperation:
+            errors['salary'] = 'A valid number is required.'
+
+    is_active = raw.get('is_active')
+    if isinstance(is_active, bool):
+        values['is_active'] = is_active
+    else:
+        is_active = _text(is_active).lower()
+        values['is_active'] = is_active not in FALSE_VALUES
+        if is_active and is_active not in TRUE_VALUES + FALSE_VALUES:
+            errors['is_active'] = 'Must be a valid boolean.'
+
+    deadline = _text(raw.get('application_deadline'))
+    values['application_deadline'] = None
+    if deadline:
+        try:
+            values['application_deadline'] = date.fromisoformat(deadline)
+        except ValueError:
+            errors['application_deadline'] = 'Date has wrong format. Use YYYY-MM-DD.'
+
+    return values, errors
+
+
+class JobImporter:
+    """
+    Import parsed rows for one ``source`` on behalf of ``created_by``.
+    ``run()`` returns a report with totals and the errors of failed rows
+    (the first ``max_errors`` of them).
+    """
+
+    def __init__(self, created_by, source='', batch_size=DEFAULT_BATCH_SIZE,
+                 max_errors=DEFAULT_MAX_ERRORS):
+        self.created_by = created_by
+        self.source = source
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.max_errors = max_errors
+        self.report = {
+            'rows': 0, 'created': 0, 'updated': 0, 'failed': 0,
+            'errors': [], 'errors_truncated': False,
+        }
+        self._batch = []
+        self._keys = set()
+
+    def run(self, rows):
+        started = time.monotonic()
+        for number, raw, error in rows:
+            self.report['rows'] += 1
+            if error:
+                self._error(number, None, {'non_field_errors': error})
+                continue
+            values, errors = clean_row(raw)
+            if errors:
+                self._error(number, values.get('external_id'), errors)
+                continue
+            self._add(number, values)
+        self._flush()
+        seconds = time.monotonic() - started
+        self.report['seconds'] = round(seconds, 3)
+        self.report['rows_per_second'] = round(self.report['rows'] / seconds) if seconds else None
+        return self.report
+
+    def _error(self, number, external_id, errors):
+        self.report['failed'] += 1
+        if len(self.report['errors']) < self.max_errors:
+            self.report['errors'].append({'row': number, 'external_id': external_id, 'errors': errors})
+        else:
+            self.report['errors_truncated'] = True
+
+    def _add(self, number, values):
+        key = values['external_id']
+        if key is not None and key in self._keys:
+            # A later row for the same job: write the earlier one first so
+            # the upsert never touches one row twice in a statement
+            self._flush()
+        job = Job(created_by=self.created_by, source=self.source, **values)
+        # bulk_create skips the pre_save geocoding
+        locate(job)
+        self._batch.append((number, job))
+        if key is not None:
+            self._keys.add(key)
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        batch, self._batch, self._keys = self._batch, [], set()
+        if not batch:
+            return
+        keyed = [job for _, job in batch if job.external_id is not None]
+        plain = [job for _, job in batch if job.external_id is None]
+        try:
+            with transaction.atomic():
+                # external_id -> is_active before the upsert
+                existing = dict(
+                    Job.objects.filter(
+                        source=self.source, external_id__in=[job.external_id for job in keyed]
+                    ).values_list('external_id', 'is_active')
+                ) if keyed else {}
+                if keyed:
+                    Job.objects.bulk_create(
+                        keyed,
+                        update_conflicts=True,
+                        unique_fields=['source', 'external_id'],
+                        update_fields=UPDATE_FIELDS,
+                    )
+                    self._fill_pks(keyed)
+                if plain:
+                    Job.objects.bulk_create(plain)
+                job_index.upsert_many(
+                    (job.pk, job_index_values(job)) for _, job in batch if job.pk is not None
+                )
+                job_response_cache.bump_on_commit(JOB_TABLE)
+                # New jobs, and existing ones the feed switched back on
+                alerts.percolate_on_commit(
+                    job.pk for _, job in batch
+                    if job.pk is not None and existing.get(job.external_id, False) is False
+                )
+        except DatabaseError as exc:
+            for number, job in batch:
+                self._error(number, job.external_id, {'non_field_errors': str(exc)})
+            return
+        self.report['updated'] += len(existing)
+        self.report['created'] += len(batch) - len(existing)
+
+    def _fill_pks(self, jobs):
+        # Backends without RETURNING leave pk unset on upserted rows
+        missing = {job.external_id: job for job in jobs if job.pk is None}
+        if missing:
+            rows = Job.objects.filter(
+                source=self.source, external_id__in=list(missing)
+            ).values_list('external_id', 'pk')
+            for external_id, pk in rows:
+                missing[external_id].pk = pk
+
+
+def import_jobs(stream, fmt, created_by, source='', **options):
+    """Import a CSV or NDJSON binary stream; see ``JobImporter``"""
+    return JobImporter(created_by, source=source, **options).run(read_rows(stream, fmt))
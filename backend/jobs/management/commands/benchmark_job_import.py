@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+import random
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from arnica_connect.benchmark import Timer, isolated_database, rate
+from jobs.importer import DEFAULT_BATCH_SIZE, import_jobs
+from jobs.models import Job
+from jobs.serializers import JobSerializer
+
+User = get_user_model()
+
+COLUMNS = (
+    'external_id', 'title', 'description', 'requirements', 'location', 'job_type',
+    'salary', 'company', 'is_active', 'application_deadline',
+)
+WORDS = (
+    'dental nurse hygienist veterinary surgeon receptionist pharmacy clinic '
+    'patient care radiography scheduling records triage surgery assistant'
+).split()
+
+
+def synthetic_rows(count, seed=0):
+    rnd = random.Random(seed)
+    job_types = [value for value, _ in Job.JOB_TYPES]
+    for i in range(count):
+        yield {
+            'external_id': f'ext-{i}',
+            'title': ' '.join(rnd.sample(WORDS, 3)).title(),
+            'description': ' '.join(rnd.choices(WORDS, k=60)),
+            'requirements': f"{' '.join(rnd.choices(WORDS, k=12))} {rnd.randint(0, 8)}+ years",
+            'location': f'City {rnd.randint(1, 200)}',
+            'job_type': rnd.choice(job_types),
+            'salary': f'{rnd.randint(20, 150) * 1000}.00',
+            'company': f'Clinic {rnd.randint(1, 2000)}',
+            'is_active': 'true',
+            'application_deadline': f'2030-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}',
+        }
+
+
+def write_file(stream, fmt, count):
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        writer = csv.DictWriter(text, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(synthetic_rows(count))
+    else:
+        for row in synthetic_rows(count):
+            text.write(json.dumps(row) + '\n')
+    text.flush()
+    text.detach()
+    stream.seek(0)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure bulk job import throughput on a throwaway test database, '
+        'against creating the same rows one by one through JobSerializer'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--baseline-rows', type=int, default=1000,
+            help='Rows created through JobSerializer for comparison (0 to skip)',
+        )
+
+    def handle(self, *args, **options):
+        rows, batch_size = options['rows'], options['batch_size']
+        with isolated_database():
+            admin = User.objects.create_user(
+                email='benchmark@example.com', password=None, user_type='admin', is_staff=True
+            )
+            for fmt in ('csv', 'ndjson'):
+                with tempfile.TemporaryFile() as stream:
+                    write_file(stream, fmt, rows)
+                    # First pass inserts, the second upserts the same external ids
+                    for label in ('insert', 'upsert'):
+                        stream.seek(0)
+                        with Timer() as timer:
+                            report = import_jobs(
+                                stream, fmt, admin, source=f'bench-{fmt}', batch_size=batch_size
+                            )
+                        self.stdout.write(
+                            f"{fmt:6} {label:6} {report['rows']:>7} rows "
+                            f"({report['created']} created, {report['updated']} updated, "
+                            f"{report['failed']} failed) in {timer.seconds:.2f}s: "
+                            f"{rate(report['rows'], timer.seconds)}"
+                        )
+
+            baseline = options['baseline_rows']
+            if baseline:
+                with Timer() as timer:
+                    for row in synthetic_rows(baseline, seed=1):
+                        row.pop('external_id')
+                        serializer = JobSerializer(data=row)
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save(created_by=admin)
+                self.stdout.write(
+                    f"serializer       {baseline:>7} rows one by one in {timer.seconds:.2f}s: "
+                    f"{rate(baseline, timer.seconds)}"
+                )
@@ -0,0 +1,76 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.importer import (
+    DEFAULT_BATCH_SIZE, DEFAULT_MAX_ERRORS, ImportFormatError, detect_format, import_jobs
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Create or update jobs from a partner CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for standard input")
+        parser.add_argument(
+            '--created-by', required=True,
+            help='Email of the staff user new jobs are attributed to',
+        )
+        parser.add_argument(
+            '--source', default='',
+            help='Partner name; rows with an external_id are upserted per source',
+        )
+        parser.add_argument('--format', choices=['csv', 'ndjson', 'jsonl'], help='Default: from the file extension')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help=f'Rows written per transaction (default: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--max-errors', type=int, default=DEFAULT_MAX_ERRORS,
+            help='Row errors kept in the report',
+        )
+        parser.add_argument('--report', help='Write the full JSON report to this file')
+
+    def handle(self, *args, **options):
+        try:
+            created_by = User.objects.get(email=options['created_by'], is_staff=True)
+        except User.DoesNotExist:
+            raise CommandError(f"No staff user with email {options['created_by']}")
+
+        path = options['path']
+        try:
+            fmt = detect_format('' if path == '-' else path, options['format'])
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+
+        params = dict(
+            source=options['source'],
+            batch_size=options['batch_size'],
+            max_errors=options['max_errors'],
+        )
+        if path == '-':
+            report = import_jobs(sys.stdin.buffer, fmt, created_by, **params)
+        else:
+            try:
+                with open(path, 'rb') as stream:
+                    report = import_jobs(stream, fmt, created_by, **params)
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        if options['report']:
+            with open(options['report'], 'w') as out:
+                json.dump(report, out, indent=2, default=str)
+        for error in report['errors'][:20]:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if report['failed'] > 20:
+            self.stderr.write(f"... {report['failed'] - 20} more failed rows")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rows']} rows: {report['created']} created, {report['updated']} updated, "
+            f"{report['failed']} failed in {report['seconds']}s "
+            f"({report['rows_per_second'] or 0} rows/s)"
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs.models import JobApplication
+from jobs.search import application_index, reindex_applications
+
+
+class Command(BaseCommand):
+    help = 'Backfill the applicant search index from applications and extracted document text'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of applications indexed per query (default: 500)',
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Empty the index before backfilling',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['clear']:
+                application_index.clear()
+            indexed = reindex_applications(
+                JobApplication.objects.all(), batch_size=options['batch_size']
+            )
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} applications'))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs.models import Job
+from jobs.search import job_index
+
+
+class Command(BaseCommand):
+    help = 'Backfill the full-text job search index from the jobs table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of jobs indexed per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Empty the index before backfilling',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['clear']:
+            job_index.clear()
+
+        rows = Job.objects.order_by('pk').values_list('pk', *job_index.field_names)
+        indexed = 0
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append((row[0], dict(zip(job_index.field_names, row[1:]))))
+            if len(batch) >= batch_size:
+                indexed += self._flush(batch)
+                batch = []
+        if batch:
+            indexed += self._flush(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} jobs'))
+
+    def _flush(self, batch):
+        with transaction.atomic():
+            job_index.upsert_many(batch)
+        return len(batch)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from jobs.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized application counters stored on each job'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'job_ids', nargs='*', type=int,
+            help='Only reconcile these jobs (default: all jobs)',
+        )
+
+    def handle(self, *args, **options):
+        corrected = reconcile_counters(options['job_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Corrected counters on {corrected} jobs'))
@@ -0,0 +1,57 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Precompute the top matching job seekers for every active job and the top '
+        'jobs for every job seeker, then switch readers to the new tables. '
+        'Run it periodically (e.g. from cron); only changed rows are re-scored.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=recommendations.DEFAULT_TOP_K,
+            help='Matches stored per job and per job seeker',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Scoring processes (default: one per CPU)',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=recommendations.DEFAULT_CHUNK_SIZE,
+            help='Rows scored per task; bounds worker memory',
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Re-score everything instead of only what changed',
+        )
+        parser.add_argument(
+            '--keep', type=int, default=1,
+            help='Previous generations to keep after the switch',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('top_k', 'workers', 'chunk_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        if options['keep'] < 0:
+            raise CommandError('--keep must not be negative')
+
+        stats = recommendations.build(
+            top_k=options['top_k'],
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            full=options['full'],
+            keep=options['keep'],
+        )
+        mode = 'incremental' if stats['incremental'] else 'full'
+        self.stdout.write(self.style.SUCCESS(
+            f"Generation {stats['generation']} ({mode}): {stats['jobs']} jobs, "
+            f"{stats['seekers']} job seekers; {stats['scored']} lists scored, "
+            f"{stats['merged']} merged, {stats['copied']} copied; "
+            f"{stats['rows']} rows in {stats['seconds']}s"
+        ))
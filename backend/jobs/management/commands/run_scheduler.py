@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.scheduler import scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Run periodic maintenance (the job deadline sweep and saved-search digests). '
+        'Runs until interrupted, or runs every task once and exits with --once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run every task once and exit')
+        parser.add_argument(
+            '--task', action='append', dest='tasks', choices=sorted(scheduler.tasks),
+            help='Only run this task (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        only = options['tasks']
+        try:
+            while True:
+                for name, result in scheduler.run_pending(only=only):
+                    self.report(name, result)
+                if options['once']:
+                    break
+                time.sleep(min(scheduler.seconds_until_due(only=only), 60))
+        except KeyboardInterrupt:
+            pass
+
+    def report(self, name, result):
+        if isinstance(result, dict) and 'rows' in result:
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {result['rows']} rows in {result['batches']} batches, {result['seconds']}s"
+            ))
+        elif isinstance(result, dict) and 'users' in result:
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {result['matches']} matches to {result['users']} users, {result['seconds']}s"
+            ))
+        elif isinstance(result, int):
+            self.stdout.write(self.style.SUCCESS(f'{name}: {result} rows'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{name}: done'))
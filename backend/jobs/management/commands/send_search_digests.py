@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import alerts
+
+
+class Command(BaseCommand):
+    help = (
+        'Email each user the jobs newly matched for their saved searches. '
+        'A search is included at most once per interval; run_scheduler also '
+        'sends digests hourly.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval-hours', type=float,
+            default=alerts.DIGEST_INTERVAL.total_seconds() / 3600,
+            help='Minimum hours between digests for one search (default: 24)',
+        )
+
+    def handle(self, *args, **options):
+        if options['interval_hours'] < 0:
+            raise CommandError('--interval-hours must not be negative')
+        stats = alerts.send_digests(interval=timedelta(hours=options['interval_hours']))
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['matches']} matches sent to {stats['users']} users in {stats['seconds']}s"
+        ))
@@ -0,0 +1,417 @@
+"""
+Candidate / job matching on hashed TF-IDF term vectors.
+
+Job seekers (skills, profession, education) and active jobs (title,
+requirements, description) are turned into sparse term vectors by the
+hashing trick, so the feature space is fixed and a document can be
+vectorized on its own without a shared vocabulary. Each side lives in a
+``VectorIndex``: a compacted CSR matrix plus a small delta segment that
+takes inserts and updates, so a changed profile or job touches a single
+row instead of rebuilding the matrix. IDF weights come from document
+frequencies kept up to date alongside the rows and are applied at query
+time, which makes scores exact TF-IDF cosine similarities over the current
+corpus.
+"""
+import re
+import threading
+import time
+import zlib
+from datetime import timedelta
+
+import numpy as np
+from scipy import sparse
+
+from django.db import transaction
+from django.utils import timezone
+
+N_FEATURES = 2 ** 20
+
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*')
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have in is it its of on or our
+    that the their this to was we were will with you your years year experience
+    """.split())
+
+# (field, weight) pairs making up each side's document
+SEEKER_FIELDS = (('skills', 3.0), ('profession', 2.0), ('education', 1.0))
+JOB_FIELDS = (('title', 2.0), ('requirements', 2.0), ('description', 1.0))
+
+YEARS_RE = re.compile(r'(\d{1,2})\s*\+?\s*(?:years?|yrs?)\b', re.IGNORECASE)
+
+
+def tokenize(text):
+    tokens = TOKEN_RE.findall((text or '').lower())
+    return [token for token in tokens if token not in STOP_WORDS and len(token) > 1]
+
+
+def _feature(term):
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(term.encode()) % N_FEATURES
+
+
+def vectorize(weighted_texts):
+    """
+    Hash ``(text, weight)`` pairs into an L2-normalized sparse vector of
+    sublinear term frequencies, returned as ``(indices, values)`` arrays.
+    Adjacent word pairs are hashed too so phrases like "dental hygienist"
+    outrank documents that merely mention both words.
+    """
+    counts = {}
+    for text, weight in weighted_texts:
+        tokens = tokenize(text)
+        terms = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+        for term in terms:
+            feature = _feature(term)
+            counts[feature] = counts.get(feature, 0.0) + weight
+    if not counts:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    values = 1.0 + np.log(values, dtype=np.float32)
+    values /= np.linalg.norm(values)
+    order = np.argsort(indices)
+    return indices[order], values[order]
+
+
+def seeker_vector(profile):
+    return vectorize((getattr(profile, name, ''), weight) for name, weight in SEEKER_FIELDS)
+
+
+def job_vector(job):
+    return vectorize((getattr(job, name, ''), weight) for name, weight in JOB_FIELDS)
+
+
+def required_years(text):
+    """Largest 'N years' figure in a job's requirements, 0 if none"""
+    return max((int(match) for match in YEARS_RE.findall(text or '')), default=0)
+
+
+def experience_factor(seeker_years, job_years):
+    """Scale scores down for seekers short of a job's stated experience"""
+    if not job_years or (seeker_years or 0) >= job_years:
+        return 1.0
+    return 0.5 + 0.5 * max(seeker_years or 0, 0) / job_years
+
+
+def _csr(rows):
+    """Stack ``(indices, values)`` pairs into a CSR matrix"""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    if rows:
+        indptr[1:] = np.cumsum([len(indices) for indices, _ in rows])
+        indices = np.concatenate([indices for indices, _ in rows])
+        values = np.concatenate([values for _, values in rows])
+    else:
+        indices = np.empty(0, dtype=np.int32)
+        values = np.empty(0, dtype=np.float32)
+    return sparse.csr_matrix((values, indices, indptr), shape=(len(rows), N_FEATURES))
+
+
+class VectorIndex:
+    """
+    Row-addressable set of sparse vectors with incremental updates.
+
+    Rows live either in the compacted ``base`` matrix or in the ``delta``
+    dict. Updating a base row tombstones it and stores the new version in
+    the delta; once the delta outgrows ``compact_ratio`` of the base it is
+    merged back in one pass. ``df`` tracks per-feature document frequency
+    of live rows for IDF weighting.
+    """
+
+    def __init__(self, compact_ratio=0.1, min_delta=256):
+        self.compact_ratio = compact_ratio
+        self.min_delta = min_delta
+        self.df = np.zeros(N_FEATURES, dtype=np.int32)
+        self.meta = {}
+        self._base = _csr([])
+        self._base_ids = np.empty(0, dtype=np.int64)
+        self._alive = np.empty(0, dtype=bool)
+        self._position = {}
+        self._delta = {}
+
+    @classmethod
+    def from_rows(cls, rows, **kwargs):
+        """Build a compacted index in one pass from ``(row_id, vector, meta)`` triples"""
+        index = cls(**kwargs)
+        rows = list(rows)
+        index._base = _csr([vector for _, vector, _ in rows])
+        index._base_ids = np.fromiter((row_id for row_id, _, _ in rows), dtype=np.int64, count=len(rows))
+        index._alive = np.ones(len(rows), dtype=bool)
+        index._position = {row_id: i for i, (row_id, _, _) in enumerate(rows)}
+        index.meta = {row_id: meta for row_id, _, meta in rows}
+        np.add.at(index.df, index._base.indices, 1)
+        return index
+
+    def __len__(self):
+        return len(self.meta)
+
+    def __contains__(self, row_id):
+        return row_id in self.meta
+
+    def ids(self):
+        return set(self.meta)
+
+    def _row(self, row_id):
+        if row_id in self._delta:
+            return self._delta[row_id]
+        position = self._position.get(row_id)
+        if position is None or not self._alive[position]:
+            return None
+        start, end = self._base.indptr[position], self._base.indptr[position + 1]
+        return self._base.indices[start:end], self._base.data[start:end]
+
+    def vector(self, row_id):
+        """``(indices, values)`` of a live row, or None"""
+        return self._row(row_id)
+
+    def _drop(self, row_id):
+        row = self._row(row_id)
+        if row is None:
+            return
+        np.subtract.at(self.df, row[0], 1)
+        if self._delta.pop(row_id, None) is None:
+            self._alive[self._position[row_id]] = False
+        self.meta.pop(row_id, None)
+
+    def upsert(self, row_id, vector, meta=None):
+        self._drop(row_id)
+        self._delta[row_id] = vector
+        np.add.at(self.df, vector[0], 1)
+        self.meta[row_id] = meta
+        if len(self._delta) > max(self.min_delta, self.compact_ratio * len(self._base_ids)):
+            self.compact()
+
+    def remove(self, row_id):
+        self._drop(row_id)
+
+    def compact(self):
+        """Merge the delta segment and drop tombstoned rows"""
+        keep = np.flatnonzero(self._alive)
+        base = self._base[keep]
+        base_ids = self._base_ids[keep]
+        delta_ids = np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta))
+        if len(delta_ids):
+            base = sparse.vstack([base, _csr(list(self._delta.values()))], format='csr')
+            base_ids = np.concatenate([base_ids, delta_ids])
+        self._base = base
+        self._base_ids = base_ids
+        self._alive = np.ones(len(base_ids), dtype=bool)
+        self._position = {int(row_id): i for i, row_id in enumerate(base_ids)}
+        self._delta = {}
+
+    def segments(self):
+        """``(ids, matrix, alive mask)`` for the base and delta segments"""
+        yield self._base_ids, self._base, self._alive
+        if self._delta:
+            ids = np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta))
+            yield ids, _csr(list(self._delta.values())), np.ones(len(ids), dtype=bool)
+
+
+def idf_squared(*indexes):
+    """Smoothed IDF over the union of corpora, squared for use on both sides"""
+    n_docs = sum(len(index) for index in indexes)
+    df = sum(index.df.astype(np.float64) for index in indexes)
+    idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+    return (idf ** 2).astype(np.float32)
+
+
+def score_rows(index, queries, weights):
+    """
+    Cosine similarity between every live row of ``index`` and each row of
+    the CSR matrix ``queries`` under IDF ``weights`` (squared IDF).
+
+    Returns ``(ids, scores)`` with ``scores`` shaped (len(ids), n_queries).
+    """
+    query_norms = np.sqrt(np.asarray(queries.multiply(queries) @ weights)).ravel()
+    query_norms[query_norms == 0] = 1.0
+    weighted_queries = queries.multiply(weights).tocsr().T.tocsc()
+
+    all_ids, all_scores = [], []
+    for ids, matrix, alive in index.segments():
+        if not len(ids):
+            continue
+        row_norms = np.sqrt(np.asarray(matrix.multiply(matrix) @ weights)).ravel()
+        row_norms[row_norms == 0] = 1.0
+        scores = np.asarray((matrix @ weighted_queries).todense(), dtype=np.float32)
+        scores /= row_norms[:, None]
+        scores /= query_norms[None, :]
+        all_ids.append(ids[alive])
+        all_scores.append(scores[alive])
+    if not all_ids:
+        return np.empty(0, dtype=np.int64), np.empty((0, queries.shape[0]), dtype=np.float32)
+    return np.concatenate(all_ids), np.vstack(all_scores)
+
+
+def top_k(ids, scores, k):
+    """Best ``k`` ``(id, score)`` pairs by descending score, zeros dropped"""
+    if not len(ids):
+        return []
+    k = min(k, len(ids))
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best], kind='stable')]
+    return [(int(ids[i]), float(scores[i])) for i in best if scores[i] > 0]
+
+
+class MatchingEngine:
+    """
+    Process-local seeker and job indexes, kept current incrementally.
+
+    Saves in this process update rows directly (see ``jobs.signals``);
+    changes made by other processes are picked up by ``refresh()``, which
+    re-vectorizes only rows whose ``updated_at`` moved past the last
+    watermark and drops rows that disappeared.
+    """
+
+    refresh_interval = 5.0
+    # Re-read a short window before the watermark to catch rows committed
+    # late by long-running transactions
+    watermark_overlap = timedelta(seconds=30)
+
+    def __init__(self):
+        self.seekers = VectorIndex()
+        self.jobs = VectorIndex()
+        self._lock = threading.RLock()
+        self._seeker_mark = None
+        self._job_mark = None
+        self._refreshed_at = 0.0
+        self.loaded = False
+
+    # Row maintenance
+
+    def update_seeker(self, profile):
+        with self._lock:
+            self.seekers.upsert(
+                profile.pk, seeker_vector(profile), meta=profile.experience_years
+            )
+
+    def remove_seeker(self, profile_id):
+        with self._lock:
+            self.seekers.remove(profile_id)
+
+    def update_job(self, job):
+        with self._lock:
+            if job.is_active:
+                self.jobs.upsert(job.pk, job_vector(job), meta=required_years(job.requirements))
+            else:
+                self.jobs.remove(job.pk)
+
+    def remove_job(self, job_id):
+        with self._lock:
+            self.jobs.remove(job_id)
+
+    # Synchronisation with the database
+
+    def refresh(self, force=False):
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        from profiles.models import JobSeekerProfile
+        from .models import Job
+
+        with self._lock:
+            self._seeker_mark = self._sync(
+                self.seekers,
+                JobSeekerProfile.objects.filter(user__is_active=True),
+                self._seeker_mark,
+                self.update_seeker,
+            )
+            self._job_mark = self._sync(
+                self.jobs,
+                Job.objects.filter(is_active=True),
+                self._job_mark,
+                self.update_job,
+                changed=Job.objects.all(),
+            )
+            self._refreshed_at = time.monotonic()
+            self.loaded = True
+
+    def _sync(self, index, live, mark, update, changed=None):
+        """
+        Re-vectorize rows of ``changed`` (default: ``live``) touched since
+        ``mark``, then reconcile the index against the ids in ``live`` to
+        catch deletions and rows that became live without being edited.
+        Returns the new watermark.
+        """
+        changed = live if changed is None else changed
+        if mark is not None:
+            changed = changed.filter(updated_at__gte=mark - self.watermark_overlap)
+        newest = mark
+        for obj in changed.iterator(chunk_size=2000):
+            update(obj)
+            if newest is None or obj.updated_at > newest:
+                newest = obj.updated_at
+
+        live_ids = set(live.values_list('pk', flat=True))
+        indexed_ids = index.ids()
+        for row_id in indexed_ids - live_ids:
+            index.remove(row_id)
+        missing = live_ids - indexed_ids
+        if missing:
+            for obj in live.filter(pk__in=missing).iterator(chunk_size=2000):
+                update(obj)
+        return newest or timezone.now()
+
+    # Queries
+
+    def candidates_for_job(self, job, k=20):
+        """Top ``k`` ``(profile_id, score)`` pairs for ``job``"""
+        self.refresh()
+        indices, values = job_vector(job)
+        with self._lock:
+            weights = idf_squared(self.seekers, self.jobs)
+            ids, scores = score_rows(self.seekers, _csr([(indices, values)]), weights)
+            scores = scores[:, 0]
+            job_years = required_years(job.requirements)
+            if job_years:
+                scores *= np.array(
+                    [experience_factor(self.seekers.meta.get(int(i)), job_years) for i in ids],
+                    dtype=np.float32,
+                )
+        return top_k(ids, scores, k)
+
+    def jobs_for_seeker(self, profile, k=20):
+        """Top ``k`` ``(job_id, score)`` pairs for a seeker profile"""
+        self.refresh()
+        indices, values = seeker_vector(profile)
+        with self._lock:
+            weights = idf_squared(self.seekers, self.jobs)
+            ids, scores = score_rows(self.jobs, _csr([(indices, values)]), weights)
+            scores = scores[:, 0]
+            if len(ids):
+                scores *= np.array(
+                    [experience_factor(profile.experience_years, self.jobs.meta.get(int(i)))
+                     for i in ids],
+                    dtype=np.float32,
+                )
+        return top_k(ids, scores, k)
+
+
+engine = MatchingEngine()
+
+
+def schedule_update(kind, obj=None, pk=None):
+    """
+    Apply a seeker or job change to the engine once the surrounding
+    transaction commits; pass ``obj`` for saves and ``pk`` for deletes.
+    """
+    if not engine.loaded:
+        # Nothing to keep current; the first query builds from the database
+        return
+
+    def apply():
+        if kind == 'seeker' and obj is not None:
+            engine.update_seeker(obj)
+        elif kind == 'seeker':
+            engine.remove_seeker(pk)
+        elif obj is not None:
+            engine.update_job(obj)
+        else:
+            engine.remove_job(pk)
+    transaction.on_commit(apply)
+
+
+def clamp_k(value, default=20, maximum=100):
+    try:
+        k = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(k, maximum))
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:12
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobApplication = apps.get_model('jobs', 'JobApplication')
+
+    counts = {}
+    grouped = (
+        JobApplication.objects.order_by()
+        .values_list('job_id', 'status')
+        .annotate(total=Count('id'))
+    )
+    for job_id, status, total in grouped:
+        job_counts = counts.setdefault(job_id, {'applications_count': 0})
+        job_counts['applications_count'] += total
+        job_counts[f'{status}_count'] = job_counts.get(f'{status}_count', 0) + total
+
+    for job_id, job_counts in counts.items():
+        Job.objects.filter(pk=job_id).update(**job_counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rejected_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='reviewed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='shortlisted_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
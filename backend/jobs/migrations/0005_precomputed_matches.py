@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_pagination_indexes'),
+        ('profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('top_k', models.PositiveSmallIntegerField()),
+                ('is_current', models.BooleanField(default=False)),
+                ('job_watermark', models.DateTimeField()),
+                ('seeker_watermark', models.DateTimeField()),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('is_current',), name='single_current_match_generation')],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('job', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='jobs.job')),
+                ('seeker', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='profiles.jobseekerprofile')),
+                ('generation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.matchgeneration')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['generation', 'seeker', 'rank'], name='job_match_lookup_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CandidateMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('job', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='jobs.job')),
+                ('seeker', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='profiles.jobseekerprofile')),
+                ('generation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.matchgeneration')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['generation', 'job', 'rank'], name='candidate_match_lookup_idx')],
+            },
+        ),
+    ]
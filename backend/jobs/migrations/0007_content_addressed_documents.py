@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:30
+
+import filestore.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_job_import_source'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='resume',
+            field=models.FileField(storage=filestore.storage.ContentAddressedStorage(), upload_to='resumes/'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_jobapplication_fts USING fts5("
+            "resume, documents, cover_letter, "
+            "tokenize='porter unicode61')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS jobs_jobapplication_fts ("
+            "object_id bigint PRIMARY KEY REFERENCES jobs_jobapplication (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_jobapplication_fts_document_idx "
+            "ON jobs_jobapplication_fts USING gin (document)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS jobs_jobapplication_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_content_addressed_documents'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['resume'], name='application_resume_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_application_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['application_deadline'], name='job_active_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_job_deadline_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='job_owner_created_idx'),
+        ),
+    ]
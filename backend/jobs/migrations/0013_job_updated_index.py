@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_saved_searches'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['updated_at', 'id'], name='job_updated_idx'),
+        ),
+    ]
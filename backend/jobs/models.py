@@ -1,6 +1,10 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from filestore.storage import blob_storage
+from profiles.models import JobSeekerProfile
+
 User = get_user_model()
 
 class Job(models.Model):
@@ -24,6 +28,73 @@ class Job(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     application_deadline = models.DateField(null=True, blank=True)
+    # Partner feed a job was imported from and its id there, see jobs.importer
+    source = models.CharField(max_length=50, blank=True, default='')
+    external_id = models.CharField(max_length=100, null=True, blank=True)
+    # Looked up from location in the local gazetteer, see geo.signals
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False)
+    
+    # Denormalized application counters, maintained by jobs.counters
+    applications_count = models.PositiveIntegerField(default=0, editable=False)
+    pending_count = models.PositiveIntegerField(default=0, editable=False)
+    reviewed_count = models.PositiveIntegerField(default=0, editable=False)
+    shortlisted_count = models.PositiveIntegerField(default=0, editable=False)
+    rejected_count = models.PositiveIntegerField(default=0, editable=False)
+    accepted_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    class Meta:
+        indexes = [
+            # Keyset pagination order, see jobs.pagination
+            models.Index(fields=['-created_at', '-id'], name='job_created_id_idx'),
+            models.Index(fields=['created_by', '-created_at', '-id'], name='job_owner_created_idx'),
+            # Jobs changed since a time, for incremental feeds (jobs.feed)
+            models.Index(fields=['updated_at', 'id'], name='job_updated_idx'),
+            # Active jobs by deadline, for the expiry sweep in jobs.scheduler.
+            # Partial, so it only holds the rows the sweep can still touch
+            models.Index(
+                fields=['application_deadline'], condition=models.Q(is_active=True),
+                name='job_active_deadline_idx',
+            ),
+        ]
+        constraints = [
+            # Upsert target for imports; NULL external ids never conflict
+            models.UniqueConstraint(fields=['source', 'external_id'], name='job_source_external_id_uniq'),
+        ]
+    
+    geocode_field = 'location'
+    # Only ever changed by F() updates in jobs.counters, see save()
+    COUNTER_FIELDS = (
+        'applications_count', 'pending_count', 'reviewed_count',
+        'shortlisted_count', 'rejected_count', 'accepted_count',
+    )
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so saved-search alerts see reactivations
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Writing back the counters this instance loaded would undo
+        # increments made since, so updates leave them out
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+    
+    def accepts_applications(self, today=None):
+        """Active and not past its (inclusive) deadline; needs no query"""
+        if not self.is_active:
+            return False
+        deadline = self.application_deadline
+        return deadline is None or deadline >= (today or timezone.localdate())
     
     def __str__(self):
         return self.title
@@ -36,17 +107,188 @@ class JobApplication(models.Model):
         ('rejected', 'Rejected'),
         ('accepted', 'Accepted'),
     ]
+    # Still awaiting a decision
+    OPEN_STATUSES = ('pending', 'reviewed', 'shortlisted')
+    
+    # Statuses a bulk status change (jobs.transitions) may move an
+    # application to from each status
+    ALLOWED_STATUS_TRANSITIONS = {
+        'pending': {'reviewed', 'shortlisted', 'rejected', 'accepted'},
+        'reviewed': {'pending', 'shortlisted', 'rejected', 'accepted'},
+        'shortlisted': {'reviewed', 'rejected', 'accepted'},
+        'rejected': {'reviewed'},
+        'accepted': {'rejected'},
+    }
     
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     applicant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='job_applications')
     cover_letter = models.TextField()
-    resume = models.FileField(upload_to='resumes/')
+    # Stored once per distinct content, see filestore.storage
+    resume = models.FileField(upload_to='resumes/', storage=blob_storage)
     status = models.CharField(max_length=20, choices=APPLICATION_STATUS, default='pending')
     applied_at = models.DateTimeField(auto_now_add=True)
     notes = models.TextField(blank=True, null=True)
     
     class Meta:
         unique_together = ['job', 'applicant']
+        indexes = [
+            # Keyset pagination order, overall and per applicant / per job
+            models.Index(fields=['-applied_at', '-id'], name='application_applied_id_idx'),
+            models.Index(fields=['applicant', '-applied_at', '-id'], name='application_user_applied_idx'),
+            models.Index(fields=['job', '-applied_at', '-id'], name='application_job_applied_idx'),
+            # Finds the applications using a document once its text is extracted
+            models.Index(fields=['resume'], name='application_resume_idx'),
+        ]
+    
+    @classmethod
+    def statuses_leading_to(cls, new_status):
+        """Statuses from which ``new_status`` may be set"""
+        return {
+            old_status for old_status, targets in cls.ALLOWED_STATUS_TRANSITIONS.items()
+            if new_status in targets
+        }
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so counter updates know what changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
     
     def __str__(self):
-        return f"{self.applicant.email} - {self.job.title}"
\ No newline at end of file
+        return f"{self.applicant.email} - {self.job.title}"
+
+
+class MatchGeneration(models.Model):
+    """One build of the precomputed match tables, see jobs.recommendations"""
+    top_k = models.PositiveSmallIntegerField()
+    is_current = models.BooleanField(default=False)
+    # Rows updated at or after these times are re-scored by the next build
+    job_watermark = models.DateTimeField()
+    seeker_watermark = models.DateTimeField()
+    started_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['is_current'], condition=models.Q(is_current=True),
+                name='single_current_match_generation',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Generation {self.pk} (top {self.top_k})"
+
+
+class CandidateMatch(models.Model):
+    """Precomputed best job seekers for a job"""
+    generation = models.ForeignKey(MatchGeneration, on_delete=models.CASCADE, related_name='+')
+    # No database constraints: rows of deleted jobs and profiles are
+    # filtered out on read and dropped by the next build
+    job = models.ForeignKey(
+        Job, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+'
+    )
+    seeker = models.ForeignKey(
+        JobSeekerProfile, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        related_name='+'
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['generation', 'job', 'rank'], name='candidate_match_lookup_idx'),
+        ]
+
+
+class JobMatch(models.Model):
+    """Precomputed best active jobs for a job seeker"""
+    generation = models.ForeignKey(MatchGeneration, on_delete=models.CASCADE, related_name='+')
+    seeker = models.ForeignKey(
+        JobSeekerProfile, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        related_name='+'
+    )
+    job = models.ForeignKey(
+        Job, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+'
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['generation', 'seeker', 'rank'], name='job_match_lookup_idx'),
+        ]
+
+
+class SavedSearch(models.Model):
+    """Job alert criteria; new and reactivated jobs are matched by jobs.alerts"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100)
+    # Every keyword must appear in the job's title, company, requirements or description
+    keywords = models.CharField(max_length=200, blank=True)
+    # Every word must appear in the job's location
+    location = models.CharField(max_length=100, blank=True)
+    # Comma separated Job.JOB_TYPES values; empty means any
+    job_types = models.CharField(max_length=100, blank=True)
+    min_salary = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    last_notified_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name_plural = 'saved searches'
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='saved_search_user_idx'),
+        ]
+
+    @property
+    def job_type_list(self):
+        return [value for value in self.job_types.split(',') if value]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.name}"
+
+
+class SavedSearchTerm(models.Model):
+    """
+    Reverse index entry: a job producing ``(kind, term)`` may match
+    ``search``. Each search is filed under the terms of one criterion only,
+    see jobs.alerts.
+    """
+    KEYWORD = 'keyword'
+    LOCATION = 'location'
+    JOB_TYPE = 'job_type'
+    ANY = 'any'
+    KINDS = [(KEYWORD, 'Keyword'), (LOCATION, 'Location'), (JOB_TYPE, 'Job type'), (ANY, 'Any job')]
+
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='terms')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    term = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'term'], name='saved_search_term_idx'),
+        ]
+
+
+class SavedSearchMatch(models.Model):
+    """A job found for a saved search, waiting for (or sent in) a digest"""
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='matches')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    matched_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'saved search matches'
+        constraints = [
+            models.UniqueConstraint(fields=['search', 'job'], name='saved_search_match_uniq'),
+        ]
+        indexes = [
+            # Pending matches for the digest
+            models.Index(
+                fields=['search'], condition=models.Q(notified_at__isnull=True),
+                name='saved_search_pending_idx',
+            ),
+        ]
@@ -0,0 +1,182 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination keyed on ``(timestamp, id)``.
+
+    Each page is fetched with an index range scan on ``ordering`` starting
+    just past the cursor position, so deep pages cost the same as the first
+    one, rows inserted while a client is paging never shift or repeat
+    results, and no ``COUNT(*)`` is ever issued. Querysets that already carry
+    their own ordering (e.g. relevance-ranked search) are paged with an
+    offset cursor instead.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+
+        if self._has_own_ordering(queryset):
+            return self._paginate_by_offset(queryset)
+        return self._paginate_by_key(queryset)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # Cursor encoding
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if 'k' in cursor:
+                timestamp, pk = cursor['k']
+                cursor['k'] = (datetime.fromisoformat(timestamp), int(pk))
+            else:
+                cursor['o'] = max(int(cursor['o']), 0)
+            cursor['r'] = bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, cursor):
+        payload = json.dumps(cursor, separators=(',', ':'), default=str)
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        url = replace_query_param(self.base_url, self.cursor_query_param, encoded)
+        return url
+
+    def _first_page_url(self):
+        return remove_query_param(self.base_url, self.cursor_query_param)
+
+    # Keyset paging
+
+    def _has_own_ordering(self, queryset):
+        order_by = tuple(queryset.query.order_by)
+        return bool(order_by) and order_by != tuple(self.ordering)
+
+    def _key(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+
+    def _paginate_by_key(self, queryset):
+        reverse = bool(self.cursor and self.cursor['r'])
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+
+        if self.cursor:
+            if 'k' not in self.cursor:
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(self._after(ordering, self.cursor['k']))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_link = None
+        self.previous_link = None
+        if results:
+            head = self._encode_key(results[0])
+            tail = self._encode_key(results[-1])
+            if has_more or reverse:
+                self.next_link = self.encode_cursor({'k': tail})
+            if self.cursor and (has_more or not reverse):
+                self.previous_link = self.encode_cursor({'k': head, 'r': 1})
+        elif self.cursor:
+            # Stepped past either end; offer a way back to the start
+            self.previous_link = self._first_page_url()
+        return results
+
+    def _encode_key(self, obj):
+        timestamp, pk = self._key(obj)
+        return [timestamp.isoformat(), pk]
+
+    def _after(self, ordering, key):
+        """Rows strictly after ``key`` in ``ordering`` (row-value comparison)"""
+        (time_field, id_field), (timestamp, pk) = ordering, key
+        time_name, id_name = time_field.lstrip('-'), id_field.lstrip('-')
+        time_op = 'lt' if time_field.startswith('-') else 'gt'
+        id_op = 'lt' if id_field.startswith('-') else 'gt'
+        return (
+            Q(**{f'{time_name}__{time_op}': timestamp})
+            | Q(**{time_name: timestamp, f'{id_name}__{id_op}': pk})
+        )
+
+    # Offset paging for ranked querysets
+
+    def _paginate_by_offset(self, queryset):
+        offset = self.cursor.get('o', 0) if self.cursor else 0
+        results = list(queryset[offset:offset + self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        self.next_link = None
+        self.previous_link = None
+        if has_more:
+            self.next_link = self.encode_cursor({'o': offset + self.page_size})
+        if offset > 0:
+            previous = max(offset - self.page_size, 0)
+            self.previous_link = (
+                self.encode_cursor({'o': previous}) if previous else self._first_page_url()
+            )
+        return results
+
+
+class JobPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class JobApplicationPagination(KeysetPagination):
+    ordering = ('-applied_at', '-id')
+
+
+class SavedSearchPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,387 @@
+"""
+Precomputed top-K match tables.
+
+``build()`` scores every active job against every active job seeker (and
+the reverse) and stores the best ``top_k`` of each as rows of a new
+``MatchGeneration``. Readers only ever see the current generation, and the
+switch to a finished one happens in a single transaction, so a build never
+exposes a half-written table.
+
+Builds are incremental. Sources (the job, or the seeker, a list belongs to)
+whose ``updated_at`` moved past the previous generation's watermark are
+re-scored against everything. For the rest only the targets that changed
+are scored, and the result is merged into the stored list. That merge is
+exact unless a changed target was in the list and its new score falls below
+the old K-th score: an unchanged target might then belong in the list, so
+that source is re-scored in full too. IDF weights drift a little as the
+corpus changes, which the merge does not account for; ``full=True``
+rebuilds everything from scratch.
+
+Scoring is spread over a fork-based process pool. The vector indexes are
+built once in the parent and inherited by the workers, so each task only
+carries a list of ids. Sources are scored in chunks of ``chunk_size``,
+which bounds the dense score block a worker holds to
+``chunk_size x targets`` floats.
+"""
+import multiprocessing
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from profiles.models import JobSeekerProfile
+
+from .matching import (
+    VectorIndex, _csr, idf_squared, job_vector, required_years, score_rows,
+    seeker_vector,
+)
+from .models import CandidateMatch, Job, JobMatch, MatchGeneration
+
+DEFAULT_TOP_K = 20
+DEFAULT_CHUNK_SIZE = 128
+WRITE_BATCH_SIZE = 5000
+# Re-read a short window before the watermark to catch rows committed late
+# by long-running transactions
+WATERMARK_OVERLAP = timedelta(seconds=30)
+
+# Job -> seekers and seeker -> jobs; the experience factor always takes
+# (seeker years, job years)
+SIDES = {
+    'job': {'model': CandidateMatch, 'source': 'job', 'target': 'seeker'},
+    'seeker': {'model': JobMatch, 'source': 'seeker', 'target': 'job'},
+}
+
+# Shared with forked workers; set by the parent before the pool starts
+_state = {}
+
+
+def live_seekers():
+    return JobSeekerProfile.objects.filter(user__is_active=True)
+
+
+def live_jobs():
+    return Job.objects.filter(is_active=True)
+
+
+def _load_index(queryset, vector, meta):
+    return VectorIndex.from_rows(
+        (obj.pk, vector(obj), meta(obj)) for obj in queryset.iterator(chunk_size=2000)
+    )
+
+
+def _subset(index, ids):
+    """Index holding just the live rows ``ids`` of ``index``"""
+    return VectorIndex.from_rows(
+        (row_id, index.vector(row_id), index.meta[row_id]) for row_id in ids if row_id in index
+    )
+
+
+def _experience(seeker_years, job_years):
+    """Vectorized ``matching.experience_factor`` over broadcast arrays"""
+    seeker_years = np.maximum(seeker_years, 0).astype(np.float32)
+    job_years = np.asarray(job_years, dtype=np.float32)
+    short = (job_years > 0) & (seeker_years < job_years)
+    safe_years = np.where(job_years > 0, job_years, 1.0)
+    return np.where(short, 0.5 + 0.5 * seeker_years / safe_years, 1.0).astype(np.float32)
+
+
+def _score_chunk(task):
+    """
+    Worker entry point: best ``k`` targets for each source id in the chunk.
+    ``task`` is ``(side, target index name, source ids)``.
+    """
+    side, target_name, source_ids = task
+    sources = _state[SIDES[side]['source']]
+    targets = _state[target_name]
+    k = _state['top_k']
+
+    ids, scores = score_rows(
+        targets, _csr([sources.vector(source_id) for source_id in source_ids]), _state['weights']
+    )
+    results = []
+    if not len(ids):
+        return [(source_id, []) for source_id in source_ids]
+
+    target_meta = np.array([targets.meta[int(i)] or 0 for i in ids], dtype=np.float32)
+    source_meta = np.array([sources.meta[i] or 0 for i in source_ids], dtype=np.float32)
+    if side == 'job':
+        scores *= _experience(target_meta[:, None], source_meta[None, :])
+    else:
+        scores *= _experience(source_meta[None, :], target_meta[:, None])
+
+    n = min(k, len(ids))
+    best = np.argpartition(-scores, n - 1, axis=0)[:n]
+    for column, source_id in enumerate(source_ids):
+        rows = best[:, column]
+        rows = rows[np.argsort(-scores[rows, column], kind='stable')]
+        results.append((source_id, [
+            (int(ids[row]), float(scores[row, column]))
+            for row in rows if scores[row, column] > 0
+        ]))
+    return results
+
+
+def _merge(previous, fresh, dirty, k):
+    """
+    Fold re-scored targets into a stored top-K list. Returns None when the
+    result cannot be trusted and the source needs a full re-score.
+    """
+    kth = previous[-1][1] if len(previous) >= k else 0.0
+    merged = [(target, score) for target, score in previous if target not in dirty]
+    merged += fresh
+    merged.sort(key=lambda pair: -pair[1])
+    merged = merged[:k]
+    if len(previous) >= k and (len(merged) < k or merged[-1][1] < kth):
+        return None
+    return merged
+
+
+class _Writer:
+    """Buffered ``bulk_create`` of match rows into one generation"""
+
+    def __init__(self, model, generation, side):
+        self.model = model
+        self.generation = generation
+        self.source_field = f"{SIDES[side]['source']}_id"
+        self.target_field = f"{SIDES[side]['target']}_id"
+        self.buffer = []
+        self.rows = 0
+
+    def add(self, source_id, matches):
+        for rank, (target_id, score) in enumerate(matches, start=1):
+            self.buffer.append(self.model(**{
+                'generation': self.generation,
+                self.source_field: source_id,
+                self.target_field: target_id,
+                'rank': rank,
+                'score': score,
+            }))
+        if len(self.buffer) >= WRITE_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.model.objects.bulk_create(self.buffer, batch_size=WRITE_BATCH_SIZE)
+            self.rows += len(self.buffer)
+            self.buffer = []
+
+
+def _stored_lists(model, generation, side, source_ids):
+    """``{source_id: [(target_id, score), ...]}`` in rank order"""
+    source, target = SIDES[side]['source'], SIDES[side]['target']
+    lists = {source_id: [] for source_id in source_ids}
+    rows = (
+        model.objects.filter(generation=generation, **{f'{source}_id__in': source_ids})
+        .order_by(f'{source}_id', 'rank')
+        .values_list(f'{source}_id', f'{target}_id', 'score')
+    )
+    for source_id, target_id, score in rows:
+        lists[source_id].append((target_id, score))
+    return lists
+
+
+def _chunks(ids, size):
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _build_side(side, run, generation, previous, dirty, gone, chunk_size, stats):
+    """
+    Fill ``generation`` with the lists of one side. ``dirty`` maps
+    'job'/'seeker' to the live ids needing a re-score and ``gone`` to the
+    ids stored in ``previous`` that are no longer live.
+    """
+    model = SIDES[side]['model']
+    source, target = SIDES[side]['source'], SIDES[side]['target']
+    writer = _Writer(model, generation, side)
+
+    live = _state[source].ids()
+    full = set(live) if previous is None else set(dirty[source])
+    rest = live - full
+    dirty_targets = dirty[target] | gone[target]
+
+    if rest and dirty_targets:
+        for chunk, results in zip(
+            _chunks(rest, chunk_size),
+            run([(side, f'{target}_dirty', chunk) for chunk in _chunks(rest, chunk_size)]),
+        ):
+            stored_lists = _stored_lists(model, previous, side, chunk)
+            for source_id, fresh in results:
+                merged = _merge(stored_lists[source_id], fresh, dirty_targets, _state['top_k'])
+                if merged is None:
+                    full.add(source_id)
+                else:
+                    writer.add(source_id, merged)
+                    stats['merged'] += 1
+    elif rest:
+        # Nothing on the other side changed: carry the stored lists over
+        for chunk in _chunks(rest, chunk_size * 8):
+            for source_id, matches in _stored_lists(model, previous, side, chunk).items():
+                writer.add(source_id, matches)
+                stats['copied'] += 1
+
+    for results in run([(side, target, chunk) for chunk in _chunks(full, chunk_size)]):
+        for source_id, matches in results:
+            writer.add(source_id, matches)
+            stats['scored'] += 1
+    writer.flush()
+    stats['rows'] += writer.rows
+
+
+def _changed_ids(queryset, watermark):
+    return set(
+        queryset.filter(updated_at__gte=watermark - WATERMARK_OVERLAP).values_list('pk', flat=True)
+    )
+
+
+def _stored_ids(previous):
+    jobs = set(CandidateMatch.objects.filter(generation=previous).values_list('job_id', flat=True).distinct())
+    jobs |= set(JobMatch.objects.filter(generation=previous).values_list('job_id', flat=True).distinct())
+    seekers = set(JobMatch.objects.filter(generation=previous).values_list('seeker_id', flat=True).distinct())
+    seekers |= set(CandidateMatch.objects.filter(generation=previous).values_list('seeker_id', flat=True).distinct())
+    return {'job': jobs, 'seeker': seekers}
+
+
+def _pool_runner(pool):
+    if pool is None:
+        return lambda tasks: map(_score_chunk, tasks)
+    # Results come back in task order so they can be paired with their chunk
+    return lambda tasks: pool.imap(_score_chunk, tasks)
+
+
+def build(top_k=DEFAULT_TOP_K, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, full=False, keep=1):
+    """
+    Build a new generation of both match tables and make it current.
+    Returns a dict of build statistics.
+    """
+    started = time.monotonic()
+    # Abandoned builds never became current; nothing reads them
+    _delete_generations(MatchGeneration.objects.filter(completed_at__isnull=True))
+
+    previous = MatchGeneration.objects.filter(is_current=True).first()
+    if full or (previous is not None and previous.top_k != top_k):
+        previous = None
+
+    # Watermarks are taken before reading so rows saved mid-build are
+    # picked up again next time
+    now = timezone.now()
+    _state.clear()
+    _state['seeker'] = _load_index(live_seekers(), seeker_vector, lambda p: p.experience_years)
+    _state['job'] = _load_index(live_jobs(), job_vector, lambda j: required_years(j.requirements))
+    _state['weights'] = idf_squared(_state['seeker'], _state['job'])
+    _state['top_k'] = top_k
+
+    # Dirty: live rows edited since the last build, or live rows it did not
+    # store (new, reactivated, or without any match). Gone: stored rows
+    # that are no longer live.
+    dirty = {'job': set(), 'seeker': set()}
+    gone = {'job': set(), 'seeker': set()}
+    if previous is not None:
+        stored = _stored_ids(previous)
+        changed = {
+            'job': _changed_ids(Job.objects.all(), previous.job_watermark),
+            'seeker': _changed_ids(JobSeekerProfile.objects.all(), previous.seeker_watermark),
+        }
+        for kind in dirty:
+            live = _state[kind].ids()
+            dirty[kind] = (changed[kind] | (live - stored[kind])) & live
+            gone[kind] = stored[kind] - live
+    _state['job_dirty'] = _subset(_state['job'], dirty['job'])
+    _state['seeker_dirty'] = _subset(_state['seeker'], dirty['seeker'])
+
+    generation = MatchGeneration.objects.create(
+        top_k=top_k, job_watermark=now, seeker_watermark=now
+    )
+    stats = {
+        'generation': generation.pk, 'incremental': previous is not None,
+        'jobs': len(_state['job']), 'seekers': len(_state['seeker']),
+        'scored': 0, 'merged': 0, 'copied': 0, 'rows': 0,
+    }
+
+    pool = None
+    workers = workers or 1
+    if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        # Forked children must not share the parent's database connections
+        connections.close_all()
+        pool = multiprocessing.get_context('fork').Pool(workers)
+    try:
+        run = _pool_runner(pool)
+        for side in SIDES:
+            _build_side(side, run, generation, previous, dirty, gone, chunk_size, stats)
+    except BaseException:
+        _delete_generations(MatchGeneration.objects.filter(pk=generation.pk))
+        raise
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        _state.clear()
+
+    with transaction.atomic():
+        MatchGeneration.objects.filter(is_current=True).update(is_current=False)
+        MatchGeneration.objects.filter(pk=generation.pk).update(
+            is_current=True, completed_at=timezone.now()
+        )
+
+    # Keep the last few generations for readers that looked up the old
+    # pointer just before the swap
+    stale = MatchGeneration.objects.filter(is_current=False).order_by('-pk')[keep:]
+    _delete_generations(MatchGeneration.objects.filter(pk__in=list(stale.values_list('pk', flat=True))))
+
+    stats['seconds'] = round(time.monotonic() - started, 3)
+    return stats
+
+
+def _delete_generations(queryset):
+    ids = list(queryset.values_list('pk', flat=True))
+    if ids:
+        CandidateMatch.objects.filter(generation_id__in=ids).delete()
+        JobMatch.objects.filter(generation_id__in=ids).delete()
+        MatchGeneration.objects.filter(pk__in=ids).delete()
+
+
+# Reads
+
+def _current(k):
+    generation = (
+        MatchGeneration.objects.filter(is_current=True)
+        .values('pk', 'top_k', 'job_watermark', 'seeker_watermark')
+        .first()
+    )
+    if generation is None or k > generation['top_k']:
+        return None
+    return generation
+
+
+def candidates_for_job(job, k):
+    """
+    Stored top ``k`` ``(profile_id, score)`` pairs for ``job``, or None when
+    the table cannot answer (no build yet, job edited since, or too few
+    rows kept) and the caller should score live.
+    """
+    generation = _current(k)
+    if generation is None or job.updated_at >= generation['job_watermark']:
+        return None
+    matches = list(
+        CandidateMatch.objects.filter(generation_id=generation['pk'], job_id=job.pk)
+        .order_by('rank')
+        .values_list('seeker_id', 'score')[:k]
+    )
+    return matches or None
+
+
+def jobs_for_seeker(profile, k):
+    """Stored top ``k`` ``(job_id, score)`` pairs for a seeker, or None"""
+    generation = _current(k)
+    if generation is None or profile.updated_at >= generation['seeker_watermark']:
+        return None
+    matches = list(
+        JobMatch.objects.filter(generation_id=generation['pk'], seeker_id=profile.pk)
+        .order_by('rank')
+        .values_list('job_id', 'score')[:k]
+    )
+    return matches or None
@@ -0,0 +1,124 @@
+"""
+Periodic maintenance run by the ``run_scheduler`` command.
+
+Tasks are registered with an interval in seconds and run one after another
+in the scheduler process whenever they are due, so a slow task delays the
+others but never overlaps itself.
+
+The deadline sweep deactivates jobs whose ``application_deadline`` has
+passed. Deadlines are inclusive: a job closes once its deadline day is over
+in the server's time zone. Expired rows are found through the partial
+deadline index on active jobs and switched off in chunks of primary keys,
+each chunk in its own short transaction, so the sweep never holds row locks
+on more than one chunk. Each chunk sets ``updated_at``, which moves the rows
+past the recommendation watermarks and changes the list validators, and
+bumps the job response cache generation. Application counters are per job
+and unaffected by the status change.
+
+Saved-search digests are sent hourly; ``jobs.alerts`` keeps each search to
+one digest per ``DIGEST_INTERVAL``. Token revocations too old to matter are
+pruned daily (accounts.revocation).
+"""
+import logging
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.revocation import prune_revocations
+
+from . import alerts, matching
+from .cache import job_response_cache, JOB_TABLE
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_CHUNK_SIZE = 1000
+
+
+def expire_jobs(today=None, chunk_size=EXPIRY_CHUNK_SIZE):
+    """
+    Deactivate active jobs whose deadline is before ``today``. Returns
+    ``{'rows', 'batches', 'seconds'}``.
+    """
+    today = today or timezone.localdate()
+    expired = Job.objects.filter(is_active=True, application_deadline__lt=today)
+    rows = batches = 0
+    started = time.perf_counter()
+    while True:
+        with transaction.atomic():
+            ids = list(
+                expired.order_by('application_deadline', 'pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            # The condition is repeated so a job reactivated (with a new
+            # deadline) since the read is left alone
+            updated = expired.filter(pk__in=ids).update(is_active=False, updated_at=timezone.now())
+            job_response_cache.bump_on_commit(JOB_TABLE)
+            for pk in ids:
+                matching.schedule_update('job', pk=pk)
+        rows += updated
+        batches += 1
+    return {'rows': rows, 'batches': batches, 'seconds': round(time.perf_counter() - started, 3)}
+
+
+class Scheduler:
+    def __init__(self):
+        self.tasks = {}
+        self._next_run = {}
+
+    def register(self, name, interval, func):
+        self.tasks[name] = (interval, func)
+
+    def every(self, seconds, name=None):
+        def decorator(func):
+            self.register(name or func.__name__, seconds, func)
+            return func
+        return decorator
+
+    def run_pending(self, only=None, now=None):
+        """
+        Run every due task (or just the ``only`` names); returns
+        ``[(name, result)]``. Failures are logged and retried next interval.
+        """
+        now = time.monotonic() if now is None else now
+        results = []
+        for name, (interval, func) in self.tasks.items():
+            if only and name not in only:
+                continue
+            if self._next_run.get(name, 0) > now:
+                continue
+            self._next_run[name] = now + interval
+            try:
+                results.append((name, func()))
+            except Exception:
+                logger.exception('Scheduled task %s failed', name)
+        return results
+
+    def seconds_until_due(self, only=None, now=None):
+        now = time.monotonic() if now is None else now
+        pending = [
+            self._next_run.get(name, 0) - now for name in self.tasks
+            if not only or name in only
+        ]
+        return max(0, min(pending)) if pending else 60
+
+
+scheduler = Scheduler()
+
+
+@scheduler.every(15 * 60, name='expire_jobs')
+def expire_jobs_task():
+    return expire_jobs()
+
+
+@scheduler.every(60 * 60, name='search_digests')
+def search_digests_task():
+    return alerts.send_digests()
+
+
+@scheduler.every(24 * 60 * 60, name='prune_token_revocations')
+def prune_token_revocations_task():
+    return prune_revocations()
@@ -0,0 +1,236 @@
+import re
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
+from django.db.models import Q, Value, FloatField
+
+from filestore.models import Blob
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize_query(query):
+    """Split free text into lowercase search terms"""
+    return TOKEN_RE.findall(query.lower())
+
+
+class FullTextIndex:
+    """
+    Inverted index over a model's text columns, kept in a side table.
+
+    SQLite uses an FTS5 virtual table ranked with bm25(); PostgreSQL uses a
+    tsvector column with a GIN index ranked with ts_rank_cd(). Any other
+    backend falls back to unranked icontains filtering.
+
+    ``fields`` is a sequence of ``(field_name, bm25_weight, pg_weight)``
+    tuples, where ``pg_weight`` is one of the tsvector classes A-D.
+    """
+
+    def __init__(self, model_table, table, fields, fallback_fields=None):
+        self.model_table = model_table
+        self.table = table
+        self.fields = fields
+        self.field_names = [name for name, _, _ in fields]
+        # Model fields searched with icontains on other backends
+        self.fallback_fields = fallback_fields or self.field_names
+
+    @property
+    def vendor(self):
+        return connection.vendor
+
+    # Maintenance
+
+    def _sqlite_values(self, row):
+        return [row.get(name) or '' for name in self.field_names]
+
+    def _pg_document_sql(self):
+        parts = [
+            f"setweight(to_tsvector('english', %s), '{pg_weight}')"
+            for _, _, pg_weight in self.fields
+        ]
+        return ' || '.join(parts)
+
+    def upsert_many(self, rows):
+        """
+        Index or re-index rows given as ``(pk, {field: text})`` pairs.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            if self.vendor == 'sqlite':
+                cursor.executemany(
+                    f'DELETE FROM {self.table} WHERE rowid = %s',
+                    [(pk,) for pk, _ in rows],
+                )
+                columns = ', '.join(self.field_names)
+                placeholders = ', '.join(['%s'] * (len(self.field_names) + 1))
+                cursor.executemany(
+                    f'INSERT INTO {self.table} (rowid, {columns}) VALUES ({placeholders})',
+                    [[pk] + self._sqlite_values(values) for pk, values in rows],
+                )
+            elif self.vendor == 'postgresql':
+                cursor.executemany(
+                    f'INSERT INTO {self.table} (object_id, document) '
+                    f'VALUES (%s, {self._pg_document_sql()}) '
+                    f'ON CONFLICT (object_id) DO UPDATE SET document = EXCLUDED.document',
+                    [[pk] + self._sqlite_values(values) for pk, values in rows],
+                )
+
+    def upsert(self, pk, values):
+        self.upsert_many([(pk, values)])
+
+    def delete_many(self, pks):
+        pks = list(pks)
+        if not pks or self.vendor not in ('sqlite', 'postgresql'):
+            return
+        key = 'rowid' if self.vendor == 'sqlite' else 'object_id'
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE {key} = %s',
+                [(pk,) for pk in pks],
+            )
+
+    def delete(self, pk):
+        self.delete_many([pk])
+
+    def clear(self):
+        if self.vendor not in ('sqlite', 'postgresql'):
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    # Querying
+
+    def _sqlite_match(self, terms):
+        quoted = [f'"{term}"' for term in terms]
+        # Treat the last term as a prefix so results update while typing
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def _pg_match(self, terms):
+        return ' & '.join(terms[:-1] + [terms[-1] + ':*'])
+
+    def search(self, queryset, query):
+        """
+        Restrict ``queryset`` to rows matching ``query`` and annotate each
+        row with a ``search_rank`` where higher means more relevant.
+        """
+        terms = tokenize_query(query)
+        if not terms:
+            return queryset.none().annotate(
+                search_rank=Value(0.0, output_field=FloatField())
+            )
+
+        if self.vendor == 'sqlite':
+            weights = ', '.join(str(weight) for _, weight, _ in self.fields)
+            return queryset.extra(
+                tables=[self.table],
+                where=[
+                    f'{self.table}.rowid = {self.model_table}.id',
+                    f'{self.table} MATCH %s',
+                ],
+                params=[self._sqlite_match(terms)],
+                select={'search_rank': f'-bm25({self.table}, {weights})'},
+            )
+
+        if self.vendor == 'postgresql':
+            tsquery = "to_tsquery('english', %s)"
+            return queryset.extra(
+                tables=[self.table],
+                where=[
+                    f'{self.table}.object_id = {self.model_table}.id',
+                    f'{self.table}.document @@ {tsquery}',
+                ],
+                params=[self._pg_match(terms)],
+                select={'search_rank': f'ts_rank_cd({self.table}.document, {tsquery}, 32)'},
+                select_params=[self._pg_match(terms)],
+            )
+
+        condition = Q()
+        for term in terms:
+            term_match = Q()
+            for name in self.fallback_fields:
+                term_match |= Q(**{f'{name}__icontains': term})
+            condition &= term_match
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+
+# Title and company hits matter far more than a passing mention in the body
+job_index = FullTextIndex(
+    model_table='jobs_job',
+    table='jobs_job_fts',
+    fields=(
+        ('title', 10.0, 'A'),
+        ('description', 1.0, 'D'),
+        ('requirements', 2.0, 'C'),
+        ('company', 5.0, 'B'),
+        ('location', 3.0, 'B'),
+    ),
+)
+
+
+def job_index_values(job):
+    return {name: getattr(job, name) for name in job_index.field_names}
+
+
+# Applications are found by the text of their resume first, then the
+# applicant's profile documents and the cover letter. Document text comes
+# from the extraction worker (filestore.tasks).
+application_index = FullTextIndex(
+    model_table='jobs_jobapplication',
+    table='jobs_jobapplication_fts',
+    fields=(
+        ('resume', 3.0, 'A'),
+        ('documents', 2.0, 'B'),
+        ('cover_letter', 1.0, 'C'),
+    ),
+    fallback_fields=('cover_letter',),
+)
+
+
+def _profile_documents(application):
+    try:
+        profile = application.applicant.job_seeker_profile
+    except ObjectDoesNotExist:
+        return []
+    return [name for name in (profile.resume.name, profile.certifications.name) if name]
+
+
+def application_index_rows(applications):
+    """
+    ``(pk, values)`` pairs for ``application_index``, with the stored text
+    of every referenced document fetched in one query. Select
+    ``applicant__job_seeker_profile`` with the applications.
+    """
+    applications = list(applications)
+    documents = {
+        application.pk: _profile_documents(application) for application in applications
+    }
+    names = {application.resume.name for application in applications if application.resume}
+    names.update(name for profile_names in documents.values() for name in profile_names)
+    texts = dict(Blob.objects.filter(name__in=names).values_list('name', 'text')) if names else {}
+    return [
+        (application.pk, {
+            'resume': texts.get(application.resume.name, '') if application.resume else '',
+            'documents': '\n'.join(texts.get(name, '') for name in documents[application.pk]),
+            'cover_letter': application.cover_letter,
+        })
+        for application in applications
+    ]
+
+
+def reindex_applications(queryset, batch_size=500):
+    """Rebuild the index rows of every application in ``queryset``"""
+    queryset = queryset.select_related('applicant__job_seeker_profile').order_by('pk')
+    indexed = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return indexed
+        application_index.upsert_many(application_index_rows(batch))
+        indexed += len(batch)
+        last_pk = batch[-1].pk
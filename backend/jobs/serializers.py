@@ -1,20 +1,58 @@
 from rest_framework import serializers
-from .models import Job, JobApplication
+from profiles.models import JobSeekerProfile
+from .counters import STATUS_COUNTER_FIELDS
+from .models import Job, JobApplication, SavedSearch
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Saved searches one user may keep
+MAX_SAVED_SEARCHES = 50
+
 class JobSerializer(serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source='created_by.email')
-    total_applications = serializers.SerializerMethodField()
+    total_applications = serializers.IntegerField(source='applications_count', read_only=True)
+    # Only set on ?near= searches
+    distance_km = serializers.SerializerMethodField()
     
     class Meta:
         model = Job
-        fields = '__all__'
-        read_only_fields = ('created_by', 'created_at', 'updated_at')
+        # Per-status counts are for the job's owner, see PostedJobSerializer
+        exclude = ('geohash',) + Job.COUNTER_FIELDS
+        read_only_fields = (
+            'created_by', 'created_at', 'updated_at', 'source', 'external_id', 'latitude', 'longitude'
+        )
+    
+    def get_distance_km(self, obj):
+        distance = getattr(obj, 'distance_km', None)
+        return None if distance is None else round(distance, 2)
+
+class PostedJobSerializer(JobSerializer):
+    """A job as its owner sees it, with applications counted by status"""
+    application_counts = serializers.SerializerMethodField()
+    
+    def get_application_counts(self, obj):
+        return {status: getattr(obj, field) for status, field in STATUS_COUNTER_FIELDS.items()}
+
+class RecommendedJobSerializer(JobSerializer):
+    match_score = serializers.SerializerMethodField()
+    
+    def get_match_score(self, obj):
+        return round(self.context['scores'].get(obj.pk, 0.0), 4)
+
+class MatchedCandidateSerializer(serializers.ModelSerializer):
+    email = serializers.ReadOnlyField(source='user.email')
+    match_score = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = JobSeekerProfile
+        fields = (
+            'id', 'user', 'email', 'first_name', 'last_name', 'profession',
+            'experience_years', 'skills', 'match_score',
+        )
     
-    def get_total_applications(self, obj):
-        return obj.applications.count()
+    def get_match_score(self, obj):
+        return round(self.context['scores'].get(obj.pk, 0.0), 4)
 
 class JobApplicationSerializer(serializers.ModelSerializer):
     applicant = serializers.ReadOnlyField(source='applicant.email')
@@ -27,14 +65,50 @@ class JobApplicationSerializer(serializers.ModelSerializer):
         read_only_fields = ('applicant', 'applied_at', 'status')
     
     def get_applicant_name(self, obj):
-        return f"{obj.applicant.first_name} {obj.applicant.last_name}"
+        # Names live on the job seeker profile, not on the user
+        profile = getattr(obj.applicant, 'job_seeker_profile', None)
+        if profile is None:
+            return obj.applicant.email
+        return f"{profile.first_name} {profile.last_name}"
     
     def validate(self, data):
         # Check if user already applied
         request = self.context.get('request')
         job = data.get('job')
         
+        # The job row is already loaded by the field, so this costs no query
+        if job is not None and not job.accepts_applications():
+            raise serializers.ValidationError({'job': "This job is no longer accepting applications."})
+        
         if JobApplication.objects.filter(job=job, applicant=request.user).exists():
             raise serializers.ValidationError("You have already applied for this job.")
         
-        return data
\ No newline at end of file
+        return data
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    # Accepts and returns a list; stored comma separated
+    job_types = serializers.ListField(
+        child=serializers.ChoiceField(choices=Job.JOB_TYPES), required=False
+    )
+    
+    class Meta:
+        model = SavedSearch
+        fields = '__all__'
+        read_only_fields = ('user', 'created_at', 'updated_at', 'last_notified_at')
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['job_types'] = instance.job_type_list
+        return data
+    
+    def validate_job_types(self, value):
+        return ','.join(dict.fromkeys(value))
+    
+    def validate(self, data):
+        request = self.context.get('request')
+        if self.instance is None and request is not None:
+            if SavedSearch.objects.filter(user=request.user).count() >= MAX_SAVED_SEARCHES:
+                raise serializers.ValidationError(
+                    f"You can save at most {MAX_SAVED_SEARCHES} searches."
+                )
+        return data
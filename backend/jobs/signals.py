@@ -0,0 +1,137 @@
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from filestore.tasks import text_extracted
+from geo.signals import coordinates_changed
+from profiles.models import JobSeekerProfile
+
+from . import alerts, counters, matching
+from .cache import job_response_cache, JOB_TABLE, APPLICATION_TABLE
+from .models import Job, JobApplication, SavedSearch
+from .search import (
+    application_index, application_index_rows, job_index, job_index_values, reindex_applications
+)
+
+
+@receiver(post_save, sender=Job)
+def index_job(sender, instance, **kwargs):
+    """Keep the full-text index in step with the job row"""
+    job_index.upsert(instance.pk, job_index_values(instance))
+
+
+@receiver(post_delete, sender=Job)
+def unindex_job(sender, instance, **kwargs):
+    job_index.delete(instance.pk)
+
+
+@receiver(post_save, sender=Job)
+def update_job_vector(sender, instance, **kwargs):
+    matching.schedule_update('job', obj=instance)
+
+
+@receiver(post_delete, sender=Job)
+def remove_job_vector(sender, instance, **kwargs):
+    matching.schedule_update('job', pk=instance.pk)
+
+
+@receiver(post_save, sender=Job)
+def alert_saved_searches(sender, instance, created, raw=False, **kwargs):
+    """Match new and reactivated jobs against saved searches"""
+    if raw or not instance.is_active:
+        return
+    was_active = getattr(instance, '_loaded_values', {}).get('is_active')
+    if created or was_active is False:
+        alerts.percolate_on_commit([instance.pk])
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), 'is_active': True}
+
+
+@receiver(post_save, sender=SavedSearch)
+def index_saved_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        alerts.reindex_search(instance)
+
+
+@receiver(post_save, sender=JobSeekerProfile)
+def update_seeker_vector(sender, instance, **kwargs):
+    matching.schedule_update('seeker', obj=instance)
+
+
+@receiver(post_delete, sender=JobSeekerProfile)
+def remove_seeker_vector(sender, instance, **kwargs):
+    matching.schedule_update('seeker', pk=instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Job)
+def invalidate_job_responses(sender, **kwargs):
+    job_response_cache.bump_on_commit(JOB_TABLE)
+
+
+@receiver(coordinates_changed, sender=Job)
+def invalidate_geocoded_jobs(sender, **kwargs):
+    job_response_cache.bump_on_commit(JOB_TABLE)
+
+
+@receiver([post_save, post_delete], sender=JobApplication)
+def invalidate_application_responses(sender, **kwargs):
+    # Applications change the counters serialized with each job
+    job_response_cache.bump_on_commit(APPLICATION_TABLE)
+
+
+@receiver(post_save, sender=JobApplication)
+def count_saved_application(sender, instance, created, raw=False, **kwargs):
+    """Keep the per-job application counters in step with the row"""
+    if raw:
+        return
+    if created:
+        counters.application_added(instance.job_id, instance.status)
+    else:
+        loaded = getattr(instance, '_loaded_values', {})
+        if 'job_id' not in loaded or 'status' not in loaded:
+            # Saved without a known previous state: recount this job only
+            counters.reconcile_counters([instance.job_id])
+        elif loaded['job_id'] != instance.job_id:
+            counters.application_removed(loaded['job_id'], loaded['status'])
+            counters.application_added(instance.job_id, instance.status)
+        else:
+            counters.status_changed(instance.job_id, loaded['status'], instance.status)
+    instance._loaded_values = {'job_id': instance.job_id, 'status': instance.status}
+
+
+@receiver(post_delete, sender=JobApplication)
+def count_deleted_application(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    counters.application_removed(
+        loaded.get('job_id', instance.job_id),
+        loaded.get('status', instance.status),
+    )
+
+
+@receiver(post_save, sender=JobApplication)
+def index_application(sender, instance, raw=False, **kwargs):
+    """Keep the applicant search index in step with the application row"""
+    if raw:
+        return
+    application_index.upsert_many(application_index_rows([instance]))
+
+
+@receiver(post_delete, sender=JobApplication)
+def unindex_application(sender, instance, **kwargs):
+    application_index.delete(instance.pk)
+
+
+@receiver(post_save, sender=JobSeekerProfile)
+def index_profile_documents(sender, instance, raw=False, **kwargs):
+    # The profile's resume and certifications are searched with each application
+    if raw:
+        return
+    reindex_applications(JobApplication.objects.filter(applicant_id=instance.user_id))
+
+
+@receiver(text_extracted)
+def index_extracted_text(sender, blob, **kwargs):
+    reindex_applications(JobApplication.objects.filter(
+        Q(resume=blob.name)
+        | Q(applicant__job_seeker_profile__resume=blob.name)
+        | Q(applicant__job_seeker_profile__certifications=blob.name)
+    ))
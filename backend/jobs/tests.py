@@ -1,3 +1,593 @@
-from django.test import TestCase
+import io
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from arnica_connect.queryplan import QueryPlanTestCase, analyze
+from geo.geohash import encode
+from geo.query import within_radius
+from profiles.models import JobSeekerProfile
+from . import alerts, cache, counters, feed, recommendations, scheduler
+from .facets import compute_facets
+from .importer import import_jobs
+from .models import (
+    Job, JobApplication, JobMatch, MatchGeneration, SavedSearch, SavedSearchMatch, SavedSearchTerm,
+)
+
+
+class HotQueryPlanTests(QueryPlanTestCase):
+    """The per-user job and application lists must stay index-only"""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([
+            User(email=f'user{i}@example.com', user_type='job_seeker' if i % 10 else 'employer')
+            for i in range(2000)
+        ])
+        employers = [user for user in users if user.user_type == 'employer']
+        seekers = [user for user in users if user.user_type == 'job_seeker']
+        today = timezone.localdate()
+        # Spread over a 10 x 20 degree box so a radius search sees few of them
+        points = [(i % 40 * 0.25, i // 40 * 0.8) for i in range(1000)]
+        jobs = Job.objects.bulk_create([
+            Job(
+                title=f'Job {i}', description='', requirements='', location='Lagos',
+                job_type='full_time', company='Clinic', created_by=employers[i % len(employers)],
+                application_deadline=today + timedelta(days=i % 60 - 30),
+                latitude=lat, longitude=lng, geohash=encode(lat, lng),
+            )
+            for i, (lat, lng) in enumerate(points)
+        ])
+        JobApplication.objects.bulk_create([
+            JobApplication(job=jobs[i % len(jobs)], applicant=seekers[i % len(seekers)], cover_letter='')
+            for i in range(5000)
+        ])
+        searches = SavedSearch.objects.bulk_create([
+            SavedSearch(user=seekers[i % len(seekers)], name=f'Search {i}', keywords=f'nurse{i}')
+            for i in range(2000)
+        ])
+        SavedSearchTerm.objects.bulk_create([
+            SavedSearchTerm(search=search, kind=kind, term=term)
+            for search in searches for kind, term in alerts.index_terms(search)
+        ])
+        SavedSearchMatch.objects.bulk_create([
+            SavedSearchMatch(search=searches[i], job=jobs[i % len(jobs)]) for i in range(2000)
+        ])
+        cls.employer = employers[0]
+        cls.seeker = seekers[0]
+        analyze()
+
+    def test_applications_by_applicant(self):
+        self.assertIndexed(
+            'my_applications',
+            JobApplication.objects.filter(applicant=self.seeker).order_by('-applied_at', '-id')[:20],
+        )
+
+    def test_jobs_by_creator(self):
+        self.assertIndexed(
+            'my_posted_jobs',
+            Job.objects.filter(created_by=self.employer).order_by('-created_at', '-id'),
+        )
+
+    def test_applications_by_job(self):
+        job = Job.objects.filter(created_by=self.employer).first()
+        self.assertIndexed(
+            'job applications',
+            JobApplication.objects.filter(job=job).order_by('-applied_at', '-id')[:20],
+        )
+
+    def test_expiry_sweep(self):
+        self.assertIndexed(
+            'expire_jobs',
+            Job.objects.filter(is_active=True, application_deadline__lt=timezone.localdate())
+            .order_by('application_deadline', 'pk').values_list('pk', flat=True)[:1000],
+        )
+
+    def test_radius_search(self):
+        # Only the matches within the radius are sorted by distance
+        self.assertIndexed(
+            'near', within_radius(Job.objects.all(), 6.5, 3.4, 50), allow_sort=True,
+        )
+
+    def test_saved_search_lookup(self):
+        terms = [term for _, term in alerts.JobTerms(Job.objects.first()).lookup()]
+        self.assertIndexed(
+            'percolate',
+            SavedSearchTerm.objects.filter(kind=SavedSearchTerm.KEYWORD, term__in=terms)
+            .values_list('search_id', 'kind', 'term'),
+        )
+
+    def test_pending_matches(self):
+        search = SavedSearch.objects.first()
+        self.assertIndexed(
+            'saved search matches',
+            SavedSearchMatch.objects.filter(search=search, notified_at__isnull=True),
+        )
+
+    def test_incremental_feed(self):
+        since = timezone.now() - timedelta(hours=1)
+        self.assertIndexed(
+            'feed since', Job.objects.filter(updated_at__gt=since).order_by('updated_at', 'pk'),
+        )
+
+
+@override_settings(JOB_RESPONSE_CACHE=None)
+class JobSearchTests(TestCase):
+    """?q= ranks title hits over company hits over passing mentions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        cls.seeker = User.objects.create_user('seeker@example.com', 'pw', user_type='job_seeker')
+        jobs = {}
+        for key, title, company, description in (
+            ('mention', 'Receptionist', 'Clinic', 'Works alongside the nursing team'),
+            ('title', 'Nursing assistant', 'Clinic', 'Front desk cover'),
+            ('company', 'Driver', 'Nursing Homes Ltd', 'Deliveries'),
+            ('unrelated', 'Accountant', 'Clinic', 'Books and payroll'),
+        ):
+            jobs[key] = Job.objects.create(
+                title=title, description=description, requirements='', location='Lagos',
+                job_type='full_time', company=company, created_by=employer,
+            )
+        cls.jobs = jobs
+
+    def search(self, query):
+        client = APIClient()
+        client.force_authenticate(self.seeker)
+        return [job['id'] for job in client.get('/api/jobs/jobs/', {'q': query}).json()['results']]
+
+    def test_ranked_by_field_weight(self):
+        expected = [self.jobs[key].pk for key in ('title', 'company', 'mention')]
+        self.assertEqual(self.search('nursing'), expected)
+
+    def test_last_term_is_a_prefix(self):
+        self.assertEqual(self.search('nursing ass'), [self.jobs['title'].pk])
+
+    def test_edited_job_is_reindexed(self):
+        job = self.jobs['unrelated']
+        job.title = 'Nursing educator'
+        job.save()
+        self.assertIn(job.pk, self.search('nursing'))
+        self.assertEqual(self.search('educator'), [job.pk])
+        self.assertEqual(self.search('accountant'), [])
+
+
+@override_settings(JOB_RESPONSE_CACHE=None)
+class JobPaginationTests(TestCase):
+    """Cursor pages neither skip nor repeat jobs while new ones are posted"""
+
+    def setUp(self):
+        self.employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        for i in range(5):
+            self.post(f'Job {i}')
+        # Ties on created_at are broken by id
+        Job.objects.filter(title__in=['Job 1', 'Job 2', 'Job 3']).update(created_at=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    def post(self, title):
+        return Job.objects.create(
+            title=title, description='', requirements='', location='Lagos',
+            job_type='full_time', company='Clinic', created_by=self.employer,
+        )
+
+    def page(self, url):
+        page = self.client.get(url).json()
+        return [job['title'] for job in page['results']], page['next'], page['previous']
+
+    def test_inserts_do_not_shift_later_pages(self):
+        first, next_url, previous_url = self.page('/api/jobs/jobs/?page_size=2')
+        self.assertIsNone(previous_url)
+        self.post('Job 5')
+        seen = list(first)
+        while next_url:
+            titles, next_url, previous_url = self.page(next_url)
+            seen += titles
+        self.assertEqual(seen, ['Job 3', 'Job 2', 'Job 1', 'Job 4', 'Job 0'])
+
+    def test_previous_page_is_the_one_before(self):
+        first, next_url, _ = self.page('/api/jobs/jobs/?page_size=2')
+        second, _, previous_url = self.page(next_url)
+        self.assertEqual(self.page(previous_url)[0], first)
+        self.assertNotEqual(first, second)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/jobs/jobs/', {'cursor': 'nonsense'}).status_code, 404)
+
+
+class JobResponseCacheTests(TestCase):
+    """Cached job responses are dropped by a generation bump once a write commits"""
+
+    def setUp(self):
+        cache.job_response_cache.cache.clear()
+        self.addCleanup(cache.job_response_cache.cache.clear)
+        cache.stats.reset()
+        employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        self.job = Job.objects.create(
+            title='Nurse', description='', requirements='', location='Lagos',
+            job_type='full_time', company='Clinic', created_by=employer,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(employer)
+
+    def title(self):
+        return self.client.get(f'/api/jobs/jobs/{self.job.pk}/').json()['title']
+
+    def totals(self):
+        return [job['total_applications'] for job in self.client.get('/api/jobs/jobs/').json()['results']]
+
+    def test_repeat_reads_are_served_from_the_cache(self):
+        self.title()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.title(), 'Nurse')
+        self.assertEqual(cache.cache_stats()['hits'], 1)
+
+    def test_write_invalidates_on_commit(self):
+        self.title()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.job.title = 'Senior nurse'
+            self.job.save()
+            # Until the write commits the cached copy is still served
+            self.assertEqual(self.title(), 'Nurse')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.title(), 'Senior nurse')
+        self.assertEqual(cache.cache_stats()['invalidations'], len(callbacks))
+
+    def test_application_invalidates_the_job_list(self):
+        seeker = User.objects.create_user('seeker@example.com', 'pw', user_type='job_seeker')
+        self.assertEqual(self.totals(), [0])
+        with self.captureOnCommitCallbacks(execute=True):
+            JobApplication.objects.create(job=self.job, applicant=seeker, cover_letter='')
+        self.assertEqual(self.totals(), [1])
+
+
+class FacetCountTests(TestCase):
+    """Each facet is counted as if its own selection were cleared"""
+
+    @classmethod
+    def setUpTestData(cls):
+        employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        for job_type, location, salary in (
+            ('full_time', 'Lagos', 25000),
+            ('full_time', 'Lagos', 45000),
+            ('part_time', 'Lagos', 45000),
+            ('full_time', 'Abuja', 120000),
+            ('contract', 'Abuja', None),
+        ):
+            Job.objects.create(
+                title='Nurse', description='', requirements='', location=location,
+                job_type=job_type, salary=salary, company='Clinic', created_by=employer,
+            )
+
+    def facets(self, **params):
+        with self.assertNumQueries(3):
+            return compute_facets(Job.objects.all(), params)
+
+    def counts(self, values):
+        return {item['value']: item['count'] for item in values}
+
+    def test_selection_does_not_narrow_its_own_facet(self):
+        facets = self.facets(job_type='full_time', location='Lagos')
+        self.assertEqual(facets['total'], 2)
+        # Job types among Lagos jobs, locations among full time jobs
+        self.assertEqual(
+            self.counts(facets['job_type']),
+            {'full_time': 2, 'part_time': 1, 'contract': 0, 'internship': 0, 'remote': 0},
+        )
+        self.assertEqual(self.counts(facets['location']), {'Lagos': 2, 'Abuja': 1})
+        self.assertEqual(self.counts(facets['salary_range'])['30k_60k'], 1)
+
+    def test_values_within_a_facet_are_ored(self):
+        facets = self.facets(job_type='full_time,contract')
+        self.assertEqual(facets['total'], 4)
+        self.assertEqual(self.counts(facets['location']), {'Abuja': 2, 'Lagos': 2})
+        selected = [item['value'] for item in facets['job_type'] if item['selected']]
+        self.assertEqual(selected, ['full_time', 'contract'])
+
+    def test_selected_value_without_jobs_stays_listed(self):
+        facets = self.facets(location='Kano')
+        self.assertEqual(facets['total'], 0)
+        self.assertIn({'value': 'Kano', 'count': 0, 'selected': True}, facets['location'])
+        self.assertEqual(self.counts(facets['job_type'])['full_time'], 0)
+
+
+class MatchGenerationTests(TestCase):
+    """A finished build replaces the current match tables in one step"""
+
+    @classmethod
+    def setUpTestData(cls):
+        employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        cls.jobs = {
+            title: Job.objects.create(
+                title=title, description='', requirements=title, location='Lagos',
+                job_type='full_time', company='Clinic', created_by=employer,
+            )
+            for title in ('Nurse', 'Pharmacist', 'Driver')
+        }
+        user = User.objects.create_user('seeker@example.com', 'pw', user_type='job_seeker')
+        cls.profile = JobSeekerProfile.objects.create(
+            user=user, first_name='Ada', last_name='Obi', profession='Nurse', skills='nurse, pharmacist',
+        )
+
+    def current(self):
+        return MatchGeneration.objects.get(is_current=True).pk
+
+    def test_swap_keeps_one_previous_generation(self):
+        first = recommendations.build(top_k=2)['generation']
+        second = recommendations.build(top_k=2)['generation']
+        self.assertEqual(self.current(), second)
+        # Readers that looked up the old pointer can still finish
+        self.assertTrue(JobMatch.objects.filter(generation_id=first).exists())
+
+        third = recommendations.build(top_k=2)['generation']
+        self.assertEqual(self.current(), third)
+        self.assertFalse(JobMatch.objects.filter(generation_id=first).exists())
+        self.assertEqual(MatchGeneration.objects.count(), 2)
+
+        matches = recommendations.jobs_for_seeker(self.profile, 2)
+        self.assertEqual(matches[0][0], self.jobs['Nurse'].pk)
+        self.assertEqual(len(matches), 2)
+        # More than the build kept: score live
+        self.assertIsNone(recommendations.jobs_for_seeker(self.profile, 3))
+
+    def test_failed_build_leaves_the_current_generation(self):
+        first = recommendations.build(top_k=2)['generation']
+        with mock.patch.object(recommendations, '_build_side', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                recommendations.build(top_k=2, full=True)
+        self.assertEqual(self.current(), first)
+        self.assertEqual(list(MatchGeneration.objects.values_list('pk', flat=True)), [first])
+        self.assertIsNotNone(recommendations.jobs_for_seeker(self.profile, 2))
+
+    def test_abandoned_build_is_never_current(self):
+        first = recommendations.build(top_k=2)['generation']
+        abandoned = MatchGeneration.objects.create(
+            top_k=2, job_watermark=timezone.now(), seeker_watermark=timezone.now()
+        )
+        self.assertEqual(self.current(), first)
+        recommendations.build(top_k=2)
+        self.assertFalse(MatchGeneration.objects.filter(pk=abandoned.pk).exists())
+
+
+class ExpiryTests(TestCase):
+    """The deadline sweep closes expired jobs a chunk at a time"""
+
+    def setUp(self):
+        self.employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        self.today = timezone.localdate()
+        self.expired = [self.post(self.today - timedelta(days=days)) for days in range(1, 6)]
+        self.open = [self.post(self.today), self.post(self.today + timedelta(days=3)), self.post(None)]
+        self.closed = self.post(self.today - timedelta(days=2), is_active=False)
+        Job.objects.update(updated_at=timezone.now() - timedelta(days=30))
+
+    def post(self, deadline, is_active=True):
+        return Job.objects.create(
+            title='Nurse', description='', requirements='', location='Lagos', job_type='full_time',
+            company='Clinic', created_by=self.employer, application_deadline=deadline,
+            is_active=is_active,
+        )
+
+    def test_sweep_in_chunks(self):
+        before = timezone.now()
+        with self.captureOnCommitCallbacks() as callbacks:
+            result = scheduler.expire_jobs(self.today, chunk_size=2)
+        self.assertEqual((result['rows'], result['batches']), (5, 3))
+        # One cache bump per chunk
+        self.assertEqual(len(callbacks), 3)
+
+        expired = Job.objects.filter(pk__in=[job.pk for job in self.expired])
+        self.assertFalse(expired.filter(is_active=True).exists())
+        self.assertFalse(expired.filter(updated_at__lt=before).exists())
+        untouched = Job.objects.exclude(pk__in=[job.pk for job in self.expired])
+        self.assertFalse(untouched.filter(updated_at__gte=before).exists())
+        self.assertEqual(Job.objects.filter(is_active=True).count(), len(self.open))
+
+    def test_second_sweep_changes_nothing(self):
+        scheduler.expire_jobs(self.today, chunk_size=2)
+        swept = dict(Job.objects.values_list('pk', 'updated_at'))
+        result = scheduler.expire_jobs(self.today, chunk_size=2)
+        self.assertEqual((result['rows'], result['batches']), (0, 0))
+        self.assertEqual(dict(Job.objects.values_list('pk', 'updated_at')), swept)
+
+
+class JobApplicationsAccessTests(TestCase):
+    """A job's applications, and searching their resumes, are for its owner"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        cls.other = User.objects.create_user('other@example.com', 'pw', user_type='employer')
+        cls.job = Job.objects.create(
+            title='Nurse', description='', requirements='', location='Lagos',
+            job_type='full_time', company='Clinic', created_by=cls.owner,
+        )
+
+    def get(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(f'/api/jobs/jobs/{self.job.pk}/applications/', {'resume_q': 'nurse'})
+
+    def test_owner(self):
+        self.assertEqual(self.get(self.owner).status_code, 200)
+
+    def test_other_user(self):
+        self.assertEqual(self.get(self.other).status_code, 403)
+
+
+class JobCounterTests(TestCase):
+
+    def test_saving_a_stale_job_keeps_its_counters(self):
+        employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        seeker = User.objects.create_user('seeker@example.com', 'pw', user_type='job_seeker')
+        job = Job.objects.create(
+            title='Nurse', description='', requirements='', location='Lagos',
+            job_type='full_time', company='Clinic', created_by=employer,
+        )
+        stale = Job.objects.get(pk=job.pk)
+        JobApplication.objects.create(job=job, applicant=seeker, cover_letter='')
+        stale.title = 'Senior nurse'
+        stale.save()
+        job.refresh_from_db()
+        self.assertEqual(job.title, 'Senior nurse')
+        self.assertEqual((job.applications_count, job.pending_count), (1, 1))
+
+    def test_reconcile_corrects_drifted_jobs(self):
+        employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        seeker = User.objects.create_user('seeker@example.com', 'pw', user_type='job_seeker')
+        jobs = [
+            Job.objects.create(
+                title=f'Nurse {i}', description='', requirements='', location='Lagos',
+                job_type='full_time', company='Clinic', created_by=employer,
+            )
+            for i in range(2)
+        ]
+        for job in jobs:
+            JobApplication.objects.create(job=job, applicant=seeker, cover_letter='')
+        Job.objects.filter(pk=jobs[0].pk).update(applications_count=5, rejected_count=2)
+        self.assertEqual(counters.reconcile_counters(), 1)
+        self.assertEqual(
+            list(Job.objects.order_by('pk').values_list('applications_count', 'pending_count', 'rejected_count')),
+            [(1, 1, 0), (1, 1, 0)],
+        )
+
+
+class JobCounterVisibilityTests(TestCase):
+    """Only the job's owner sees its applications counted by status"""
+
+    def test_other_users_see_only_the_total(self):
+        employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        seeker = User.objects.create_user('seeker@example.com', 'pw', user_type='job_seeker')
+        job = Job.objects.create(
+            title='Nurse', description='', requirements='', location='Lagos',
+            job_type='full_time', company='Clinic', created_by=employer,
+        )
+        JobApplication.objects.create(job=job, applicant=seeker, cover_letter='', status='rejected')
+
+        client = APIClient()
+        client.force_authenticate(seeker)
+        for public in (client.get(f'/api/jobs/jobs/{job.pk}/').json(),
+                       client.get('/api/jobs/jobs/').json()['results'][0]):
+            self.assertEqual(public['total_applications'], 1)
+            for field in ('geohash', 'application_counts') + Job.COUNTER_FIELDS[1:]:
+                self.assertNotIn(field, public)
+
+        client.force_authenticate(employer)
+        [posted] = client.get('/api/jobs/jobs/my_posted_jobs/').json()
+        self.assertEqual(posted['application_counts']['rejected'], 1)
+        self.assertEqual(posted['application_counts']['pending'], 0)
+
+
+class ImportAlertTests(TestCase):
+
+    def test_reactivated_job_is_matched(self):
+        employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        seeker = User.objects.create_user('seeker@example.com', 'pw', user_type='job_seeker')
+        search = SavedSearch.objects.create(user=seeker, name='Nursing', keywords='nurse')
+        fields = dict(
+            description='Ward work', requirements='RN', location='Lagos', job_type='full_time', company='Clinic',
+        )
+        for external_id, is_active in (('1', False), ('2', True)):
+            Job.objects.create(
+                title='Nurse', source='feed', external_id=external_id, is_active=is_active,
+                created_by=employer, **fields,
+            )
+        rows = ''.join(
+            json.dumps({'title': 'Nurse', 'external_id': external_id, 'is_active': True, **fields}) + '\n'
+            for external_id in ('1', '2')
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            report = import_jobs(io.BytesIO(rows.encode()), 'ndjson', employer, source='feed')
+        self.assertEqual(report['updated'], 2)
+        # Only the job the feed switched back on; the other was already active
+        self.assertQuerySetEqual(
+            SavedSearchMatch.objects.filter(search=search).values_list('job__external_id', flat=True), ['1'],
+        )
+
+
+class ApplicationStatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff@example.com', 'pw', user_type='employer', is_staff=True)
+        seeker = User.objects.create_user('seeker@example.com', 'pw', user_type='job_seeker')
+        job = Job.objects.create(
+            title='Nurse', description='', requirements='', location='Lagos',
+            job_type='full_time', company='Clinic', created_by=cls.staff,
+        )
+        cls.application = JobApplication.objects.create(
+            job=job, applicant=seeker, cover_letter='', status='accepted',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_single_update_allows_any_status(self):
+        response = self.client.patch(
+            f'/api/jobs/applications/{self.application.pk}/update_status/', {'status': 'pending'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'pending')
+
+    def test_bulk_update_rejects_bad_selections(self):
+        url = '/api/jobs/applications/bulk_update_status/'
+        for body in (
+            {'status': 'rejected', 'ids': [True]},
+            {'status': 'rejected', 'filter': {'job': self.application.job_id, 'status': 'hired'}},
+        ):
+            with self.subTest(body=body):
+                self.assertEqual(self.client.post(url, body, format='json').status_code, 400)
+
+
+class JobListConditionalTests(TestCase):
+
+    def test_deleted_job_is_not_answered_from_last_modified(self):
+        employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        jobs = [
+            Job.objects.create(
+                title=f'Nurse {i}', description='', requirements='', location='Lagos',
+                job_type='full_time', company='Clinic', created_by=employer,
+            )
+            for i in range(2)
+        ]
+        client = APIClient()
+        client.force_authenticate(employer)
+        response = client.get('/api/jobs/jobs/')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(client.get('/api/jobs/jobs/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        jobs[0].delete()
+        self.assertEqual(client.get('/api/jobs/jobs/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+        self.assertEqual(client.get('/api/jobs/jobs/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class JobFeedTests(TestCase):
+
+    def test_changes_within_the_last_second_are_sent_again(self):
+        employer = User.objects.create_user('owner@example.com', 'pw', user_type='employer')
+        for title, at in (('First', 1000.2), ('Second', 1000.7)):
+            job = Job.objects.create(
+                title=title, description='', requirements='', location='Lagos',
+                job_type='full_time', company='Clinic', created_by=employer,
+            )
+            Job.objects.filter(pk=job.pk).update(updated_at=datetime.fromtimestamp(at, tz=dt_timezone.utc))
+        # Built during second 1000, a response cannot vouch for all of it
+        self.assertEqual(feed.last_modified(now=datetime.fromtimestamp(1000.5, tz=dt_timezone.utc)), 999)
+        self.assertEqual(feed.last_modified(), 1000)
+
+        client = Client()
+        response = client.get('/api/jobs/feed.jsonl', HTTP_IF_MODIFIED_SINCE=http_date(999))
+        self.assertEqual(response.status_code, 200)
+        titles = [json.loads(line)['title'] for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(titles, ['First', 'Second'])
+        self.assertEqual(response['Last-Modified'], http_date(1000))
+        response = client.get('/api/jobs/feed.jsonl', HTTP_IF_MODIFIED_SINCE=http_date(1000))
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,74 @@
+"""
+Set-wise application status changes.
+
+``bulk_set_status`` moves many applications to one status with a single
+``UPDATE ... WHERE id IN (...) AND status IN (...)`` per chunk. The status
+condition carries the allowed-transition check into the statement itself,
+and the rows are read under ``select_for_update`` first so the per-id
+results and the counter deltas match exactly what the UPDATE changed.
+``QuerySet.update`` bypasses the model signals, so counters and cached
+responses are maintained here.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from .cache import job_response_cache, APPLICATION_TABLE
+from .counters import STATUS_COUNTER_FIELDS, apply_counter_deltas
+from .models import JobApplication
+
+CHUNK_SIZE = 500
+
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+INVALID_TRANSITION = 'invalid_transition'
+NOT_FOUND = 'not_found'
+
+
+def _chunks(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _apply_chunk(ids, new_status, sources):
+    """Results ``{id: (outcome, previous status)}`` for one chunk of ids"""
+    with transaction.atomic():
+        rows = (
+            JobApplication.objects.select_for_update()
+            .filter(pk__in=ids)
+            .values_list('pk', 'job_id', 'status')
+        )
+        results = {pk: (NOT_FOUND, None) for pk in ids}
+        moving = []
+        deltas = defaultdict(lambda: defaultdict(int))
+        for pk, job_id, status in rows:
+            if status == new_status:
+                results[pk] = (UNCHANGED, status)
+            elif status in sources:
+                results[pk] = (UPDATED, status)
+                moving.append(pk)
+                deltas[job_id][STATUS_COUNTER_FIELDS[status]] -= 1
+                deltas[job_id][STATUS_COUNTER_FIELDS[new_status]] += 1
+            else:
+                results[pk] = (INVALID_TRANSITION, status)
+
+        if moving:
+            JobApplication.objects.filter(pk__in=moving, status__in=sources).update(status=new_status)
+            apply_counter_deltas(deltas)
+            job_response_cache.bump_on_commit(APPLICATION_TABLE)
+    return results
+
+
+def bulk_set_status(ids, new_status, chunk_size=CHUNK_SIZE):
+    """
+    Move the applications ``ids`` to ``new_status`` where the transition
+    is allowed. Each chunk commits on its own. Returns ``{id: (outcome,
+    previous status)}`` with outcome one of ``updated``, ``unchanged``,
+    ``invalid_transition`` or ``not_found``.
+    """
+    sources = JobApplication.statuses_leading_to(new_status)
+    ids = list(dict.fromkeys(ids))
+    results = {}
+    for chunk in _chunks(ids, chunk_size):
+        results.update(_apply_chunk(chunk, new_status, sources))
+    return results
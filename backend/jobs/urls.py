@@ -1,11 +1,13 @@
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from .views import JobViewSet, JobApplicationViewSet
+from .views import JobViewSet, JobApplicationViewSet, SavedSearchViewSet, job_feed
 
 router = DefaultRouter()
 router.register(r'jobs', JobViewSet)
 router.register(r'applications', JobApplicationViewSet, basename='jobapplication')  # Add basename
+router.register(r'saved-searches', SavedSearchViewSet, basename='savedsearch')
 
 urlpatterns = [
+    re_path(r'^feed\.(?P<format>jsonl|xml)$', job_feed, name='job-feed'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,9 +1,41 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.http import HttpResponseNotModified, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Job, JobApplication
-from .serializers import JobSerializer, JobApplicationSerializer
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+from arnica_connect.ratelimit import SlidingWindowThrottle
+from arnica_connect.conditional import (
+    conditional_response, make_etag, query_fingerprint, set_validators
+)
+from .cache import job_response_cache, cache_stats
+from .counters import COUNTER_FIELDS
+from .models import Job, JobApplication, SavedSearch
+from profiles.models import JobSeekerProfile
+from .serializers import (
+    JobSerializer, JobApplicationSerializer, MatchedCandidateSerializer, PostedJobSerializer,
+    RecommendedJobSerializer, SavedSearchSerializer,
+)
+from .facets import compute_facets
+from .matching import engine as matching_engine, clamp_k
+from . import feed, recommendations
+from .filters import filter_applications, filter_jobs
+from .importer import DEFAULT_BATCH_SIZE, ImportFormatError, detect_format, import_jobs
+from .pagination import JobPagination, JobApplicationPagination, SavedSearchPagination
+from .transitions import bulk_set_status, UPDATED, UNCHANGED
+
+# Everything JobApplicationSerializer reads from related rows
+APPLICATION_RELATED = ('job', 'applicant', 'applicant__job_seeker_profile')
+
+# Applications one bulk status request may touch
+MAX_BULK_STATUS_IDS = 10000
 
 class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -11,40 +43,214 @@ class IsAdminUser(permissions.BasePermission):
 
 class JobViewSet(viewsets.ModelViewSet):
     serializer_class = JobSerializer
-    queryset = Job.objects.all()
+    queryset = Job.objects.select_related('created_by')
+    pagination_class = JobPagination
     
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'cache_stats', 'bulk_import']:
             permission_classes = [permissions.IsAuthenticated, IsAdminUser]
         else:
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # ?q= switches the list to relevance-ranked full-text search
+            queryset = filter_jobs(queryset, self.request.query_params)
+        return queryset
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
+    def list(self, request, *args, **kwargs):
+        # One aggregate over the filtered set decides whether the client's copy is current
+        queryset = self.filter_queryset(self.get_queryset())
+        state = queryset.aggregate(
+            last_modified=Max('updated_at'),
+            total=Count('id'),
+            **{field: Sum(field) for field in COUNTER_FIELDS}
+        )
+        last_modified = state.pop('last_modified')
+        etag = make_etag('jobs', query_fingerprint(request), last_modified, sorted(state.items()))
+        # Only the ETag (which covers the count) decides: deleting a job
+        # leaves Max('updated_at') as it was, so If-Modified-Since can't
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        # Pagination links are absolute, so the host is part of the key
+        response = self.cached_response(
+            'list', request.get_host(), query_fingerprint(request),
+            build=lambda: super(JobViewSet, self).list(request, *args, **kwargs),
+        )
+        return set_validators(response, etag, last_modified)
+    
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            state = Job.objects.filter(pk=kwargs['pk']).values_list(
+                'updated_at', *COUNTER_FIELDS
+            ).first()
+        except (TypeError, ValueError):
+            state = None
+        if state is None:
+            return super().retrieve(request, *args, **kwargs)
+        last_modified = state[0]
+        etag = make_etag('job', kwargs['pk'], *state)
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = self.cached_response(
+            'detail', kwargs['pk'],
+            build=lambda: super(JobViewSet, self).retrieve(request, *args, **kwargs),
+        )
+        return set_validators(response, etag, last_modified)
+    
+    def cached_response(self, namespace, *key_parts, build):
+        """Serve response data from the job response cache, building it on a miss"""
+        if not job_response_cache.enabled:
+            return build()
+        key = job_response_cache.make_key(f'jobs:{namespace}', *key_parts)
+        data = job_response_cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = build()
+        if response.status_code == status.HTTP_200_OK:
+            job_response_cache.set(key, response.data)
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Sidebar counts per job type, location, company, salary range and deadline"""
+        # deadline_soon is relative to today, so the date is part of the key
+        return self.cached_response(
+            'facets', timezone.localdate(), query_fingerprint(request),
+            build=lambda: Response(compute_facets(Job.objects.all(), request.query_params)),
+        )
+    
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        return Response(cache_stats())
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Create or update jobs from an uploaded CSV / NDJSON file. Rows with an
+        external_id are matched to earlier imports from the same source.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload a CSV or NDJSON file as "file".'}, status=400)
+        try:
+            fmt = detect_format(upload.name, request.data.get('format'))
+            batch_size = int(request.data.get('batch_size') or DEFAULT_BATCH_SIZE)
+        except (ImportFormatError, ValueError) as exc:
+            return Response({'error': str(exc)}, status=400)
+        
+        report = import_jobs(
+            upload.file, fmt, request.user,
+            source=request.data.get('source', '').strip()[:50],
+            batch_size=batch_size,
+        )
+        return Response(report)
+    
     @action(detail=True, methods=['get'])
     def applications(self, request, pk=None):
         job = self.get_object()
-        applications = job.applications.all()
-        serializer = JobApplicationSerializer(applications, many=True)
+        # Applicants' details and resume text are for the job's owner
+        if not (request.user.is_staff or job.created_by_id == request.user.pk):
+            return Response({'error': 'Permission denied'}, status=403)
+        applications = job.applications.select_related(*APPLICATION_RELATED)
+        applications = filter_applications(applications, request.query_params)
+        paginator = JobApplicationPagination()
+        page = paginator.paginate_queryset(applications, request, view=self)
+        serializer = JobApplicationSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def candidates(self, request, pk=None):
+        """Best matching job seekers for this job (?k= sets how many)"""
+        job = self.get_object()
+        if not (request.user.is_staff or job.created_by_id == request.user.pk):
+            return Response({'error': 'Permission denied'}, status=403)
+        
+        k = clamp_k(request.query_params.get('k'))
+        matches = recommendations.candidates_for_job(job, k)
+        if matches is None:
+            matches = matching_engine.candidates_for_job(job, k=k)
+        scores = dict(matches)
+        profiles = JobSeekerProfile.objects.select_related('user').in_bulk(list(scores))
+        ranked = [profiles[profile_id] for profile_id, _ in matches if profile_id in profiles]
+        serializer = MatchedCandidateSerializer(ranked, many=True, context={'scores': scores})
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def recommended(self, request):
+        """Active jobs best matching the current job seeker's profile"""
+        profile = JobSeekerProfile.objects.filter(user=request.user).first()
+        if profile is None:
+            return Response(
+                {'error': 'Create a job seeker profile to get recommendations.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        k = clamp_k(request.query_params.get('k'))
+        matches = recommendations.jobs_for_seeker(profile, k)
+        if matches is None:
+            matches = matching_engine.jobs_for_seeker(profile, k=k)
+        scores = dict(matches)
+        jobs = Job.objects.filter(is_active=True).select_related('created_by').in_bulk(list(scores))
+        ranked = [jobs[job_id] for job_id, _ in matches if job_id in jobs]
+        serializer = RecommendedJobSerializer(ranked, many=True, context={'scores': scores})
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def my_posted_jobs(self, request):
-        jobs = Job.objects.filter(created_by=request.user)
-        serializer = self.get_serializer(jobs, many=True)
+        jobs = Job.objects.filter(created_by=request.user).select_related('created_by').order_by('-created_at', '-id')
+        serializer = PostedJobSerializer(jobs, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
+@require_GET
+@gzip_page
+def job_feed(request, format):
+    """
+    Public feed of active jobs for aggregators, streamed as JSON lines or
+    XML; with If-Modified-Since, only the jobs changed since then.
+    """
+    content_type, render = feed.FORMATS[format]
+    latest = feed.last_modified()
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    if since is not None and (latest is None or latest <= since):
+        response = HttpResponseNotModified()
+    else:
+        response = StreamingHttpResponse(render(feed.feed_rows(since)), content_type=content_type)
+    if latest is not None:
+        response['Last-Modified'] = http_date(latest)
+    # The body depends on the client's validator, so shared caches must ask
+    patch_vary_headers(response, ['If-Modified-Since'])
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
 class JobApplicationViewSet(viewsets.ModelViewSet):
     serializer_class = JobApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = JobApplicationPagination
+    throttle_scope = 'job_applications'
+    
+    def get_throttles(self):
+        # Only submitting applications is limited
+        if self.action == 'create':
+            return [SlidingWindowThrottle()]
+        return super().get_throttles()
     
     def get_queryset(self):
+        applications = JobApplication.objects.select_related(*APPLICATION_RELATED)
+        if self.action == 'list':
+            # ?resume_q= searches resume and document text
+            applications = filter_applications(applications, self.request.query_params)
         # Admins see all applications, users see only theirs
         if self.request.user.is_staff:
-            return JobApplication.objects.all()
-        return JobApplication.objects.filter(applicant=self.request.user)
+            return applications
+        return applications.filter(applicant=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(applicant=self.request.user)
@@ -58,13 +264,94 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
         new_status = request.data.get('status')
         
         if new_status in dict(JobApplication.APPLICATION_STATUS).keys():
-            application.status = new_status
-            application.save()
+            with transaction.atomic():
+                # Re-read under lock so the counter delta uses the current status
+                application = JobApplication.objects.select_for_update().get(pk=application.pk)
+                application.status = new_status
+                application.save(update_fields=['status'])
             return Response({'status': 'Status updated successfully'})
         return Response({'error': 'Invalid status'}, status=400)
     
+    @action(detail=False, methods=['post'])
+    def bulk_update_status(self, request):
+        """
+        Move many applications to one status. Select them with ``ids`` or
+        with ``filter`` ({"job": <id>, "status": <current status>}).
+        """
+        if not request.user.is_staff:
+            return Response({'error': 'Permission denied'}, status=403)
+        
+        new_status = request.data.get('status')
+        if new_status not in dict(JobApplication.APPLICATION_STATUS):
+            return Response({'error': 'Invalid status'}, status=400)
+        
+        ids = request.data.get('ids')
+        selection = request.data.get('filter')
+        if ids is not None:
+            # bool is an int subclass, but true is not an id
+            if not isinstance(ids, list) or not all(
+                isinstance(pk, int) and not isinstance(pk, bool) for pk in ids
+            ):
+                return Response({'error': 'ids must be a list of application ids'}, status=400)
+        elif isinstance(selection, dict) and selection.get('job') is not None:
+            try:
+                applications = JobApplication.objects.filter(job_id=int(selection['job']))
+            except (TypeError, ValueError):
+                return Response({'error': 'filter.job must be a job id'}, status=400)
+            if selection.get('status'):
+                if selection['status'] not in dict(JobApplication.APPLICATION_STATUS):
+                    return Response({'error': 'filter.status must be an application status'}, status=400)
+                applications = applications.filter(status=selection['status'])
+            ids = list(applications.order_by('pk').values_list('pk', flat=True)[:MAX_BULK_STATUS_IDS + 1])
+        else:
+            return Response({'error': 'Provide ids or a filter with a job'}, status=400)
+        if len(ids) > MAX_BULK_STATUS_IDS:
+            return Response(
+                {'error': f'At most {MAX_BULK_STATUS_IDS} applications per request'}, status=400
+            )
+        
+        results = bulk_set_status(ids, new_status)
+        outcomes = [outcome for outcome, _ in results.values()]
+        return Response({
+            'status': new_status,
+            'updated': outcomes.count(UPDATED),
+            'unchanged': outcomes.count(UNCHANGED),
+            'failed': len(outcomes) - outcomes.count(UPDATED) - outcomes.count(UNCHANGED),
+            'results': [
+                {'id': pk, 'result': outcome, 'previous_status': previous}
+                for pk, (outcome, previous) in results.items()
+            ],
+        })
+    
     @action(detail=False, methods=['get'])
     def my_applications(self, request):
-        applications = JobApplication.objects.filter(applicant=request.user)
-        serializer = self.get_serializer(applications, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        applications = JobApplication.objects.filter(
+            applicant=request.user
+        ).select_related(*APPLICATION_RELATED)
+        page = self.paginate_queryset(applications)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+class SavedSearchViewSet(viewsets.ModelViewSet):
+    """The user's job alerts; new matching jobs are emailed as a digest"""
+    serializer_class = SavedSearchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SavedSearchPagination
+    
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+    
+    @action(detail=True, methods=['get'])
+    def matches(self, request, pk=None):
+        """Open jobs matched for this search since it was saved, newest first"""
+        search = self.get_object()
+        jobs = Job.objects.filter(
+            pk__in=search.matches.values('job_id'), is_active=True
+        ).select_related('created_by')
+        paginator = JobPagination()
+        page = paginator.paginate_queryset(jobs, request, view=self)
+        serializer = JobSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
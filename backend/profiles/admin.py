@@ -1,5 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from geo.gazetteer import geocode
+from .images import thumbnail_url
 from .models import ClinicProfile, EmployerProfile, JobSeekerProfile
 
 @admin.register(ClinicProfile)
@@ -7,7 +9,7 @@ class ClinicProfileAdmin(admin.ModelAdmin):
     list_display = ('clinic_name', 'get_user_email', 'clinic_type', 'phone', 'get_city', 'has_logo')
     list_filter = ('clinic_type', 'created_at')
     search_fields = ('clinic_name', 'user__email', 'address', 'phone')
-    readonly_fields = ('created_at', 'updated_at', 'logo_preview', 'get_user_email')
+    readonly_fields = ('created_at', 'updated_at', 'logo_preview', 'get_user_email', 'geohash')
     
     # Fields to show in add/edit form
     fieldsets = (
@@ -20,6 +22,10 @@ class ClinicProfileAdmin(admin.ModelAdmin):
         ('Contact Details', {
             'fields': ('address', 'phone', 'website')
         }),
+        ('Location', {
+            'fields': ('latitude', 'longitude', 'geohash'),
+            'classes': ('collapse',)
+        }),
         ('Business Information', {
             'fields': ('license_number', 'established_date', 'number_of_doctors', 'services')
         }),
@@ -41,15 +47,14 @@ class ClinicProfileAdmin(admin.ModelAdmin):
     
     def logo_preview(self, obj):
         if obj.logo:
-            return format_html('<img src="{}" width="100" height="100" style="object-fit: cover; border-radius: 5px;" />', obj.logo.url)
+            return format_html('<img src="{}" width="100" height="100" style="object-fit: cover; border-radius: 5px;" />', thumbnail_url(obj.logo))
         return "No logo uploaded"
     logo_preview.short_description = 'Logo Preview'
     
     def get_city(self, obj):
-        """Extract city from address for list display"""
-        if obj.address and ',' in obj.address:
-            return obj.address.split(',')[-1].strip()
-        return '-'
+        """City the address was geocoded to"""
+        place = geocode(obj.address)
+        return place.name if place else '-'
     get_city.short_description = 'City'
     
     def has_logo(self, obj):
@@ -92,7 +97,7 @@ class EmployerProfileAdmin(admin.ModelAdmin):
     
     def logo_preview(self, obj):
         if obj.company_logo:
-            return format_html('<img src="{}" width="100" height="100" style="object-fit: cover; border-radius: 5px;" />', obj.company_logo.url)
+            return format_html('<img src="{}" width="100" height="100" style="object-fit: cover; border-radius: 5px;" />', thumbnail_url(obj.company_logo))
         return "No logo uploaded"
     logo_preview.short_description = 'Logo Preview'
     
@@ -144,7 +149,7 @@ class JobSeekerProfileAdmin(admin.ModelAdmin):
     
     def profile_pic_preview(self, obj):
         if obj.profile_picture:
-            return format_html('<img src="{}" width="100" height="100" style="object-fit: cover; border-radius: 50%;" />', obj.profile_picture.url)
+            return format_html('<img src="{}" width="100" height="100" style="object-fit: cover; border-radius: 50%;" />', thumbnail_url(obj.profile_picture))
         return "No profile picture"
     profile_pic_preview.short_description = 'Profile Picture Preview'
     
@@ -0,0 +1,213 @@
+"""
+Resized variants of profile images.
+
+Logos and profile pictures are stored as uploaded, often several megabytes.
+Each one also gets smaller copies: every size in ``VARIANT_SIZES`` (fitted
+within a square of that many pixels, never enlarged) in WebP and in JPEG,
+stored next to the original as ``variants/<name>.<size>.<format>``.
+
+Variants are rendered on a local process pool (``IMAGE_VARIANT_WORKERS``
+processes per web worker), so decoding and resampling never hold a request
+thread's GIL:
+
+* after an upload commits, its variants are queued in the background
+  (``profiles.signals``);
+* a variant requested before it exists (an upload that was interrupted, or
+  made before this existed) is rendered on first request by the
+  ``image_variant`` view, which waits for it.
+
+Rendering takes an exclusive ``fcntl`` lock on ``<variant base>.lock`` and
+skips variants that already exist, so concurrent requests and the
+background job render each image once. Serializers and admin previews link
+the stored variant when it exists and the view otherwise. Only storages
+with local paths (the default ``FileSystemStorage``) are supported.
+
+``render_variants`` is the code that runs in the pool. It uses only Pillow
+and the standard library, so workers need no Django setup.
+"""
+import logging
+import multiprocessing
+import os
+import posixpath
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, at worst duplicate work
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+VARIANT_SIZES = {'thumb': 128, 'small': 320, 'medium': 800}
+FORMATS = {'webp': ('WEBP', 'image/webp'), 'jpg': ('JPEG', 'image/jpeg')}
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 4},
+    'JPEG': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+VARIANT_PREFIX = 'variants'
+# Written last, so once it exists every variant of the image does
+LAST_VARIANT = (min(VARIANT_SIZES, key=VARIANT_SIZES.get), list(FORMATS)[-1])
+RENDER_TIMEOUT = 30  # seconds a request waits for its variant
+
+# Profile image fields, by model label
+IMAGE_FIELDS = {
+    'profiles.ClinicProfile': ('logo',),
+    'profiles.EmployerProfile': ('company_logo',),
+    'profiles.JobSeekerProfile': ('profile_picture',),
+}
+
+
+def variant_name(name, size, fmt):
+    return f'{VARIANT_PREFIX}/{name}.{size}.{fmt}'
+
+
+def _targets(storage, name):
+    return [
+        (VARIANT_SIZES[size], FORMATS[fmt][0], storage.path(variant_name(name, size, fmt)))
+        for size in VARIANT_SIZES for fmt in FORMATS
+    ]
+
+
+def _flatten(image):
+    # JPEG has no alpha: composite onto white
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_variants(source, targets):
+    """
+    Render ``(box size, Pillow format, path)`` targets from the image at
+    ``source``, under a lock, skipping those that exist. Returns the number
+    rendered.
+    """
+    missing = [target for target in targets if not os.path.exists(target[2])]
+    if not missing:
+        return 0
+    os.makedirs(os.path.dirname(missing[0][2]), exist_ok=True)
+    lock_path = missing[0][2].rsplit('.', 2)[0] + '.lock'
+    with open(lock_path, 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        # Another process may have rendered them while this one waited
+        missing = [target for target in missing if not os.path.exists(target[2])]
+        if not missing:
+            return 0
+        with Image.open(source) as original:
+            largest = max(size for size, _, _ in missing)
+            # JPEG sources decode straight at a reduced scale
+            original.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(original)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+            # Largest first, each size resampled from the previous one
+            for size in sorted({size for size, _, _ in missing}, reverse=True):
+                image = image.copy()
+                image.thumbnail((size, size), Image.LANCZOS)
+                for box, fmt, path in missing:
+                    if box != size:
+                        continue
+                    partial = f'{path}.{os.getpid()}.tmp'
+                    (_flatten(image) if fmt == 'JPEG' else image).save(partial, fmt, **SAVE_OPTIONS[fmt])
+                    os.replace(partial, path)
+    return len(missing)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned, not forked: web workers run threads, and forking those is unsafe
+            _executor = ProcessPoolExecutor(
+                getattr(settings, 'IMAGE_VARIANT_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def _log_failure(future):
+    # The image view renders whatever is still missing on first request
+    if future.exception() is not None:
+        logger.warning('Rendering image variants failed: %s', future.exception())
+
+
+def schedule(storage, name):
+    """Render the variants of ``name`` in the background once the transaction commits"""
+    def submit():
+        future = executor().submit(render_variants, storage.path(name), _targets(storage, name))
+        future.add_done_callback(_log_failure)
+    transaction.on_commit(submit)
+
+
+def ensure_variants(storage, name):
+    """Render any missing variants of ``name`` and wait for them"""
+    executor().submit(render_variants, storage.path(name), _targets(storage, name)).result(RENDER_TIMEOUT)
+
+
+def is_image_name(name):
+    """Whether ``name`` is a safe, stored name under a profile image field"""
+    from .models import PROFILE_MODELS
+
+    if not name or posixpath.normpath(name) != name or name.startswith(('/', '../')):
+        return False
+    prefixes = [
+        model._meta.get_field(field).upload_to
+        for model in PROFILE_MODELS.values()
+        for field in IMAGE_FIELDS[model._meta.label]
+    ]
+    return name.startswith(tuple(prefixes))
+
+
+def variants_ready(file):
+    """Whether every variant of a stored image has been rendered"""
+    return bool(file) and file.storage.exists(variant_name(file.name, *LAST_VARIANT))
+
+
+def render_state(instance):
+    """
+    Per image field of ``instance``, whether it has nothing left to render
+    (no image, or every variant rendered); for ETags
+    """
+    files = [getattr(instance, field) for field in IMAGE_FIELDS[instance._meta.label]]
+    return tuple(not file or variants_ready(file) for file in files)
+
+
+def variant_urls(file, request=None):
+    """
+    ``{size: {format: url}}`` for a stored image, or None without one. The
+    stored files are linked once rendered, the rendering view until then.
+    """
+    if not file:
+        return None
+    storage, name = file.storage, file.name
+    rendered = variants_ready(file)
+    urls = {}
+    for size in VARIANT_SIZES:
+        urls[size] = {}
+        for fmt in FORMATS:
+            if rendered:
+                url = storage.url(variant_name(name, size, fmt))
+            else:
+                url = reverse('image_variant', kwargs={'size': size, 'fmt': fmt, 'name': name})
+            urls[size][fmt] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def thumbnail_url(file):
+    """Small WebP variant of a stored image, for previews"""
+    urls = variant_urls(file)
+    # Previews crop to a square, so the short side must still cover ~100px at 2x
+    return urls['small']['webp'] if urls else None
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:30
+
+import filestore.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='clinicprofile',
+            name='license_document',
+            field=models.FileField(blank=True, null=True, storage=filestore.storage.ContentAddressedStorage(), upload_to='clinics/licenses/'),
+        ),
+        migrations.AlterField(
+            model_name='jobseekerprofile',
+            name='certifications',
+            field=models.FileField(blank=True, null=True, storage=filestore.storage.ContentAddressedStorage(), upload_to='job_seekers/certifications/'),
+        ),
+        migrations.AlterField(
+            model_name='jobseekerprofile',
+            name='resume',
+            field=models.FileField(blank=True, null=True, storage=filestore.storage.ContentAddressedStorage(), upload_to='job_seekers/resumes/'),
+        ),
+    ]
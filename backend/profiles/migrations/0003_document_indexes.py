@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:33
+
+import filestore.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_content_addressed_documents'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobseekerprofile',
+            name='certifications',
+            field=models.FileField(blank=True, db_index=True, null=True, storage=filestore.storage.ContentAddressedStorage(), upload_to='job_seekers/certifications/'),
+        ),
+        migrations.AlterField(
+            model_name='jobseekerprofile',
+            name='resume',
+            field=models.FileField(blank=True, db_index=True, null=True, storage=filestore.storage.ContentAddressedStorage(), upload_to='job_seekers/resumes/'),
+        ),
+    ]
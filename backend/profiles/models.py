@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 
+from filestore.storage import blob_storage
+
 class ClinicProfile(models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, 
@@ -9,6 +11,10 @@ class ClinicProfile(models.Model):
     )
     clinic_name = models.CharField(max_length=255)
     address = models.TextField()
+    # Looked up from address in the local gazetteer, see geo.signals
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False)
     phone = models.CharField(max_length=20)
     description = models.TextField(blank=True)
     license_number = models.CharField(max_length=100, blank=True)
@@ -20,13 +26,21 @@ class ClinicProfile(models.Model):
     number_of_doctors = models.IntegerField(default=0)
     services = models.TextField(blank=True)  # JSON or comma-separated services
     
-    # Uploads
+    # Uploads; documents are stored once per distinct content, see filestore.storage
     logo = models.ImageField(upload_to='clinics/logos/', blank=True, null=True)
-    license_document = models.FileField(upload_to='clinics/licenses/', blank=True, null=True)
+    license_document = models.FileField(upload_to='clinics/licenses/', storage=blob_storage, blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    geocode_field = 'address'
+    
+    class Meta:
+        indexes = [
+            # Keyset pagination order of the clinic directory
+            models.Index(fields=['-created_at', '-id'], name='clinic_created_id_idx'),
+        ]
+    
     def __str__(self):
         return self.clinic_name
 
@@ -71,13 +85,26 @@ class JobSeekerProfile(models.Model):
     education = models.TextField(blank=True)
     skills = models.TextField(blank=True)  # JSON or comma-separated skills
     
-    # Uploads
+    # Uploads; documents are stored once per distinct content, see filestore.storage
     profile_picture = models.ImageField(upload_to='job_seekers/profile_pics/', blank=True, null=True)
-    resume = models.FileField(upload_to='job_seekers/resumes/', blank=True, null=True)
-    certifications = models.FileField(upload_to='job_seekers/certifications/', blank=True, null=True)
+    resume = models.FileField(
+        upload_to='job_seekers/resumes/', storage=blob_storage, blank=True, null=True, db_index=True
+    )
+    certifications = models.FileField(
+        upload_to='job_seekers/certifications/', storage=blob_storage, blank=True, null=True,
+        db_index=True
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"{self.first_name} {self.last_name}"
\ No newline at end of file
+        return f"{self.first_name} {self.last_name}"
+
+
+# Profile model for each user_type that has one
+PROFILE_MODELS = {
+    'clinic': ClinicProfile,
+    'employer': EmployerProfile,
+    'job_seeker': JobSeekerProfile,
+}
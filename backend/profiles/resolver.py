@@ -0,0 +1,79 @@
+"""
+A user's profile, found in one place.
+
+A user has at most one profile, in the table for their ``user_type``
+(``PROFILE_MODELS``). ``get_profile(user)`` reads that table and no other,
+instead of probing the ``<type>_profile`` relations in turn. The answer is
+kept in that relation's cache on the user instance, so the rest of the
+request gets it for free. A profile loaded with ``select_related`` is used
+as it is.
+
+Across requests, the ``PROFILE_CACHE`` cache holds whether each user has a
+profile and its pk. A user known to have none costs no query at all, and
+one known to have one is read by primary key. Entries are dropped when a
+profile is created or deleted. A cached pk whose row is gone is noticed and
+re-resolved. A cached "no profile" is trusted until ``PROFILE_CACHE_TIMEOUT``,
+so point ``PROFILE_CACHE`` at a shared backend when running several workers,
+as with ``JOB_RESPONSE_CACHE``. Writes pass ``fresh=True`` to skip the cache.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import PROFILE_MODELS
+
+NO_PROFILE = 0
+
+
+def profile_model(user):
+    """The profile model for the user's type, or None if it has none"""
+    return PROFILE_MODELS.get(user.user_type)
+
+
+def _cache():
+    alias = getattr(settings, 'PROFILE_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def _key(user_type, user_id):
+    return f'profile:{user_type}:{user_id}'
+
+
+def get_profile(user, fresh=False):
+    """The user's profile or None; one query at most, unless a cached pk is stale"""
+    model = profile_model(user)
+    if model is None:
+        return None
+    # The reverse one-to-one relation's own cache, as select_related fills
+    # it and as assigning profile.user updates it
+    relation = model._meta.get_field('user').remote_field
+    if relation.is_cached(user) and not fresh:
+        return relation.get_cached_value(user)
+
+    cache = None if fresh else _cache()
+    known = cache.get(_key(user.user_type, user.pk)) if cache is not None else None
+    if known == NO_PROFILE:
+        profile = None
+    else:
+        profile = model.objects.filter(pk=known, user_id=user.pk).first() if known else None
+        if profile is None:
+            profile = model.objects.filter(user_id=user.pk).first()
+            cache = _cache()
+            if cache is not None:
+                cache.set(
+                    _key(user.user_type, user.pk),
+                    NO_PROFILE if profile is None else profile.pk,
+                    timeout=getattr(settings, 'PROFILE_CACHE_TIMEOUT', 60),
+                )
+    relation.set_cached_value(user, profile)
+    return profile
+
+
+def forget(user_type, user_id):
+    """Drop the cached entry for a user; done when a profile comes or goes"""
+    cache = _cache()
+    if cache is None:
+        return
+    cache.delete(_key(user_type, user_id))
+    # Again after commit, or a concurrent read could re-cache the old state
+    transaction.on_commit(lambda: cache.delete(_key(user_type, user_id)))
@@ -1,15 +1,23 @@
 from rest_framework import serializers
+from .images import variant_urls
 from .models import ClinicProfile, EmployerProfile, JobSeekerProfile
 from django.conf import settings
 
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs of an image's resized variants by size and format, see profiles.images"""
+    
+    def to_representation(self, value):
+        return variant_urls(value, self.context.get('request'))
+
 class ClinicProfileSerializer(serializers.ModelSerializer):
     logo = serializers.ImageField(required=False, allow_null=True)
+    logo_variants = ImageVariantsField(source='logo')
     license_document = serializers.FileField(required=False, allow_null=True)
     
     class Meta:
         model = ClinicProfile
         fields = '__all__'
-        read_only_fields = ('user', 'created_at', 'updated_at')
+        read_only_fields = ('user', 'created_at', 'updated_at', 'latitude', 'longitude')
     
     def validate_user(self, value):
         if value.user_type != 'clinic':
@@ -23,8 +31,27 @@ class ClinicProfileSerializer(serializers.ModelSerializer):
             validated_data['user'] = request.user
         return super().create(validated_data)
 
+class ClinicDirectorySerializer(serializers.ModelSerializer):
+    """Public listing of a clinic; ``distance_km`` is set on ?near= searches"""
+    distance_km = serializers.SerializerMethodField()
+    logo_variants = ImageVariantsField(source='logo')
+    
+    class Meta:
+        model = ClinicProfile
+        fields = (
+            'id', 'clinic_name', 'clinic_type', 'address', 'latitude', 'longitude', 'phone',
+            'website', 'description', 'services', 'number_of_doctors', 'logo', 'logo_variants',
+            'distance_km',
+        )
+        read_only_fields = fields
+    
+    def get_distance_km(self, obj):
+        distance = getattr(obj, 'distance_km', None)
+        return None if distance is None else round(distance, 2)
+
 class EmployerProfileSerializer(serializers.ModelSerializer):
     company_logo = serializers.ImageField(required=False, allow_null=True)
+    company_logo_variants = ImageVariantsField(source='company_logo')
     
     class Meta:
         model = EmployerProfile
@@ -44,6 +71,7 @@ class EmployerProfileSerializer(serializers.ModelSerializer):
 
 class JobSeekerProfileSerializer(serializers.ModelSerializer):
     profile_picture = serializers.ImageField(required=False, allow_null=True)
+    profile_picture_variants = ImageVariantsField(source='profile_picture')
     resume = serializers.FileField(required=False, allow_null=True)
     certifications = serializers.FileField(required=False, allow_null=True)
     
@@ -61,4 +89,11 @@ class JobSeekerProfileSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and request.user:
             validated_data['user'] = request.user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+# Serializer for each user_type's own profile, as PROFILE_MODELS
+PROFILE_SERIALIZERS = {
+    'clinic': ClinicProfileSerializer,
+    'employer': EmployerProfileSerializer,
+    'job_seeker': JobSeekerProfileSerializer,
+}
@@ -0,0 +1,57 @@
+from django.db.models.signals import post_delete, post_init, post_save
+
+from . import images
+from .images import IMAGE_FIELDS
+from .models import PROFILE_MODELS
+from .resolver import forget
+
+USER_TYPES = {model: user_type for user_type, model in PROFILE_MODELS.items()}
+
+
+def forget_created_profile(sender, instance, created, **kwargs):
+    """Keep the resolver's cached profile pks in step with the tables"""
+    if created:
+        forget(USER_TYPES[sender], instance.user_id)
+
+
+def forget_deleted_profile(sender, instance, **kwargs):
+    forget(USER_TYPES[sender], instance.user_id)
+
+
+for model in PROFILE_MODELS.values():
+    post_save.connect(forget_created_profile, sender=model, dispatch_uid=f'profile_created_{model._meta.label}')
+    post_delete.connect(forget_deleted_profile, sender=model, dispatch_uid=f'profile_deleted_{model._meta.label}')
+
+
+def _name(value):
+    if not value:
+        return ''
+    return value if isinstance(value, str) else (value.name or '')
+
+
+def remember_images(sender, instance, **kwargs):
+    instance._image_names = {
+        field: _name(instance.__dict__[field])
+        for field in IMAGE_FIELDS[sender._meta.label]
+        if field in instance.__dict__
+    }
+
+
+def render_uploaded_images(sender, instance, raw=False, **kwargs):
+    """Queue the variants of newly stored images"""
+    if raw:
+        return
+    loaded = getattr(instance, '_image_names', {})
+    for field in IMAGE_FIELDS[sender._meta.label]:
+        if field not in instance.__dict__:
+            continue
+        # The descriptor wraps the stored name in a FieldFile with its storage
+        file = getattr(instance, field)
+        if file and file.name != loaded.get(field, ''):
+            images.schedule(file.storage, file.name)
+    remember_images(sender, instance)
+
+
+for model in PROFILE_MODELS.values():
+    post_init.connect(remember_images, sender=model, dispatch_uid=f'profile_images_init_{model._meta.label}')
+    post_save.connect(render_uploaded_images, sender=model, dispatch_uid=f'profile_images_save_{model._meta.label}')
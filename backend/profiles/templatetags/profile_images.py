@@ -0,0 +1,11 @@
+from django import template
+
+from profiles.images import thumbnail_url
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(file):
+    """``{{ profile.logo|thumbnail }}``: URL of the image's small variant"""
+    return thumbnail_url(file) or ''
@@ -1,3 +1,95 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from . import images, resolver
+from .models import ClinicProfile, JobSeekerProfile
+
+
+class ProfileValidatorTests(TestCase):
+    """The profile ETag changes when an image's variants finish rendering"""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = User.objects.create_user('clinic@example.com', 'pw', user_type='clinic')
+        png = io.BytesIO()
+        Image.new('RGB', (600, 400), 'teal').save(png, 'PNG')
+        # Rendering is queued on commit, which never comes in a TestCase
+        self.profile = ClinicProfile.objects.create(
+            user=user, clinic_name='Clinic', address='Lagos', phone='1',
+            logo=ContentFile(png.getvalue(), name='logo.png'),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_rendered_variants_change_the_etag(self):
+        response = self.client.get('/api/profile/me/')
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('/api/profile/images/', response.json()['logo_variants']['small']['webp'])
+        etag = response['ETag']
+
+        logo = self.profile.logo
+        images.render_variants(logo.path, images._targets(logo.storage, logo.name))
+        response = self.client.get('/api/profile/me/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('/media/variants/', response.json()['logo_variants']['small']['webp'])
+
+
+class ProfileResolverTests(TestCase):
+    """The cached profile pk follows profiles being created and deleted"""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        self.user = User.objects.create_user('seeker@example.com', 'pw', user_type='job_seeker')
+
+    def resolve(self, queries):
+        # A fresh instance, as each request loads its own user
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(queries):
+            return resolver.get_profile(user)
+
+    def test_created_profile_is_found(self):
+        self.assertIsNone(self.resolve(1))
+        self.assertIsNone(self.resolve(0))
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = JobSeekerProfile.objects.create(user=self.user, first_name='Ada', last_name='Obi')
+        self.assertEqual(self.resolve(1), profile)
+        self.assertEqual(self.resolve(1), profile)
+
+    def test_deleted_profile_is_forgotten(self):
+        profile = JobSeekerProfile.objects.create(user=self.user, first_name='Ada', last_name='Obi')
+        self.assertEqual(self.resolve(1), profile)
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.delete()
+        self.assertIsNone(self.resolve(1))
+        self.assertIsNone(self.resolve(0))
+
+    def test_stale_pk_is_resolved_again(self):
+        profile = JobSeekerProfile.objects.create(user=self.user, first_name='Ada', last_name='Obi')
+        self.assertEqual(self.resolve(1), profile)
+        # Replaced without the signals, as a raw import would
+        JobSeekerProfile.objects.filter(pk=profile.pk).update(id=profile.pk + 100)
+        self.assertEqual(self.resolve(2).pk, profile.pk + 100)
+        self.assertEqual(self.resolve(1).pk, profile.pk + 100)
+
+    def test_select_related_profile_is_used(self):
+        profile = JobSeekerProfile.objects.create(user=self.user, first_name='Ada', last_name='Obi')
+        user = User.objects.select_related('job_seeker_profile').get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.get_profile(user), profile)
 
-# Create your tests here.
@@ -1,7 +1,13 @@
-from django.urls import path
-from .views import CreateProfileAPIView, GetUpdateProfileAPIView
+from django.urls import path, re_path
+from .images import FORMATS, VARIANT_SIZES
+from .views import ClinicDirectoryAPIView, CreateProfileAPIView, GetUpdateProfileAPIView, image_variant
 
 urlpatterns = [
     path('create/', CreateProfileAPIView.as_view(), name='create_profile'),
     path('me/', GetUpdateProfileAPIView.as_view(), name='get_update_profile'),
+    path('clinics/', ClinicDirectoryAPIView.as_view(), name='clinic_directory'),
+    re_path(
+        rf"^images/(?P<size>{'|'.join(VARIANT_SIZES)})\.(?P<fmt>{'|'.join(FORMATS)})/(?P<name>.+)$",
+        image_variant, name='image_variant',
+    ),
 ]
\ No newline at end of file
@@ -1,13 +1,21 @@
+from concurrent.futures import TimeoutError as RenderTimeout
+
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+from PIL import UnidentifiedImageError
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from .models import ClinicProfile, EmployerProfile, JobSeekerProfile
-from .serializers import (
-    ClinicProfileSerializer,
-    EmployerProfileSerializer,
-    JobSeekerProfileSerializer
-)
+from arnica_connect.conditional import conditional_response, make_etag, set_validators
+from geo.query import filter_near
+from jobs.pagination import KeysetPagination
+from . import images
+from .models import ClinicProfile
+from .resolver import get_profile
+from .serializers import ClinicDirectorySerializer, PROFILE_SERIALIZERS
 
 class CreateProfileAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -15,26 +23,17 @@ class CreateProfileAPIView(APIView):
     
     def post(self, request):
         user = request.user
-        user_type = user.user_type
         
-        # Check if profile already exists
-        profile_attr = f'{user_type}_profile'
-        if hasattr(user, profile_attr):
-            existing_profile = getattr(user, profile_attr)
+        # Check if profile already exists; the database decides, not the cache
+        existing_profile = get_profile(user, fresh=True)
+        if existing_profile is not None:
             return Response(
                 {'error': 'Profile already exists', 'profile_id': existing_profile.id},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create serializer with request context
-        serializer_class = None
-        if user_type == 'clinic':
-            serializer_class = ClinicProfileSerializer
-        elif user_type == 'employer':
-            serializer_class = EmployerProfileSerializer
-        elif user_type == 'job_seeker':
-            serializer_class = JobSeekerProfileSerializer
-        else:
+        serializer_class = PROFILE_SERIALIZERS.get(user.user_type)
+        if serializer_class is None:
             return Response(
                 {'error': 'Invalid user type'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -54,61 +53,97 @@ class CreateProfileAPIView(APIView):
         # Return validation errors
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+def _profile_not_found():
+    return Response(
+        {'error': 'Profile not found. Please create your profile first.'},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
 class GetUpdateProfileAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     
     def get(self, request):
-        user = request.user
-        user_type = user.user_type
+        profile = get_profile(request.user)
+        if profile is None:
+            return _profile_not_found()
         
-        if user_type == 'clinic' and hasattr(user, 'clinic_profile'):
-            serializer = ClinicProfileSerializer(user.clinic_profile, context={'request': request})
-        elif user_type == 'employer' and hasattr(user, 'employer_profile'):
-            serializer = EmployerProfileSerializer(user.employer_profile, context={'request': request})
-        elif user_type == 'job_seeker' and hasattr(user, 'job_seeker_profile'):
-            serializer = JobSeekerProfileSerializer(user.job_seeker_profile, context={'request': request})
-        else:
-            return Response(
-                {'error': 'Profile not found. Please create your profile first.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        # Answer revalidation from (pk, updated_at) alone, before touching serializers
+        validators = self.get_validators(request, profile)
+        not_modified = conditional_response(request, *validators)
+        if not_modified is not None:
+            return not_modified
         
-        return Response(serializer.data)
+        serializer = PROFILE_SERIALIZERS[request.user.user_type](profile, context={'request': request})
+        response = Response(serializer.data)
+        set_validators(response, *validators)
+        return response
+    
+    def get_validators(self, request, profile):
+        """(etag, last_modified) for the user's profile"""
+        # File fields serialize to absolute URLs, so the host is part of the body.
+        # Image variant URLs change when rendering finishes, which leaves
+        # updated_at alone: the ETag covers it, and no Last-Modified is given
+        # until every variant exists
+        rendered = images.render_state(profile)
+        etag = make_etag(
+            'profile', request.user.user_type, profile.pk, profile.updated_at, request.get_host(), rendered
+        )
+        return etag, profile.updated_at if all(rendered) else None
     
     def put(self, request):
-        user = request.user
-        user_type = user.user_type
+        profile = get_profile(request.user, fresh=True)
+        if profile is None:
+            return _profile_not_found()
         
-        if user_type == 'clinic' and hasattr(user, 'clinic_profile'):
-            serializer = ClinicProfileSerializer(
-                user.clinic_profile, 
-                data=request.data, 
-                partial=True,
-                context={'request': request}
-            )
-        elif user_type == 'employer' and hasattr(user, 'employer_profile'):
-            serializer = EmployerProfileSerializer(
-                user.employer_profile, 
-                data=request.data, 
-                partial=True,
-                context={'request': request}
-            )
-        elif user_type == 'job_seeker' and hasattr(user, 'job_seeker_profile'):
-            serializer = JobSeekerProfileSerializer(
-                user.job_seeker_profile, 
-                data=request.data, 
-                partial=True,
-                context={'request': request}
-            )
-        else:
-            return Response(
-                {'error': 'Profile not found. Please create your profile first.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        serializer = PROFILE_SERIALIZERS[request.user.user_type](
+            profile,
+            data=request.data,
+            partial=True,
+            context={'request': request}
+        )
         
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class ClinicDirectoryAPIView(generics.ListAPIView):
+    """
+    Clinic directory, newest first. ``?near=lat,lng&radius_km=`` keeps
+    clinics within the radius, nearest first; ``clinic_type`` filters by
+    type.
+    """
+    serializer_class = ClinicDirectorySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    
+    def get_queryset(self):
+        clinics = ClinicProfile.objects.all()
+        clinic_type = self.request.query_params.get('clinic_type', '').strip()
+        if clinic_type:
+            clinics = clinics.filter(clinic_type__iexact=clinic_type)
+        return filter_near(clinics, self.request.query_params)
+
+
+@require_GET
+def image_variant(request, size, fmt, name):
+    """
+    A resized variant of a profile image, rendered on first request if it
+    does not exist yet. Once rendered, serializers link the stored file.
+    """
+    if not images.is_image_name(name) or not default_storage.exists(name):
+        raise Http404('No such image.')
+    variant = images.variant_name(name, size, fmt)
+    if not default_storage.exists(variant):
+        try:
+            images.ensure_variants(default_storage, name)
+        except (UnidentifiedImageError, OSError, RenderTimeout):
+            raise Http404('The image cannot be resized.')
+    response = FileResponse(
+        open(default_storage.path(variant), 'rb'), content_type=images.FORMATS[fmt][1]
+    )
+    # Variant names never change content
+    patch_cache_control(response, public=True, max_age=365 * 24 * 3600, immutable=True)
+    return response